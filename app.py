@@ -1,18 +1,14 @@
 import streamlit as st
-from openai import OpenAI
-from io import BytesIO
-from docx import Document
-import pandas as pd
-from PyPDF2 import PdfReader
+from openai_functions import gerar_assunto_contextualizado, gerar_plano_aula, gerar_questoes
+from file_processing import processar_arquivos, docx_sob_demanda
+from utils import guardar_contexto_da_sessao, contexto_da_sessao
+from prewarm import iniciar_preaquecimento
 
 # Configuração inicial
 st.set_page_config(page_title="Assisente de IA para Professores", layout="wide")
 
-# Obtém a chave da API OpenAI dos secrets
-api_key = st.secrets["OPENAI_API_KEY"]
-
-# Configuração do cliente OpenAI
-client = OpenAI(api_key=api_key)
+# Adianta em segundo plano as importações pesadas e a conexão com a API
+iniciar_preaquecimento()
 
 # Listas globais para reutilização
 ANOS_SERIES = [
@@ -29,149 +25,6 @@ COMPONENTES_CURRICULARES = [
     "Filosofia", "Redação", "Literatura"
 ]
 
-# Função para processar uploads
-
-def processar_arquivos(uploaded_file):
-    """Processa arquivos e retorna texto extraído."""
-    try:
-        if uploaded_file.name.endswith(".docx"):
-            doc = Document(uploaded_file)
-            texto = "\n".join([p.text for p in doc.paragraphs])
-
-        elif uploaded_file.name.endswith(".txt"):
-            texto = uploaded_file.read().decode("utf-8")
-
-        elif uploaded_file.name.endswith(".pdf"):
-            reader = PdfReader(uploaded_file)
-            texto = "\n".join([page.extract_text() for page in reader.pages])
-
-        elif uploaded_file.name.endswith(".csv"):
-            df = pd.read_csv(uploaded_file)
-            texto = df.to_string()
-
-        elif uploaded_file.name.endswith(".xlsx"):
-            df = pd.read_excel(uploaded_file)
-            texto = df.to_string()
-
-        else:
-            st.error("Tipo de arquivo não suportado. Envie .docx, .txt, .pdf, .csv ou .xlsx.")
-            return None
-
-        return texto
-
-    except Exception as e:
-        st.error(f"Erro ao processar arquivo: {e}")
-        return None
-
-def gerar_questoes(ano, componente, assunto, dificuldade, numero_questoes, tipo, contexto=None):
-    """Função para gerar questões usando a OpenAI"""
-    tipo_texto = "dissertativas" if tipo == "Dissertativas" else "objetivas"
-    contexto_texto = f"Utilize o seguinte contexto: \n{contexto}\n\n" if contexto else ""
-
-    prompt = f"""
-    {contexto_texto}
-    Crie um conjunto de {numero_questoes} questões {tipo_texto} sobre o seguinte assunto:
-    - Ano/Série: {ano}
-    - Componente Curricular: {componente}
-    - Assunto: {assunto if assunto else "N/A"}
-    - Dificuldade: {dificuldade}
-
-    Certifique-se de que as questões sejam claras e adequadas ao nível de ensino informado.
-    """
-    response = client.chat.completions.create(
-        model="gpt-3.5-turbo",
-        messages=[{"role": "system", "content": "Você é um assistente especializado na criação de questões educacionais."},
-                  {"role": "user", "content": prompt}]
-    )
-    return response.choices[0].message.content
-
-def gerar_plano_aula(ano, componente, capitulo, modulo, duracao, metodologia, caracteristicas, assunto=None, contexto=None):
-    """Função para gerar plano de aula usando a OpenAI"""
-    contexto_texto = f"Utilize o seguinte contexto: \n{contexto}\n\n" if contexto else ""
-
-    prompt = f"""
-    {contexto_texto}
-    Crie um plano de aula com as seguintes características:
-    - Ano/Série: {ano}
-    - Componente Curricular: {componente}
-    - Capítulo do livro: {capitulo}
-    - Módulo do capítulo: {modulo}
-    - Assunto: {assunto}
-    - Duração: {duracao} minutos
-    - Metodologia: {metodologia}
-    - Características da Turma: {caracteristicas if caracteristicas else "N/A"}
-    """
-    response = client.chat.completions.create(
-        model="gpt-3.5-turbo",
-        messages=[{"role": "system", "content": "Você é um assistente especializado em geração de planejamento educacional para os professores."},
-                  {"role": "user", "content": prompt}]
-    )
-    return response.choices[0].message.content
-
-
-def gerar_assunto_contextualizado(ano, componente, assunto, interesse, contexto=None):
-    """Função para gerar um assunto contextualizado usando a OpenAI"""
-
-    # Construir o início do prompt com ou sem contexto
-    contexto_texto = f"Utilize o seguinte contexto: \n{contexto}\n\n" if contexto else ""
-
-    # Construir o restante do prompt
-    prompt = f"""
-    {contexto_texto}
-    Crie um conteúdo contextualizado com as seguintes informações:
-    - Ano/Série: {ano}
-    - Componente Curricular: {componente}
-    - Assunto: {assunto if assunto else "N/A"}
-    - Tema de Interesse: {interesse if interesse else "N/A"}
-    """
-
-    # Chamada à API
-    response = client.chat.completions.create(
-        model="gpt-3.5-turbo",
-        messages=[{"role": "system", "content": "Você é um assistente especializado em gerar contextualização educacional."},
-                  {"role": "user", "content": prompt}]
-    )
-    return response.choices[0].message.content
-
-def corrigir_questoes(respostas_aluno, gabarito, tipo, contexto=None):
-    """Função para corrigir questões usando a OpenAI"""
-    tipo_texto = "dissertativas" if tipo == "Dissertativas" else "objetivas"
-    contexto_texto = f"Utilize o seguinte contexto: \n{contexto}\n\n" if contexto else ""
-
-    prompt = f"""
-    {contexto_texto}
-    Corrija as seguintes questões {tipo_texto} respondidas por um aluno. Baseie-se no gabarito fornecido e forneça uma análise detalhada de cada resposta:
-
-    Respostas do Aluno:
-    {respostas_aluno}
-
-    Gabarito:
-    {gabarito}
-
-    Para cada questão, avalie:
-    1. Se a resposta está correta ou não.
-    2. Para questões incorretas, explique o erro e forneça a resposta correta.
-    3. Para questões dissertativas, avalie a qualidade da resposta e sugira melhorias.
-    """
-    response = client.chat.completions.create(
-        model="gpt-3.5-turbo",
-        messages=[{"role": "system", "content": "Você é um assistente especializado em correção de questões educacionais."},
-                  {"role": "user", "content": prompt}]
-    )
-    return response.choices[0].message.content
-
-
-def gerar_docx(conteudo, titulo):
-    """Função para gerar um arquivo DOCX a partir do conteúdo fornecido"""
-    doc = Document()
-    doc.add_heading(titulo, level=1)
-    doc.add_paragraph(conteudo)
-
-    buffer = BytesIO()
-    doc.save(buffer)
-    buffer.seek(0)
-    return buffer
-
 # Barra lateral
 st.sidebar.title("Assistente de IA para Professores")
 st.sidebar.markdown("Escolha um módulo:")
@@ -190,7 +43,7 @@ uploaded_file = st.sidebar.file_uploader(
 if uploaded_file:
     contexto_texto = processar_arquivos(uploaded_file)
     if contexto_texto:
-        st.session_state["uploaded_file_content"] = contexto_texto
+        guardar_contexto_da_sessao(contexto_texto)
         st.success(f"Arquivo processado e armazenado para o módulo {modulo}.")
 
 if modulo == "Plano de Aula":
@@ -210,7 +63,7 @@ if modulo == "Plano de Aula":
             caracteristicas = st.text_area("Características da Turma (opcional)", placeholder="Exemplo: Turma distraída, gosta de conversar durante a aula.")
 
         # Contexto do documento
-        contexto = st.session_state.get("uploaded_file_content", None)
+        contexto = contexto_da_sessao()
 
         # Mensagem indicando que "Capítulo" e "Módulo" estão desativados
         #st.markdown("⚠️ **A funcionalidade de Capítulo e Módulo estará disponível em breve.**")
@@ -238,10 +91,9 @@ if modulo == "Plano de Aula":
                     st.markdown(plano_aula)
 
                     # Botão para download
-                    buffer = gerar_docx(plano_aula, "Plano de Aula")
                     st.download_button(
                         "Baixar Plano de Aula",
-                        data=buffer,
+                        data=docx_sob_demanda(plano_aula, "Plano de Aula"),
                         file_name="plano_de_aula.docx",
                         mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document"
                     )
@@ -269,7 +121,7 @@ elif modulo == "Assunto Contextualizado":
             interesse = st.text_input("Tema de Interesse (opcional)", placeholder="Exemplo: Fórmula 1")
 
         # Recuperar o conteúdo do arquivo carregado
-        contexto = st.session_state.get("uploaded_file_content", None)
+        contexto = contexto_da_sessao()
 
         gerar = st.form_submit_button("Gerar Assunto Contextualizado")
 
@@ -285,10 +137,9 @@ elif modulo == "Assunto Contextualizado":
                     st.markdown(conteudo)
 
                     # Botão para download
-                    buffer = gerar_docx(conteudo, "Assunto Contextualizado")
                     st.download_button(
                         "Baixar Assunto Contextualizado",
-                        data=buffer,
+                        data=docx_sob_demanda(conteudo, "Assunto Contextualizado"),
                         file_name="assunto_contextualizado.docx",
                         mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document"
                     )
@@ -311,7 +162,7 @@ elif modulo == "Questões":
             dificuldade = st.selectbox("Dificuldade", ["Selecione uma opção", "Fácil", "Médio", "Difícil"])
             tipo = st.selectbox("Tipo de Questões", ["Selecione uma opção", "Objetivas", "Dissertativas"])
 
-        contexto = st.session_state.get("uploaded_file_content", None)
+        contexto = contexto_da_sessao()
         gerar = st.form_submit_button("Gerar Questões")
 
     if gerar:
@@ -327,10 +178,9 @@ elif modulo == "Questões":
                     st.markdown(questoes)
 
                     # Botão para download
-                    buffer = gerar_docx(questoes, "Questões")
                     st.download_button(
                         "Baixar Questões",
-                        data=buffer,
+                        data=docx_sob_demanda(questoes, "Questões"),
                         file_name="questoes.docx",
                         mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document"
                     )
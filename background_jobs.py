@@ -0,0 +1,194 @@
+"""Execução das gerações em segundo plano, fora do rerun do Streamlit.
+
+Os formulários enviam a geração como uma tarefa e guardam só o id; a tarefa
+roda num pool de threads do processo e o resultado fica na tabela de tarefas,
+compartilhada por todas as sessões. Cada aba acompanha a sua tarefa com um
+fragmento que se reexecuta sozinho, então o professor pode trocar de aba e
+disparar outras gerações enquanto uma está em andamento. As tarefas são
+indexadas pelo professor (dono) e pelo tipo: se o navegador reconectar, a
+nova sessão encontra a tarefa e o seu resultado.
+"""
+import itertools
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from instrumentation import get_metricas
+from utils import obter_config
+
+logger = logging.getLogger(__name__)
+
+NA_FILA = "na_fila"
+EXECUTANDO = "executando"
+CONCLUIDA = "concluida"
+FALHOU = "falhou"
+CANCELADA = "cancelada"
+FINALIZADOS = (CONCLUIDA, FALHOU, CANCELADA)
+
+
+class TarefaCancelada(Exception):
+    pass
+
+
+class Tarefa:
+    """Uma geração em segundo plano.
+
+    A função da tarefa recebe a própria Tarefa como primeiro argumento para
+    publicar o texto parcial (`acrescentar`) e o progresso (`relatar`); o que
+    ela retorna vira o `resultado`.
+    """
+
+    def __init__(self, id, dono, tipo):
+        self.id = id
+        self.dono = dono
+        self.tipo = tipo
+        self.estado = NA_FILA
+        self.resultado = None
+        self.erro = None
+        self.progresso = None
+        self.mensagem = None
+        self.criada_em = time.time()
+        self.iniciada_em = None
+        self.concluida_em = None
+        self._partes = []
+        self._cancelar = threading.Event()
+
+    def acrescentar(self, trecho):
+        """Publica um trecho do texto parcial; interrompe a tarefa se ela foi cancelada."""
+        if self._cancelar.is_set():
+            raise TarefaCancelada()
+        self._partes.append(trecho)
+
+    def relatar(self, feitos, total, mensagem=None):
+        if self._cancelar.is_set():
+            raise TarefaCancelada()
+        self.progresso = feitos / total if total else None
+        self.mensagem = mensagem
+
+    def texto_parcial(self):
+        return "".join(self._partes)
+
+    @property
+    def finalizada(self):
+        return self.estado in FINALIZADOS
+
+
+def transmitir(tarefa, trechos):
+    """Consome um stream de trechos publicando o texto parcial; retorna o texto completo.
+
+    Se a tarefa for cancelada, o stream é fechado (o que libera a vaga na API).
+    """
+    try:
+        for trecho in trechos:
+            tarefa.acrescentar(trecho)
+    finally:
+        close = getattr(trechos, "close", None)
+        if close is not None:
+            close()
+    return tarefa.texto_parcial()
+
+
+class ExecutorTarefas:
+    """Pool de threads e tabela de tarefas do processo.
+
+    Threads e não processos: as tarefas passam quase todo o tempo esperando a
+    API, e precisam compartilhar o cliente HTTP, os limitadores e os caches
+    do processo. Tarefas finalizadas há mais de `ttl_segundos` saem da tabela.
+    """
+
+    def __init__(self, max_workers, ttl_segundos):
+        self.ttl_segundos = ttl_segundos
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tarefa")
+        self._tarefas = {}
+        self._ultimas = {}  # (dono, tipo) -> id da tarefa mais recente
+        self._lock = threading.Lock()
+        self._contador = itertools.count(1)
+
+    def enviar(self, dono, tipo, funcao, *args, **kwargs):
+        """Agenda `funcao(tarefa, *args, **kwargs)` e retorna o id da tarefa."""
+        self._limpar()
+        tarefa = Tarefa(f"{next(self._contador)}-{uuid.uuid4().hex[:8]}", dono, tipo)
+        with self._lock:
+            self._tarefas[tarefa.id] = tarefa
+            self._ultimas[(dono, tipo)] = tarefa.id
+        self._executor.submit(self._executar, tarefa, funcao, args, kwargs)
+        return tarefa.id
+
+    def _executar(self, tarefa, funcao, args, kwargs):
+        tarefa.iniciada_em = time.time()
+        if tarefa._cancelar.is_set():
+            tarefa.estado = CANCELADA
+        else:
+            tarefa.estado = EXECUTANDO
+            try:
+                tarefa.resultado = funcao(tarefa, *args, **kwargs)
+                tarefa.estado = CONCLUIDA
+            except TarefaCancelada:
+                tarefa.estado = CANCELADA
+            except Exception as e:
+                logger.exception("Tarefa %s (%s) falhou", tarefa.id, tarefa.tipo)
+                tarefa.erro = e
+                tarefa.estado = FALHOU
+        tarefa.concluida_em = time.time()
+        get_metricas().registrar("tarefas", {
+            "tipo": tarefa.tipo,
+            "estado": tarefa.estado,
+            "fila_s": tarefa.iniciada_em - tarefa.criada_em,
+            "total_s": tarefa.concluida_em - tarefa.criada_em,
+            "erro": type(tarefa.erro).__name__ if tarefa.erro else None,
+        })
+
+    def obter(self, id):
+        with self._lock:
+            return self._tarefas.get(id)
+
+    def ultima(self, dono, tipo):
+        """Tarefa mais recente do professor para esse tipo (ainda não descartada), ou None."""
+        with self._lock:
+            id = self._ultimas.get((dono, tipo))
+            return self._tarefas.get(id) if id else None
+
+    def cancelar(self, id):
+        tarefa = self.obter(id)
+        if tarefa is not None and not tarefa.finalizada:
+            tarefa._cancelar.set()
+
+    def descartar(self, id):
+        """Remove a tarefa da tabela (ex.: depois que o resultado foi entregue à sessão)."""
+        with self._lock:
+            tarefa = self._tarefas.pop(id, None)
+            if tarefa is not None and self._ultimas.get((tarefa.dono, tarefa.tipo)) == id:
+                del self._ultimas[(tarefa.dono, tarefa.tipo)]
+
+    def _limpar(self):
+        limite = time.time() - self.ttl_segundos
+        with self._lock:
+            expiradas = [
+                tarefa.id for tarefa in self._tarefas.values()
+                if tarefa.finalizada and tarefa.concluida_em < limite
+            ]
+        for id in expiradas:
+            self.descartar(id)
+
+    def estatisticas(self):
+        with self._lock:
+            estados = [tarefa.estado for tarefa in self._tarefas.values()]
+        return {estado: estados.count(estado) for estado in (NA_FILA, EXECUTANDO, *FINALIZADOS)}
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor_tarefas():
+    """Retorna o executor compartilhado pelo processo (TAREFAS_MAX_WORKERS, TAREFAS_TTL_MIN)."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ExecutorTarefas(
+                max_workers=int(obter_config("TAREFAS_MAX_WORKERS", 16)),
+                ttl_segundos=float(obter_config("TAREFAS_TTL_MIN", 60)) * 60,
+            )
+        return _executor
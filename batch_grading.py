@@ -0,0 +1,206 @@
+import asyncio
+import json
+import logging
+import time
+
+import pandas as pd
+
+from openai_functions import avaliar_dissertativas_async
+
+logger = logging.getLogger(__name__)
+
+# Nomes aceitos para a coluna que identifica o aluno na planilha de respostas
+COLUNAS_ALUNO = ("aluno", "nome", "estudante", "matricula", "matrícula")
+
+
+def ler_tabela(uploaded_file):
+    """Lê um CSV ou XLSX enviado pelo professor como DataFrame de texto."""
+    if uploaded_file.name.endswith(".csv"):
+        return pd.read_csv(uploaded_file, dtype=str)
+    if uploaded_file.name.endswith(".xlsx"):
+        return pd.read_excel(uploaded_file, dtype=str)
+    raise ValueError("Envie a planilha em .csv ou .xlsx.")
+
+
+def _numeros(serie):
+    """Converte textos numéricos para float, aceitando vírgula decimal ("0,5", "1.000,5")."""
+    texto = serie.astype(str).str.strip()
+    com_virgula = texto.str.contains(",", regex=False)
+    texto = texto.where(~com_virgula, texto.str.replace(".", "", regex=False).str.replace(",", ".", regex=False))
+    return pd.to_numeric(texto, errors="coerce")
+
+
+def preparar_gabarito(df):
+    """Valida o gabarito (colunas questao, resposta, tipo e, opcionalmente, valor e enunciado)."""
+    df = df.rename(columns=lambda c: str(c).strip().lower())
+    faltando = {"questao", "resposta", "tipo"} - set(df.columns)
+    if faltando:
+        raise ValueError(f"O gabarito precisa das colunas: {', '.join(sorted(faltando))}.")
+    gabarito = pd.DataFrame({
+        "questao": df["questao"].astype(str).str.strip(),
+        "resposta": df["resposta"].fillna("").astype(str),
+        "dissertativa": df["tipo"].fillna("").str.strip().str.lower().str.startswith("dissert"),
+        "valor": _numeros(df["valor"]).fillna(1.0) if "valor" in df else 1.0,
+        "enunciado": df["enunciado"].fillna("") if "enunciado" in df else "",
+    })
+    return gabarito.set_index("questao")
+
+
+def preparar_respostas(df, gabarito):
+    """Indexa as respostas pelo aluno e mantém só as colunas de questões do gabarito."""
+    df = df.copy()
+    df.columns = [str(c).strip() for c in df.columns]
+    coluna_aluno = next((c for c in df.columns if c.lower() in COLUNAS_ALUNO), df.columns[0])
+    faltando = [q for q in gabarito.index if q not in df.columns]
+    if faltando:
+        raise ValueError(f"Questões do gabarito sem coluna na planilha de respostas: {', '.join(faltando)}.")
+    return df.set_index(coluna_aluno)[list(gabarito.index)].fillna("")
+
+
+def _normalizar_alternativa(serie):
+    # "a)", " A ", "a." -> "A"
+    return serie.astype(str).str.strip().str.upper().str.rstrip(").").str.strip()
+
+
+def corrigir_objetivas(respostas, gabarito):
+    """Pontua as questões objetivas da turma inteira de uma vez (sem chamadas à API)."""
+    objetivas = gabarito[~gabarito["dissertativa"]]
+    if objetivas.empty:
+        return pd.DataFrame(index=respostas.index)
+    marcadas = respostas[list(objetivas.index)].apply(_normalizar_alternativa).to_numpy()
+    corretas = _normalizar_alternativa(objetivas["resposta"]).to_numpy()
+    # Compara a matriz aluno x questão com a linha do gabarito (broadcast)
+    pontos = (marcadas == corretas) * objetivas["valor"].to_numpy(dtype=float)
+    return pd.DataFrame(pontos, index=respostas.index, columns=objetivas.index)
+
+
+def _extrair_json(texto):
+    inicio, fim = texto.find("{"), texto.rfind("}")
+    if inicio < 0 or fim < inicio:
+        raise ValueError("resposta sem JSON")
+    return json.loads(texto[inicio:fim + 1])
+
+
+async def _avaliar_aluno(aluno, respostas_aluno, dissertativas, contexto):
+    questoes = [
+        {
+            "questao": questao,
+            "enunciado": linha["enunciado"],
+            "resposta_esperada": linha["resposta"],
+            "valor": linha["valor"],
+            "resposta_aluno": respostas_aluno[questao],
+        }
+        for questao, linha in dissertativas.iterrows()
+    ]
+    try:
+        avaliacao = _extrair_json(await avaliar_dissertativas_async(questoes, contexto))
+    except Exception as e:
+        logger.warning("Falha ao avaliar as dissertativas de %s: %s", aluno, e)
+        avaliacao = {}
+    try:
+        return aluno, *_ler_avaliacao(avaliacao, dissertativas)
+    except Exception as e:
+        logger.warning("Avaliação das dissertativas de %s em formato inesperado: %s", aluno, e)
+        return aluno, *_ler_avaliacao({}, dissertativas)
+
+
+def _ler_avaliacao(avaliacao, dissertativas):
+    """Notas e comentários por questão; aceita {"q": {"nota": n, "comentario": ...}} ou {"q": n}."""
+    if not isinstance(avaliacao, dict):
+        raise ValueError("a resposta não é um objeto JSON")
+    notas, comentarios = {}, {}
+    for questao, linha in dissertativas.iterrows():
+        item = avaliacao.get(questao, avaliacao.get(str(questao)))
+        if not isinstance(item, dict):
+            item = {"nota": item}
+        nota = item.get("nota")
+        if isinstance(nota, str):
+            nota = nota.strip().replace(",", ".")
+        try:
+            nota = min(max(float(nota), 0.0), float(linha["valor"]))
+        except (TypeError, ValueError):
+            nota = float("nan")  # não avaliada: fica para revisão manual
+        notas[questao] = nota
+        comentarios[questao] = str(item.get("comentario") or "")
+    return notas, comentarios
+
+
+async def corrigir_dissertativas_async(respostas, gabarito, contexto=None, ao_concluir=None):
+    """Avalia as dissertativas com uma chamada por aluno, todas concorrentes.
+
+    O número de chamadas simultâneas é limitado pelo limitador do processo
+    (OPENAI_MAX_CONCORRENCIA). `ao_concluir(concluidos, total)` é chamado a cada aluno;
+    se ele levantar uma exceção (ex.: TarefaCancelada), os alunos restantes são
+    cancelados e a exceção é propagada.
+    """
+    dissertativas = gabarito[gabarito["dissertativa"]]
+    if dissertativas.empty:
+        return pd.DataFrame(index=respostas.index), pd.DataFrame(index=respostas.index)
+
+    total = len(respostas)
+    concluidos = 0
+
+    async def acompanhar(aluno, linha):
+        nonlocal concluidos
+        try:
+            resultado = await _avaliar_aluno(aluno, linha, dissertativas, contexto)
+        except Exception as e:
+            # A falha de um aluno não derruba a turma: as notas dele ficam para revisão manual
+            logger.warning("Falha ao avaliar as dissertativas de %s: %r", aluno, e)
+            resultado = (aluno, *_ler_avaliacao({}, dissertativas))
+        concluidos += 1
+        if ao_concluir:
+            # Fora de um finally: uma exceção aqui (ex.: tarefa cancelada) interrompe a correção
+            ao_concluir(concluidos, total)
+        return resultado
+
+    tarefas = [asyncio.ensure_future(acompanhar(aluno, linha)) for aluno, linha in respostas.iterrows()]
+    try:
+        resultados = await asyncio.gather(*tarefas)
+    except BaseException:
+        # Interrompida: cancela os alunos que faltam (o que devolve as vagas do limitador)
+        for tarefa in tarefas:
+            tarefa.cancel()
+        await asyncio.gather(*tarefas, return_exceptions=True)
+        raise
+    notas, comentarios = {}, {}
+    for aluno, notas_aluno, comentarios_aluno in resultados:
+        notas[aluno], comentarios[aluno] = notas_aluno, comentarios_aluno
+    ordem = list(respostas.index)
+    return (
+        pd.DataFrame.from_dict(notas, orient="index").reindex(ordem)[list(dissertativas.index)],
+        pd.DataFrame.from_dict(comentarios, orient="index").reindex(ordem)[list(dissertativas.index)],
+    )
+
+
+def corrigir_turma(df_respostas, df_gabarito, contexto=None, ao_concluir=None):
+    """Corrige a turma inteira.
+
+    Retorna um dicionário com:
+    - "notas": matriz aluno x questão (com a coluna "Total");
+    - "comentarios": feedback do modelo para as dissertativas;
+    - "por_questao": média, percentual de acerto e valor de cada questão;
+    - "tempo": duração total da correção, em segundos.
+    """
+    inicio = time.perf_counter()
+    gabarito = preparar_gabarito(df_gabarito)
+    respostas = preparar_respostas(df_respostas, gabarito)
+
+    objetivas = corrigir_objetivas(respostas, gabarito)
+    dissertativas, comentarios = asyncio.run(
+        corrigir_dissertativas_async(respostas, gabarito, contexto, ao_concluir)
+    )
+    notas = pd.concat([objetivas, dissertativas], axis=1)[list(gabarito.index)]
+    notas["Total"] = notas.sum(axis=1, min_count=1)
+
+    por_questao = pd.DataFrame({
+        "valor": gabarito["valor"],
+        "media": notas[list(gabarito.index)].mean(),
+        "percentual_acerto": (notas[list(gabarito.index)].mean() / gabarito["valor"] * 100).round(1),
+    })
+    return {
+        "notas": notas,
+        "comentarios": comentarios,
+        "por_questao": por_questao,
+        "tempo": time.perf_counter() - inicio,
+    }
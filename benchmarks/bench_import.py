@@ -0,0 +1,62 @@
+"""Mede o tempo de importação dos módulos do app (partida a frio).
+
+Cada medição roda num processo Python novo, importando o que main.py importa
+no topo; mostra a mediana, separando o Streamlit (que não depende de nós) dos
+módulos do app, e as dependências pesadas que acabaram carregadas.
+
+Uso (a partir da raiz do repositório):
+    python -m benchmarks.bench_import --repeticoes 5
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+MODULOS_APP = (
+    "openai_functions", "question_sharding", "file_processing", "retrieval",
+    "token_budget", "utils", "instrumentation", "prewarm",
+)
+DEPENDENCIAS_PESADAS = ("openai", "pandas", "numpy", "PyPDF2", "docx", "openpyxl", "tiktoken")
+
+_CODIGO = f"""
+import json, sys, time
+inicio = time.perf_counter()
+import streamlit
+meio = time.perf_counter()
+for modulo in {MODULOS_APP!r}:
+    __import__(modulo)
+fim = time.perf_counter()
+print(json.dumps({{
+    "streamlit_s": meio - inicio,
+    "app_s": fim - meio,
+    "carregadas": [m for m in {DEPENDENCIAS_PESADAS!r} if m in sys.modules],
+}}))
+"""
+
+
+def medir(repeticoes):
+    medicoes = []
+    for _ in range(repeticoes):
+        saida = subprocess.run([sys.executable, "-c", _CODIGO], capture_output=True, text=True, check=True)
+        medicoes.append(json.loads(saida.stdout.strip().splitlines()[-1]))
+    return {
+        "streamlit_s": statistics.median(m["streamlit_s"] for m in medicoes),
+        "app_s": statistics.median(m["app_s"] for m in medicoes),
+        "carregadas": medicoes[-1]["carregadas"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeticoes", type=int, default=5)
+    args = parser.parse_args()
+
+    resultado = medir(args.repeticoes)
+    print(f"streamlit:        {resultado['streamlit_s'] * 1000:7.0f} ms")
+    print(f"módulos do app:   {resultado['app_s'] * 1000:7.0f} ms")
+    print(f"dependências pesadas carregadas: {', '.join(resultado['carregadas']) or 'nenhuma'}")
+
+
+if __name__ == "__main__":
+    main()
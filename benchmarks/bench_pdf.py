@@ -0,0 +1,52 @@
+"""Compara a extração de PDF em série (laço original) com a extração paralela.
+
+Uso (a partir da raiz do repositório):
+    python -m benchmarks.bench_pdf --paginas 50 200 400
+"""
+import argparse
+import time
+from io import BytesIO
+
+from PyPDF2 import PdfReader
+
+from benchmarks.fixtures import gerar_pdf
+from pdf_extraction import extrair_texto_pdf
+
+
+def extrair_em_serie(dados):
+    """O laço original de processar_arquivos."""
+    reader = PdfReader(BytesIO(dados))
+    return "\n".join([page.extract_text() for page in reader.pages])
+
+
+def cronometrar(funcao, *args, repeticoes=3, **kwargs):
+    melhor = None
+    resultado = None
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao(*args, **kwargs)
+        decorrido = time.perf_counter() - inicio
+        melhor = decorrido if melhor is None else min(melhor, decorrido)
+    return melhor, resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--paginas", type=int, nargs="+", default=[50, 200, 400])
+    parser.add_argument("--repeticoes", type=int, default=3)
+    args = parser.parse_args()
+
+    # Aquece o pool de processos para não medir a criação dos workers
+    extrair_texto_pdf(gerar_pdf(32))
+
+    print(f"{'páginas':>8} {'série (s)':>10} {'paralelo (s)':>13} {'speedup':>8}")
+    for num_paginas in args.paginas:
+        dados = gerar_pdf(num_paginas)
+        t_serie, texto_serie = cronometrar(extrair_em_serie, dados, repeticoes=args.repeticoes)
+        t_paralelo, texto_paralelo = cronometrar(extrair_texto_pdf, dados, repeticoes=args.repeticoes)
+        assert texto_serie == texto_paralelo, "a extração paralela deve preservar a ordem das páginas"
+        print(f"{num_paginas:>8} {t_serie:>10.2f} {t_paralelo:>13.2f} {t_serie / t_paralelo:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""Geração de arquivos sintéticos (determinísticos) para os benchmarks."""
+import csv
+import random
+from io import BytesIO, StringIO
+
+PALAVRAS = (
+    "fração numerador denominador equação álgebra geometria triângulo ângulo célula "
+    "fotossíntese energia movimento velocidade aceleração história república império "
+    "colônia revolução clima relevo população cidade texto leitura gramática verbo "
+    "substantivo adjetivo poema narrativa experimento hipótese conclusão exercício"
+).split()
+
+
+def gerar_texto(num_palavras, semente=0):
+    aleatorio = random.Random(semente)
+    return " ".join(aleatorio.choice(PALAVRAS) for _ in range(num_palavras))
+
+
+def _escapar_pdf(texto):
+    return texto.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def gerar_pdf(num_paginas, linhas_por_pagina=40, semente=0):
+    """Monta um PDF simples (texto em Helvetica) com o número de páginas pedido."""
+    aleatorio = random.Random(semente)
+    objetos = []  # conteúdo de cada objeto, na ordem de numeração (a partir de 1)
+
+    objetos.append(b"<< /Type /Catalog /Pages 2 0 R >>")
+    objetos.append(None)  # /Pages, preenchido depois de conhecer os filhos
+    objetos.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+
+    paginas = []
+    for numero in range(num_paginas):
+        linhas = [f"Pagina {numero + 1}"] + [
+            " ".join(aleatorio.choice(PALAVRAS) for _ in range(10)) for _ in range(linhas_por_pagina)
+        ]
+        comandos = ["BT", "/F1 10 Tf", "14 TL", "40 800 Td"]
+        for linha in linhas:
+            comandos.append(f"({_escapar_pdf(linha)}) Tj T*")
+        comandos.append("ET")
+        conteudo = "\n".join(comandos).encode("cp1252")
+        objetos.append(b"<< /Length %d >>\nstream\n" % len(conteudo) + conteudo + b"\nendstream")
+        id_conteudo = len(objetos)
+        objetos.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % id_conteudo
+        )
+        paginas.append(len(objetos))
+
+    filhos = " ".join(f"{i} 0 R" for i in paginas).encode()
+    objetos[1] = b"<< /Type /Pages /Kids [" + filhos + b"] /Count %d >>" % num_paginas
+
+    saida = bytearray(b"%PDF-1.4\n")
+    posicoes = []
+    for i, objeto in enumerate(objetos, start=1):
+        posicoes.append(len(saida))
+        saida += b"%d 0 obj\n" % i + objeto + b"\nendobj\n"
+    inicio_xref = len(saida)
+    saida += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objetos) + 1)
+    for posicao in posicoes:
+        saida += b"%010d 00000 n \n" % posicao
+    saida += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objetos) + 1, inicio_xref)
+    return bytes(saida)
+
+
+def gerar_txt(num_palavras, semente=0):
+    """Texto UTF-8 em parágrafos de 100 palavras."""
+    palavras = gerar_texto(num_palavras, semente).split(" ")
+    paragrafos = [" ".join(palavras[i:i + 100]) for i in range(0, len(palavras), 100)]
+    return "\n".join(paragrafos).encode("utf-8")
+
+
+def gerar_docx(num_paragrafos, palavras_por_paragrafo=80, semente=0):
+    from docx import Document
+
+    aleatorio = random.Random(semente)
+    doc = Document()
+    for _ in range(num_paragrafos):
+        doc.add_paragraph(" ".join(aleatorio.choice(PALAVRAS) for _ in range(palavras_por_paragrafo)))
+    buffer = BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+
+def _linhas_tabela(num_linhas, semente):
+    """Linhas de notas de alunos: id, turma, disciplina, nota, faltas, observação."""
+    aleatorio = random.Random(semente)
+    turmas = [f"{ano}º {letra}" for ano in range(6, 10) for letra in "ABC"]
+    for i in range(num_linhas):
+        yield (
+            i + 1,
+            aleatorio.choice(turmas),
+            aleatorio.choice(PALAVRAS),
+            round(aleatorio.uniform(0, 10), 1),
+            aleatorio.randint(0, 20),
+            " ".join(aleatorio.choice(PALAVRAS) for _ in range(3)),
+        )
+
+
+COLUNAS_TABELA = ("aluno_id", "turma", "disciplina", "nota", "faltas", "observacao")
+
+
+def gerar_csv(num_linhas, semente=0):
+    saida = StringIO()
+    escritor = csv.writer(saida)
+    escritor.writerow(COLUNAS_TABELA)
+    escritor.writerows(_linhas_tabela(num_linhas, semente))
+    return saida.getvalue().encode("utf-8")
+
+
+def gerar_xlsx(num_linhas, semente=0):
+    from openpyxl import Workbook
+
+    livro = Workbook(write_only=True)
+    planilha = livro.create_sheet("notas")
+    planilha.append(COLUNAS_TABELA)
+    for linha in _linhas_tabela(num_linhas, semente):
+        planilha.append(linha)
+    buffer = BytesIO()
+    livro.save(buffer)
+    return buffer.getvalue()
+
+
+class ArquivoEnviado(BytesIO):
+    """Imita o UploadedFile do Streamlit (BytesIO com `name` e `size`)."""
+
+    def __init__(self, dados, nome):
+        super().__init__(dados)
+        self.name = nome
+        self.size = len(dados)
+
+
+GERADORES = {
+    "txt": gerar_txt,
+    "docx": gerar_docx,
+    "pdf": gerar_pdf,
+    "csv": gerar_csv,
+    "xlsx": gerar_xlsx,
+}
@@ -0,0 +1,259 @@
+"""Suíte de benchmarks dos caminhos quentes: extração, montagem de prompts e DOCX.
+
+Mede tempo (melhor de N repetições) e pico de memória (tracemalloc, numa
+execução separada para não distorcer o tempo) e compara com uma baseline JSON.
+O pico de memória é o do processo principal: PDFs grandes são extraídos nos
+workers de pdf_extraction, cuja memória não entra na conta.
+
+Uso (a partir da raiz do repositório):
+    python -m benchmarks.suite --perfil rapido
+    python -m benchmarks.suite --perfil completo --salvar benchmarks/baselines/completo.json
+    python -m benchmarks.suite --perfil completo --comparar benchmarks/baselines/completo.json
+
+Com --comparar, o processo termina com código 1 se algum caso ficar mais lento
+ou usar mais memória que a baseline além da --tolerancia (padrão 25%). Os
+arquivos sintéticos ficam em .cache/benchmarks para não serem gerados de novo.
+"""
+import argparse
+import datetime
+import gc
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# Caches isolados: a suíte não deve ler nem poluir os caches do app
+_TEMPORARIO = tempfile.mkdtemp(prefix="bench-")
+os.environ.setdefault("EXTRACAO_CACHE_DIR", os.path.join(_TEMPORARIO, "extracao"))
+os.environ.setdefault("RESPOSTAS_CACHE_PATH", os.path.join(_TEMPORARIO, "respostas.sqlite3"))
+os.environ.setdefault("METRICAS_LOG_PATH", os.path.join(_TEMPORARIO, "metricas.jsonl"))
+os.environ.setdefault("METRICAS_PROMETHEUS_PATH", os.path.join(_TEMPORARIO, "metricas.prom"))
+
+import file_processing
+import openai_functions
+import retrieval
+from benchmarks.fixtures import GERADORES, ArquivoEnviado, gerar_texto
+from extraction_cache import get_cache_extracao
+
+# Tamanhos por formato: páginas (pdf), parágrafos (docx), palavras (txt) ou linhas (csv/xlsx)
+PERFIS = {
+    "rapido": {
+        "tamanhos": {
+            "txt": [10_000, 200_000],
+            "docx": [100, 2_000],
+            "pdf": [1, 20],
+            "csv": [1_000, 20_000],
+            "xlsx": [1_000, 10_000],
+        },
+        "palavras_contexto": [5_000, 100_000],
+        "caracteres_docx": [10_000, 1_000_000],
+        "repeticoes": 3,
+    },
+    "completo": {
+        "tamanhos": {
+            "txt": [10_000, 200_000, 1_000_000],
+            "docx": [100, 2_000, 20_000],
+            "pdf": [1, 50, 500],
+            "csv": [1_000, 50_000, 500_000],
+            "xlsx": [1_000, 50_000, 500_000],
+        },
+        "palavras_contexto": [5_000, 100_000, 500_000],
+        "caracteres_docx": [10_000, 1_000_000, 5_000_000],
+        "repeticoes": 3,
+    },
+}
+
+DIRETORIO_FIXTURES = os.path.join(".cache", "benchmarks")
+
+
+def obter_fixture(formato, tamanho):
+    """Bytes do arquivo sintético, gerado uma vez e guardado em disco."""
+    caminho = os.path.join(DIRETORIO_FIXTURES, f"{formato}-{tamanho}.{formato}")
+    if os.path.exists(caminho):
+        with open(caminho, "rb") as f:
+            return f.read()
+    dados = GERADORES[formato](tamanho)
+    os.makedirs(DIRETORIO_FIXTURES, exist_ok=True)
+    with open(caminho, "wb") as f:
+        f.write(dados)
+    return dados
+
+
+def medir(funcao, repeticoes, preparar=None):
+    """Retorna (melhor tempo em s, pico de memória em MB) de `funcao()`.
+
+    `preparar()` roda antes de cada execução, fora da medição (ex.: limpar caches).
+    """
+    melhor = None
+    for _ in range(repeticoes):
+        if preparar:
+            preparar()
+        gc.collect()
+        inicio = time.perf_counter()
+        funcao()
+        decorrido = time.perf_counter() - inicio
+        melhor = decorrido if melhor is None else min(melhor, decorrido)
+    if preparar:
+        preparar()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        funcao()
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return melhor, pico / (1024 * 1024)
+
+
+def casos_extracao(perfil):
+    cache = get_cache_extracao()
+    for formato, tamanhos in perfil["tamanhos"].items():
+        for tamanho in tamanhos:
+            dados = obter_fixture(formato, tamanho)
+
+            def extrair(dados=dados, formato=formato):
+                texto = file_processing.processar_arquivos(ArquivoEnviado(dados, f"arquivo.{formato}"))
+                assert texto, f"extração vazia ({formato})"
+
+            # Sem o cache de extração: mede o caminho de um arquivo novo
+            yield f"processar_arquivos/{formato}/{tamanho}", extrair, cache.limpar
+
+
+def casos_upload_multiplo(perfil):
+    cache = get_cache_extracao()
+    arquivos = [
+        (obter_fixture(formato, perfil["tamanhos"][formato][-1]), f"arquivo.{formato}")
+        for formato in ("docx", "csv", "xlsx")
+    ]
+
+    def extrair():
+        resultados = list(file_processing.processar_varios_arquivos(
+            [ArquivoEnviado(dados, nome) for dados, nome in arquivos]
+        ))
+        assert all(erro is None for *_, erro in resultados), "falha na extração"
+
+    # Comparar com a soma dos casos processar_arquivos/<formato>/<maior tamanho>:
+    # com mais de uma CPU, o tempo deve ficar perto do arquivo mais lento
+    yield "processar_varios_arquivos/docx+csv+xlsx", extrair, cache.limpar
+
+
+def casos_prompts(perfil):
+    pedidos = {
+        "gerar_questoes": lambda contexto: openai_functions._pedido_questoes(
+            "EF - 6º Ano", "Matemática", "Frações", "Médio", 10, "Objetivas", contexto
+        ),
+        "gerar_plano_aula": lambda contexto: openai_functions._pedido_plano_aula(
+            "EF - 6º Ano", "Matemática", "3", "2", 50, "Interativa", "Turma distraída", "Frações", contexto
+        ),
+        "gerar_assunto_contextualizado": lambda contexto: openai_functions._pedido_assunto_contextualizado(
+            "EF - 6º Ano", "Matemática", "Frações", "Futebol", contexto
+        ),
+        "corrigir_questoes": lambda contexto: openai_functions._pedido_correcao(
+            "1) A 2) C 3) B", "1) A 2) B 3) B", "Objetivas", contexto
+        ),
+    }
+    for palavras in perfil["palavras_contexto"]:
+        contexto = gerar_texto(palavras)
+        for nome, montar in pedidos.items():
+            def montar_prompt(montar=montar, contexto=contexto):
+                pedido = montar(contexto)
+                pedido.pop("operacao", None)
+                pedido["usar_cache"] = False
+                openai_functions._preparar(**pedido)
+
+            # frio: inclui a indexação BM25 do contexto; quente: índice já em memória
+            yield f"montar_prompt/{nome}/{palavras}/frio", montar_prompt, retrieval._indices.clear
+            yield f"montar_prompt/{nome}/{palavras}/quente", montar_prompt, None
+
+
+def casos_docx(perfil):
+    for caracteres in perfil["caracteres_docx"]:
+        conteudo = gerar_texto(caracteres // 8)[:caracteres]
+        yield (
+            f"gerar_docx/{caracteres}",
+            lambda conteudo=conteudo: file_processing.gerar_docx(conteudo, "Questões"),
+            file_processing._docx_gerados.clear,
+        )
+
+
+def executar(perfil, filtro=None, repeticoes=None):
+    perfil = PERFIS[perfil]
+    repeticoes = repeticoes or perfil["repeticoes"]
+    resultados = {}
+    for gerador in (casos_extracao, casos_upload_multiplo, casos_prompts, casos_docx):
+        for nome, funcao, preparar in gerador(perfil):
+            if filtro and filtro not in nome:
+                continue
+            tempo, pico = medir(funcao, repeticoes, preparar)
+            resultados[nome] = {"tempo_s": round(tempo, 6), "pico_mb": round(pico, 3)}
+            print(f"{nome:<60} {tempo * 1000:>10.1f} ms {pico:>9.1f} MB", flush=True)
+    return resultados
+
+
+def comparar(resultados, baseline, tolerancia):
+    """Lista de regressões (texto) em relação à baseline."""
+    regressoes = []
+    for nome, atual in resultados.items():
+        anterior = baseline["casos"].get(nome)
+        if anterior is None:
+            continue
+        for campo, unidade in (("tempo_s", "s"), ("pico_mb", "MB")):
+            # Ignora variações em valores muito pequenos (ruído de medição)
+            minimo = 0.005 if campo == "tempo_s" else 1.0
+            if atual[campo] > max(anterior[campo], minimo) * (1 + tolerancia):
+                regressoes.append(
+                    f"{nome}: {campo} {anterior[campo]}{unidade} -> {atual[campo]}{unidade} "
+                    f"(+{(atual[campo] / max(anterior[campo], 1e-9) - 1) * 100:.0f}%)"
+                )
+    return regressoes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--perfil", choices=sorted(PERFIS), default="rapido")
+    parser.add_argument("--filtro", help="roda só os casos cujo nome contém este texto")
+    parser.add_argument("--repeticoes", type=int)
+    parser.add_argument("--salvar", help="grava os resultados como baseline JSON")
+    parser.add_argument("--comparar", help="baseline JSON para detectar regressões")
+    parser.add_argument("--tolerancia", type=float, default=0.25)
+    args = parser.parse_args(argv)
+
+    # Importa as bibliotecas dos formatos (carregadas sob demanda) e aquece o
+    # pool de processos do PDF, para não medir importações nem a criação dos workers
+    file_processing.precarregar_manipuladores()
+    from pdf_extraction import extrair_texto_pdf
+    extrair_texto_pdf(obter_fixture("pdf", 20))
+
+    resultados = executar(args.perfil, args.filtro, args.repeticoes)
+
+    if args.salvar:
+        os.makedirs(os.path.dirname(args.salvar) or ".", exist_ok=True)
+        with open(args.salvar, "w", encoding="utf-8") as f:
+            json.dump({
+                "perfil": args.perfil,
+                "data": datetime.datetime.now().isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "plataforma": platform.platform(),
+                "cpus": os.cpu_count(),
+                "casos": resultados,
+            }, f, ensure_ascii=False, indent=2)
+        print(f"Baseline gravada em {args.salvar}")
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressoes = comparar(resultados, baseline, args.tolerancia)
+        if regressoes:
+            print(f"\n{len(regressoes)} regressão(ões) acima de {args.tolerancia:.0%}:")
+            for linha in regressoes:
+                print(f"  {linha}")
+            return 1
+        print(f"\nSem regressões acima de {args.tolerancia:.0%} em relação a {args.comparar}.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
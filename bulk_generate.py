@@ -0,0 +1,164 @@
+"""Geração em lote, sem interface, a partir de um arquivo JSONL de tarefas.
+
+Cada linha do arquivo de entrada é uma tarefa:
+    {"id": "rede-a-6ano-mat-01", "funcao": "gerar_questoes",
+     "parametros": {"ano": "EF - 6º Ano", "componente": "Matemática", "assunto": "Frações",
+                    "dificuldade": "Médio", "numero_questoes": 5, "tipo": "Objetivas"}}
+
+Os resultados são acrescentados ao JSONL de saída assim que cada tarefa termina;
+o próprio arquivo de saída serve de checkpoint: ao rodar de novo, as tarefas que
+já têm resultado sem erro são puladas.
+
+Uso:
+    python bulk_generate.py tarefas.jsonl resultados.jsonl --workers 8 --docx-dir saida_docx
+    python bulk_generate.py tarefas.jsonl resultados.jsonl --fake --latencia-fake 0.2
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import openai_functions
+from rate_limiter import get_limitador_taxa
+from token_budget import contar_tokens
+
+logger = logging.getLogger("bulk_generate")
+
+FUNCOES = {
+    "gerar_plano_aula": openai_functions.gerar_plano_aula,
+    "gerar_questoes": openai_functions.gerar_questoes,
+    "gerar_assunto_contextualizado": openai_functions.gerar_assunto_contextualizado,
+    "corrigir_questoes": openai_functions.corrigir_questoes,
+}
+
+TITULOS_DOCX = {
+    "gerar_plano_aula": "Plano de Aula",
+    "gerar_questoes": "Questões",
+    "gerar_assunto_contextualizado": "Assunto Contextualizado",
+    "corrigir_questoes": "Correção de Questões",
+}
+
+
+def ler_tarefas(caminho):
+    tarefas = []
+    with open(caminho, encoding="utf-8") as f:
+        for numero, linha in enumerate(f, start=1):
+            if not linha.strip():
+                continue
+            tarefa = json.loads(linha)
+            tarefa.setdefault("id", f"linha-{numero}")
+            if tarefa.get("funcao") not in FUNCOES:
+                raise ValueError(f"Linha {numero}: função desconhecida {tarefa.get('funcao')!r}")
+            tarefas.append(tarefa)
+    return tarefas
+
+
+def ler_concluidas(caminho):
+    """IDs que já têm resultado sem erro no arquivo de saída (checkpoint)."""
+    concluidas = set()
+    if not os.path.exists(caminho):
+        return concluidas
+    with open(caminho, encoding="utf-8") as f:
+        for linha in f:
+            try:
+                resultado = json.loads(linha)
+            except json.JSONDecodeError:
+                # Última linha incompleta de uma execução interrompida
+                continue
+            if resultado.get("erro") is None:
+                concluidas.add(resultado["id"])
+    return concluidas
+
+
+def executar_tarefa(tarefa):
+    """Executa a tarefa (429 e falhas transitórias já são repetidos pelo limitador de taxa)."""
+    return FUNCOES[tarefa["funcao"]](**tarefa.get("parametros", {}))
+
+
+def salvar_docx(tarefa, texto, diretorio):
+    from file_processing import gerar_docx
+
+    caminho = os.path.join(diretorio, f"{tarefa['id']}.docx")
+    with open(caminho, "wb") as f:
+        f.write(gerar_docx(texto, TITULOS_DOCX[tarefa["funcao"]]).getvalue())
+    return caminho
+
+
+def executar_lote(tarefas, caminho_saida, workers=4, docx_dir=None):
+    """Executa as tarefas pendentes e retorna o resumo de vazão."""
+    concluidas = ler_concluidas(caminho_saida)
+    pendentes = [t for t in tarefas if t["id"] not in concluidas]
+    logger.info("%d tarefas, %d já concluídas, %d pendentes", len(tarefas), len(concluidas), len(pendentes))
+    if docx_dir:
+        os.makedirs(docx_dir, exist_ok=True)
+
+    lock_saida = threading.Lock()
+    resumo = {"concluidas": 0, "erros": 0, "tokens_saida": 0}
+    inicio = time.perf_counter()
+
+    def processar(tarefa):
+        inicio_tarefa = time.perf_counter()
+        resultado = {"id": tarefa["id"], "funcao": tarefa["funcao"], "texto": None, "erro": None}
+        try:
+            resultado["texto"] = executar_tarefa(tarefa)
+            if docx_dir:
+                resultado["docx"] = salvar_docx(tarefa, resultado["texto"], docx_dir)
+        except Exception as e:
+            resultado["erro"] = f"{type(e).__name__}: {e}"
+        resultado["tempo"] = round(time.perf_counter() - inicio_tarefa, 3)
+        return resultado
+
+    with open(caminho_saida, "a", encoding="utf-8") as saida, ThreadPoolExecutor(max_workers=workers) as executor:
+        futuros = [executor.submit(processar, tarefa) for tarefa in pendentes]
+        for futuro in as_completed(futuros):
+            resultado = futuro.result()
+            with lock_saida:
+                saida.write(json.dumps(resultado, ensure_ascii=False) + "\n")
+                saida.flush()
+                os.fsync(saida.fileno())
+            if resultado["erro"] is None:
+                resumo["concluidas"] += 1
+                resumo["tokens_saida"] += contar_tokens(resultado["texto"] or "")
+            else:
+                resumo["erros"] += 1
+                logger.error("Tarefa %s falhou: %s", resultado["id"], resultado["erro"])
+
+    decorrido = time.perf_counter() - inicio
+    resumo["segundos"] = round(decorrido, 3)
+    resumo["tarefas_por_s"] = round(resumo["concluidas"] / decorrido, 3) if decorrido else 0.0
+    resumo["tokens_por_s"] = round(resumo["tokens_saida"] / decorrido, 1) if decorrido else 0.0
+    resumo["limitador"] = get_limitador_taxa().estatisticas()
+    return resumo
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("entrada", help="JSONL de tarefas")
+    parser.add_argument("saida", help="JSONL de resultados (também usado como checkpoint)")
+    parser.add_argument("--workers", type=int, default=4, help="chamadas simultâneas")
+    parser.add_argument("--docx-dir", help="diretório para salvar um .docx por tarefa")
+    parser.add_argument("--fake", action="store_true", help="usa o backend falso local (sem custo)")
+    parser.add_argument("--latencia-fake", type=float, default=0.5)
+    parser.add_argument("--taxa-429-fake", type=float, default=0.0)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    if args.fake:
+        from fake_openai import criar_clientes_falsos
+
+        openai_functions.definir_openai_client(*criar_clientes_falsos(args.latencia_fake, args.taxa_429_fake))
+
+    resumo = executar_lote(
+        ler_tarefas(args.entrada), args.saida,
+        workers=args.workers, docx_dir=args.docx_dir,
+    )
+    print(json.dumps(resumo, ensure_ascii=False))
+    return 0 if resumo["erros"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
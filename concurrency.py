@@ -0,0 +1,83 @@
+import asyncio
+import threading
+
+from instrumentation import get_metricas
+from utils import obter_config
+
+
+class LimiteConcorrencia:
+    """Limita quantas chamadas à API ficam em andamento ao mesmo tempo no processo.
+
+    Funciona tanto para código síncrono (threads do Streamlit) quanto para
+    corrotinas em qualquer event loop, pois usa um semáforo de threads.
+    """
+
+    def __init__(self, maximo):
+        self.maximo = maximo
+        self._semaforo = threading.BoundedSemaphore(maximo)
+        self._lock = threading.Lock()
+        self.em_andamento = 0
+        self.aguardando = 0
+
+    def _entrou(self):
+        with self._lock:
+            self.em_andamento += 1
+
+    def adquirir(self):
+        with self._lock:
+            self.aguardando += 1
+        try:
+            self._semaforo.acquire()
+        finally:
+            with self._lock:
+                self.aguardando -= 1
+        self._entrou()
+
+    async def adquirir_async(self):
+        # Tenta sem bloquear o event loop, com espera crescente entre as tentativas
+        with self._lock:
+            self.aguardando += 1
+        try:
+            espera = 0.005
+            while not self._semaforo.acquire(blocking=False):
+                await asyncio.sleep(espera)
+                espera = min(espera * 2, 0.1)
+        finally:
+            with self._lock:
+                self.aguardando -= 1
+        self._entrou()
+
+    def liberar(self):
+        with self._lock:
+            self.em_andamento -= 1
+        self._semaforo.release()
+
+    def __enter__(self):
+        self.adquirir()
+        return self
+
+    def __exit__(self, *exc):
+        self.liberar()
+
+    async def __aenter__(self):
+        await self.adquirir_async()
+        return self
+
+    async def __aexit__(self, *exc):
+        self.liberar()
+
+
+_limite = None
+_limite_lock = threading.Lock()
+
+
+def get_limite_concorrencia():
+    """Retorna o limitador compartilhado pelo processo (OPENAI_MAX_CONCORRENCIA)."""
+    global _limite
+    with _limite_lock:
+        if _limite is None:
+            _limite = LimiteConcorrencia(int(obter_config("OPENAI_MAX_CONCORRENCIA", 8)))
+            get_metricas().registrar_medidor("concorrencia", lambda: {
+                "maximo": _limite.maximo, "em_andamento": _limite.em_andamento, "aguardando": _limite.aguardando,
+            })
+        return _limite
@@ -0,0 +1,144 @@
+import hashlib
+import mmap
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from utils import obter_config
+
+# Intervalo mínimo entre duas varreduras de expiração do disco
+INTERVALO_EXPIRACAO_S = 300
+
+
+class ArmazemContexto:
+    """Textos de contexto compartilhados por todas as sessões, endereçados pelo hash do conteúdo.
+
+    Cada texto distinto é gravado uma única vez em disco e lido com mmap; as
+    sessões guardam apenas a chave. Em memória fica um LRU de textos já
+    decodificados, limitado em bytes, então o consumo cresce com o número de
+    documentos distintos em uso, não com o número de sessões. Arquivos sem
+    acesso há mais de `ttl_segundos` são removidos do disco.
+    """
+
+    def __init__(self, diretorio, limite_memoria_bytes, ttl_segundos):
+        self.diretorio = diretorio
+        self.limite_memoria_bytes = limite_memoria_bytes
+        self.ttl_segundos = ttl_segundos
+        self._memoria = OrderedDict()
+        self._bytes_memoria = 0
+        self._lock = threading.Lock()
+        self._ultima_expiracao = 0.0
+        self.acertos_memoria = 0
+        self.leituras_disco = 0
+        self.faltando = 0
+        os.makedirs(diretorio, exist_ok=True)
+
+    def _caminho(self, chave):
+        return os.path.join(self.diretorio, f"{chave}.txt")
+
+    def _guardar_memoria(self, chave, texto, tamanho):
+        if tamanho > self.limite_memoria_bytes:
+            return
+        with self._lock:
+            if chave in self._memoria:
+                self._memoria.move_to_end(chave)
+                return
+            self._memoria[chave] = (texto, tamanho)
+            self._bytes_memoria += tamanho
+            while self._bytes_memoria > self.limite_memoria_bytes:
+                _, (_, removido) = self._memoria.popitem(last=False)
+                self._bytes_memoria -= removido
+
+    def guardar(self, texto):
+        """Guarda o texto (se ainda não existir) e retorna a chave para a sessão."""
+        dados = texto.encode("utf-8")
+        chave = hashlib.sha256(dados).hexdigest()
+        caminho = self._caminho(chave)
+        if os.path.exists(caminho):
+            # Renova o prazo de expiração
+            os.utime(caminho)
+        else:
+            temporario = f"{caminho}.{threading.get_ident()}.tmp"
+            with open(temporario, "wb") as f:
+                f.write(dados)
+            os.replace(temporario, caminho)
+        self._guardar_memoria(chave, texto, len(dados))
+        self._expirar()
+        return chave
+
+    def obter(self, chave):
+        """Retorna o texto da chave, ou None se ele expirou."""
+        with self._lock:
+            if chave in self._memoria:
+                self._memoria.move_to_end(chave)
+                self.acertos_memoria += 1
+                return self._memoria[chave][0]
+
+        caminho = self._caminho(chave)
+        try:
+            with open(caminho, "rb") as f:
+                tamanho = os.fstat(f.fileno()).st_size
+                if tamanho == 0:
+                    texto = ""
+                else:
+                    # Decodifica direto do mapeamento, sem uma cópia intermediária em bytes
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapa:
+                        texto = str(mapa, "utf-8")
+            os.utime(caminho)
+        except FileNotFoundError:
+            with self._lock:
+                self.faltando += 1
+            return None
+        with self._lock:
+            self.leituras_disco += 1
+        self._guardar_memoria(chave, texto, tamanho)
+        return texto
+
+    def _expirar(self):
+        """Remove do disco os textos sem acesso há mais de ttl_segundos (no máximo a cada 5 min)."""
+        agora = time.time()
+        with self._lock:
+            if agora - self._ultima_expiracao < INTERVALO_EXPIRACAO_S:
+                return
+            self._ultima_expiracao = agora
+        for nome in os.listdir(self.diretorio):
+            if not nome.endswith(".txt"):
+                continue
+            caminho = os.path.join(self.diretorio, nome)
+            try:
+                if agora - os.stat(caminho).st_mtime > self.ttl_segundos:
+                    os.remove(caminho)
+                    with self._lock:
+                        entrada = self._memoria.pop(nome[:-4], None)
+                        if entrada is not None:
+                            self._bytes_memoria -= entrada[1]
+            except OSError:
+                pass
+
+    def estatisticas(self):
+        with self._lock:
+            return {
+                "textos_memoria": len(self._memoria),
+                "bytes_memoria": self._bytes_memoria,
+                "acertos_memoria": self.acertos_memoria,
+                "leituras_disco": self.leituras_disco,
+                "faltando": self.faltando,
+            }
+
+
+_armazem = None
+_armazem_lock = threading.Lock()
+
+
+def get_armazem_contexto():
+    """Retorna o armazém compartilhado pelo processo (CONTEXTO_DIR, CONTEXTO_MEMORIA_MB, CONTEXTO_TTL_H)."""
+    global _armazem
+    with _armazem_lock:
+        if _armazem is None:
+            _armazem = ArmazemContexto(
+                diretorio=obter_config("CONTEXTO_DIR", os.path.join(".cache", "contexto")),
+                limite_memoria_bytes=int(obter_config("CONTEXTO_MEMORIA_MB", 128)) * 1024 * 1024,
+                ttl_segundos=float(obter_config("CONTEXTO_TTL_H", 24)) * 3600,
+            )
+        return _armazem
@@ -0,0 +1,176 @@
+"""Resumo map-reduce do material enviado, calculado em segundo plano logo após o upload.
+
+O texto extraído é dividido em blocos, cada bloco é resumido numa chamada
+própria (map, em paralelo) e os resumos são combinados na ordem (reduce; em
+níveis, se não couberem numa única chamada). O resultado fica no cache de
+respostas sob o hash do conteúdo, a mesma chave do armazém de contexto, então
+cada documento é resumido uma única vez para todas as sessões (e de novo só
+se o cache o expirar ou despejar). Com o resumo pronto, as gerações podem
+usá-lo como contexto no lugar do texto bruto.
+"""
+import hashlib
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from background_jobs import get_executor_tarefas
+from instrumentation import medir
+from response_cache import get_cache_respostas
+from retrieval import dividir_em_trechos
+from token_budget import contar_tokens
+from utils import obter_config
+
+logger = logging.getLogger(__name__)
+
+# Dono das tarefas de resumo na tabela de background_jobs (o tipo é a chave do texto)
+DONO_TAREFAS = "resumos"
+
+# Falhas consecutivas por chave: (quantidade, momento da última), para não repetir
+# a cada rerun um resumo que falhou (chave inválida, pedido rejeitado...)
+_falhas = {}
+_lock = threading.Lock()
+
+
+def _configuracao():
+    return {
+        "min_tokens": int(obter_config("RESUMO_MIN_TOKENS", 4000)),
+        "palavras_bloco": int(obter_config("RESUMO_PALAVRAS_BLOCO", 2000)),
+        "tokens_resumo_bloco": int(obter_config("RESUMO_TOKENS_BLOCO", 400)),
+        "tokens_resumo": int(obter_config("RESUMO_TOKENS", 1500)),
+        "tokens_reducao": int(obter_config("RESUMO_MAX_TOKENS_REDUCAO", 6000)),
+        "concorrencia": int(obter_config("RESUMO_CONCORRENCIA", 4)),
+        "espera_falha_s": float(obter_config("RESUMO_ESPERA_FALHA_S", 300)),
+    }
+
+
+def chave_do_texto(texto):
+    """Hash do conteúdo (o mesmo de context_store.ArmazemContexto.guardar)."""
+    return hashlib.sha256(texto.encode("utf-8")).hexdigest()
+
+
+def _chave_cache(chave):
+    return f"resumo:{chave}"
+
+
+def _grupos(resumos, limite_tokens):
+    """Agrupa resumos consecutivos em grupos de até `limite_tokens` (e de pelo menos dois, para a redução avançar)."""
+    grupos, atual, tokens = [], [], 0
+    for resumo in resumos:
+        n = contar_tokens(resumo)
+        if atual and tokens + n > limite_tokens:
+            grupos.append(atual)
+            atual, tokens = [], 0
+        atual.append(resumo)
+        tokens += n
+    grupos.append(atual)
+    if all(len(grupo) == 1 for grupo in grupos):
+        grupos = [resumos[i:i + 2] for i in range(0, len(resumos), 2)]
+    return grupos
+
+
+def resumir(texto, ao_progredir=None):
+    """Resume o texto (map-reduce) e retorna o resumo.
+
+    `ao_progredir(feitos, total, mensagem)` é chamado a cada bloco resumido.
+    """
+    from openai_functions import combinar_resumos, resumir_trecho
+
+    config = _configuracao()
+    blocos = dividir_em_trechos(texto, config["palavras_bloco"], sobreposicao=0)
+    with medir("resumo_documento", blocos=len(blocos), tokens_texto=contar_tokens(texto)) as evento:
+        # map: um resumo por bloco, em paralelo (o limitador do processo controla a taxa)
+        resumos = [None] * len(blocos)
+        with ThreadPoolExecutor(max_workers=max(1, min(config["concorrencia"], len(blocos)))) as executor:
+            futuros = {
+                executor.submit(resumir_trecho, bloco, numero, len(blocos), config["tokens_resumo_bloco"]): numero
+                for numero, bloco in enumerate(blocos, start=1)
+            }
+            feitos = 0
+            for futuro in as_completed(futuros):
+                resumos[futuros[futuro] - 1] = futuro.result()
+                feitos += 1
+                if ao_progredir:
+                    ao_progredir(feitos, len(blocos), f"{feitos}/{len(blocos)} partes resumidas")
+
+        # reduce: combina em níveis até caber numa única chamada
+        niveis = 0
+        while len(resumos) > 1:
+            niveis += 1
+            grupos = _grupos(resumos, config["tokens_reducao"])
+            if len(grupos) == 1:
+                resumos = [combinar_resumos(resumos, config["tokens_resumo"])]
+                break
+            resumos = [
+                combinar_resumos(grupo, config["tokens_resumo"]) if len(grupo) > 1 else grupo[0]
+                for grupo in grupos
+            ]
+        evento["niveis_reducao"] = niveis
+        evento["tokens_resumo"] = contar_tokens(resumos[0]) if resumos else 0
+    return resumos[0] if resumos else ""
+
+
+def obter_resumo(chave):
+    """Resumo já calculado do texto com essa chave, ou None."""
+    return get_cache_respostas().obter(_chave_cache(chave))
+
+
+def _tarefa_resumo(tarefa, texto, chave):
+    try:
+        resumo = resumir(texto, ao_progredir=tarefa.relatar)
+    except Exception:
+        with _lock:
+            quantidade, _ = _falhas.get(chave, (0, 0.0))
+            _falhas[chave] = (quantidade + 1, time.monotonic())
+        raise
+    get_cache_respostas().guardar(_chave_cache(chave), resumo)
+    with _lock:
+        _falhas.pop(chave, None)
+    return resumo
+
+
+def _em_espera(chave, espera_base):
+    """True se o resumo dessa chave falhou há pouco (espera dobra a cada falha, até 1 h)."""
+    quantidade, ultima = _falhas.get(chave, (0, 0.0))
+    if not quantidade:
+        return False
+    espera = min(espera_base * 2 ** (quantidade - 1), 3600.0)
+    return time.monotonic() - ultima < espera
+
+
+def iniciar_resumo(texto, chave=None, tentar_novamente=False):
+    """Dispara o resumo do texto em segundo plano, se ainda não existir nem estiver em andamento.
+
+    Retorna a chave do texto, ou None se ele é curto demais para precisar de
+    resumo (RESUMO_MIN_TOKENS). Pode ser chamada a cada rerun: com o resumo
+    pronto custa uma consulta ao cache, que é sempre refeita (se o cache
+    expirou ou despejou o resumo, ele é calculado de novo). Depois de uma
+    falha, só tenta de novo passada a espera (RESUMO_ESPERA_FALHA_S, dobrando
+    a cada falha seguida) ou com `tentar_novamente=True`.
+    """
+    chave = chave or chave_do_texto(texto)
+    if obter_resumo(chave) is not None:
+        return chave
+    config = _configuracao()
+    if contar_tokens(texto) < config["min_tokens"]:
+        return None
+    executor = get_executor_tarefas()
+    with _lock:
+        tarefa = executor.ultima(DONO_TAREFAS, chave)
+        if tarefa is not None and not tarefa.finalizada:
+            return chave
+        if not tentar_novamente and _em_espera(chave, config["espera_falha_s"]):
+            return chave
+        # Confere de novo com o lock: outra sessão pode ter acabado de concluir o resumo
+        if obter_resumo(chave) is not None:
+            return chave
+        logger.info("Iniciando resumo do material %s", chave[:12])
+        executor.enviar(DONO_TAREFAS, chave, _tarefa_resumo, texto, chave)
+    return chave
+
+
+def situacao_resumo(chave):
+    """Retorna (pronto, tarefa): se o resumo está no cache e a tarefa que o calcula (ou None)."""
+    if obter_resumo(chave) is not None:
+        return True, None
+    return False, get_executor_tarefas().ultima(DONO_TAREFAS, chave)
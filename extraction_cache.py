@@ -0,0 +1,152 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+from utils import obter_config
+
+# Incrementar quando a forma de extrair texto mudar, para invalidar o cache em disco
+VERSAO_EXTRACAO = 2
+
+
+def calcular_chave(dados, extensao):
+    """Gera a chave do cache a partir do hash dos bytes do arquivo."""
+    digest = hashlib.sha256(dados).hexdigest()
+    return f"v{VERSAO_EXTRACAO}-{extensao.lstrip('.')}-{digest}"
+
+
+class CacheExtracao:
+    """Cache LRU de textos extraídos, com camada em memória e camada em disco."""
+
+    def __init__(self, diretorio, limite_memoria_bytes, limite_disco_bytes):
+        self.diretorio = diretorio
+        self.limite_memoria_bytes = limite_memoria_bytes
+        self.limite_disco_bytes = limite_disco_bytes
+        self._memoria = OrderedDict()
+        self._bytes_memoria = 0
+        self._lock = threading.Lock()
+        self.acertos_memoria = 0
+        self.acertos_disco = 0
+        self.falhas = 0
+        os.makedirs(diretorio, exist_ok=True)
+
+    def _caminho(self, chave):
+        return os.path.join(self.diretorio, f"{chave}.txt")
+
+    def _guardar_memoria(self, chave, texto):
+        tamanho = len(texto.encode("utf-8"))
+        if tamanho > self.limite_memoria_bytes:
+            return
+        if chave in self._memoria:
+            self._bytes_memoria -= self._memoria.pop(chave)[1]
+        self._memoria[chave] = (texto, tamanho)
+        self._bytes_memoria += tamanho
+        while self._bytes_memoria > self.limite_memoria_bytes:
+            _, (_, removido) = self._memoria.popitem(last=False)
+            self._bytes_memoria -= removido
+
+    def obter(self, chave):
+        """Retorna o texto em cache ou None."""
+        with self._lock:
+            if chave in self._memoria:
+                self._memoria.move_to_end(chave)
+                self.acertos_memoria += 1
+                return self._memoria[chave][0]
+
+        caminho = self._caminho(chave)
+        try:
+            with open(caminho, "r", encoding="utf-8") as f:
+                texto = f.read()
+            # Atualiza o mtime, que serve de ordem LRU da camada em disco
+            os.utime(caminho)
+        except OSError:
+            with self._lock:
+                self.falhas += 1
+            return None
+
+        with self._lock:
+            self.acertos_disco += 1
+            self._guardar_memoria(chave, texto)
+        return texto
+
+    def guardar(self, chave, texto):
+        """Armazena o texto nas duas camadas."""
+        with self._lock:
+            self._guardar_memoria(chave, texto)
+
+        caminho = self._caminho(chave)
+        temporario = f"{caminho}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(temporario, "w", encoding="utf-8") as f:
+                f.write(texto)
+            os.replace(temporario, caminho)
+        except OSError:
+            # O cache em disco é opcional; a camada em memória continua valendo
+            return
+        self._despejar_disco()
+
+    def _despejar_disco(self):
+        """Remove os arquivos menos usados até caber no limite em disco."""
+        entradas = []
+        total = 0
+        for nome in os.listdir(self.diretorio):
+            if not nome.endswith(".txt"):
+                continue
+            try:
+                info = os.stat(os.path.join(self.diretorio, nome))
+            except OSError:
+                continue
+            entradas.append((info.st_mtime, info.st_size, nome))
+            total += info.st_size
+
+        entradas.sort()
+        for _, tamanho, nome in entradas:
+            if total <= self.limite_disco_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.diretorio, nome))
+                total -= tamanho
+            except OSError:
+                pass
+
+    def limpar(self):
+        """Esvazia as duas camadas (os contadores são mantidos)."""
+        with self._lock:
+            self._memoria.clear()
+            self._bytes_memoria = 0
+        for nome in os.listdir(self.diretorio):
+            if nome.endswith(".txt"):
+                try:
+                    os.remove(os.path.join(self.diretorio, nome))
+                except OSError:
+                    pass
+
+    def estatisticas(self):
+        """Retorna os contadores de acerto/falha e a ocupação em memória."""
+        with self._lock:
+            consultas = self.acertos_memoria + self.acertos_disco + self.falhas
+            return {
+                "acertos_memoria": self.acertos_memoria,
+                "acertos_disco": self.acertos_disco,
+                "falhas": self.falhas,
+                "taxa_acerto": (self.acertos_memoria + self.acertos_disco) / consultas if consultas else 0.0,
+                "itens_memoria": len(self._memoria),
+                "bytes_memoria": self._bytes_memoria,
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache_extracao():
+    """Retorna o cache compartilhado pelo processo (todas as sessões do Streamlit)."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = CacheExtracao(
+                diretorio=obter_config("EXTRACAO_CACHE_DIR", os.path.join(".cache", "extracao")),
+                limite_memoria_bytes=int(obter_config("EXTRACAO_CACHE_MEMORIA_MB", 64)) * 1024 * 1024,
+                limite_disco_bytes=int(obter_config("EXTRACAO_CACHE_DISCO_MB", 512)) * 1024 * 1024,
+            )
+        return _cache
@@ -0,0 +1,131 @@
+"""Backend falso de chat completions, em processo, para a CLI e testes sem custo.
+
+Imita a interface usada em openai_functions (`client.chat.completions.create`),
+com latência configurável, streaming, respostas determinísticas (derivadas do
+prompt) e injeção de erros 429.
+"""
+import asyncio
+import hashlib
+import random
+import time
+import types
+
+import httpx
+import openai
+
+from question_sharding import ENFOQUES
+
+
+def _texto_deterministico(messages, max_tokens=None):
+    """Gera um texto de resposta que depende só das mensagens (mesmo prompt -> mesmo texto)."""
+    prompt = messages[-1]["content"]
+    semente = int(hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:8], 16)
+    aleatorio = random.Random(semente)
+    linhas = [f"{i}. Item {semente % 1000}-{i}: {aleatorio.choice(ENFOQUES)}." for i in range(1, 6)]
+    texto = "\n".join(linhas)
+    if max_tokens:
+        texto = texto[: max_tokens * 4]
+    return texto
+
+
+def _motivo_fim(messages, texto):
+    """finish_reason da resposta: "length" se o max_tokens cortou o texto."""
+    return "length" if len(texto) < len(_texto_deterministico(messages)) else "stop"
+
+
+def _erro_429():
+    requisicao = httpx.Request("POST", "http://backend-falso/v1/chat/completions")
+    resposta = httpx.Response(429, request=requisicao, headers={"retry-after": "1"})
+    return openai.RateLimitError("Rate limit (backend falso)", response=resposta, body=None)
+
+
+def _uso(texto, messages):
+    tokens_entrada = sum(len(m["content"]) for m in messages) // 4
+    tokens_saida = len(texto) // 4
+    return types.SimpleNamespace(
+        prompt_tokens=tokens_entrada, completion_tokens=tokens_saida, total_tokens=tokens_entrada + tokens_saida
+    )
+
+
+def _resposta(texto, messages, modelo):
+    mensagem = types.SimpleNamespace(role="assistant", content=texto)
+    return types.SimpleNamespace(
+        model=modelo,
+        choices=[types.SimpleNamespace(message=mensagem, finish_reason=_motivo_fim(messages, texto))],
+        usage=_uso(texto, messages),
+    )
+
+
+def _chunk(trecho, motivo_fim=None):
+    """Chunk de stream; como na API, só o último trecho traz o finish_reason."""
+    escolha = types.SimpleNamespace(delta=types.SimpleNamespace(content=trecho), finish_reason=motivo_fim)
+    return types.SimpleNamespace(choices=[escolha], usage=None)
+
+
+def _chunks(texto, messages, stream_options=None):
+    """Chunks do stream de `texto`, com o chunk final só de usage se include_usage foi pedido."""
+    trechos = _trechos(texto)
+    motivo_fim = _motivo_fim(messages, texto)
+    for i, trecho in enumerate(trechos):
+        yield _chunk(trecho, motivo_fim if i == len(trechos) - 1 else None)
+    if (stream_options or {}).get("include_usage"):
+        yield types.SimpleNamespace(choices=[], usage=_uso(texto, messages))
+
+
+def _trechos(texto):
+    palavras = texto.split(" ")
+    return [p + (" " if i < len(palavras) - 1 else "") for i, p in enumerate(palavras)]
+
+
+class _Completions:
+    def __init__(self, latencia, taxa_429, aleatorio):
+        self.latencia = latencia
+        self.taxa_429 = taxa_429
+        self._aleatorio = aleatorio
+        self.chamadas = 0
+
+    def _sortear(self):
+        self.chamadas += 1
+        return self._aleatorio.random() < self.taxa_429
+
+    def create(self, model, messages, stream=False, max_tokens=None, stream_options=None, **kwargs):
+        if self._sortear():
+            raise _erro_429()
+        texto = _texto_deterministico(messages, max_tokens)
+        if not stream:
+            time.sleep(self.latencia)
+            return _resposta(texto, messages, model)
+
+        def gerar():
+            pausa = self.latencia / len(_trechos(texto))
+            for chunk in _chunks(texto, messages, stream_options):
+                if chunk.choices:
+                    time.sleep(pausa)
+                yield chunk
+        return gerar()
+
+
+class _AsyncCompletions(_Completions):
+    async def create(self, model, messages, stream=False, max_tokens=None, stream_options=None, **kwargs):
+        if self._sortear():
+            raise _erro_429()
+        texto = _texto_deterministico(messages, max_tokens)
+        if not stream:
+            await asyncio.sleep(self.latencia)
+            return _resposta(texto, messages, model)
+
+        async def gerar():
+            pausa = self.latencia / len(_trechos(texto))
+            for chunk in _chunks(texto, messages, stream_options):
+                if chunk.choices:
+                    await asyncio.sleep(pausa)
+                yield chunk
+        return gerar()
+
+
+def criar_clientes_falsos(latencia=0.5, taxa_429=0.0, semente=0):
+    """Retorna (cliente síncrono, cliente assíncrono) falsos."""
+    aleatorio = random.Random(semente)
+    sincrono = types.SimpleNamespace(chat=types.SimpleNamespace(completions=_Completions(latencia, taxa_429, aleatorio)))
+    assincrono = types.SimpleNamespace(chat=types.SimpleNamespace(completions=_AsyncCompletions(latencia, taxa_429, aleatorio)))
+    return sincrono, assincrono
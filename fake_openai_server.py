@@ -0,0 +1,284 @@
+"""Servidor HTTP local que imita o endpoint /v1/chat/completions da OpenAI.
+
+Serve para testes de carga e de capacidade sem custo: o app usa o mesmo
+caminho de código (SDK, pool HTTP, limitadores) apontando OPENAI_BASE_URL
+para cá. As respostas são determinísticas (derivadas do prompt, como em
+fake_openai); a latência segue uma distribuição configurável; há streaming
+(SSE), injeção de 429, opcionalmente uma cota de RPM como a da API real e
+um cache de prefixo simulado (prompt_tokens_details.cached_tokens).
+
+Uso:
+    python fake_openai_server.py --porta 8000 --distribuicao lognormal --latencia 1.5 --taxa-429 0.02
+    OPENAI_BASE_URL=http://127.0.0.1:8000/v1 OPENAI_API_KEY=falsa streamlit run main.py
+"""
+import argparse
+import hashlib
+import json
+import logging
+import math
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from fake_openai import _motivo_fim, _texto_deterministico, _trechos
+from rate_limiter import BaldeTokens
+
+logger = logging.getLogger("fake_openai_server")
+
+DISTRIBUICOES = ("fixa", "uniforme", "exponencial", "lognormal")
+
+# Como na API: só prefixos a partir de 1024 tokens entram no cache, em blocos de 128
+PREFIXO_MINIMO = 1024
+BLOCO_PREFIXO = 128
+MAX_PREFIXOS = 1024
+
+
+class ConfigServidor:
+    """Comportamento do servidor falso.
+
+    `latencia` é a média (s) da duração total de uma resposta; `dispersao` é a
+    meia-largura relativa (uniforme) ou o sigma (lognormal). Em streams, a
+    fração `fracao_ttft` da latência passa antes do primeiro trecho e o resto
+    é distribuído entre os trechos.
+    """
+
+    def __init__(self, distribuicao="lognormal", latencia=1.0, dispersao=0.5, fracao_ttft=0.2,
+                 taxa_429=0.0, rpm=None, retry_after=1.0, semente=0):
+        if distribuicao not in DISTRIBUICOES:
+            raise ValueError(f"distribuição desconhecida: {distribuicao}")
+        self.distribuicao = distribuicao
+        self.latencia = latencia
+        self.dispersao = dispersao
+        self.fracao_ttft = fracao_ttft
+        self.taxa_429 = taxa_429
+        self.retry_after = retry_after
+        self.cota = BaldeTokens(rpm) if rpm else None
+        self._aleatorio = random.Random(semente)
+        self._lock = threading.Lock()
+        self._prefixos = OrderedDict()
+        self.pedidos = 0
+        self.erros_429 = 0
+        self.tokens_em_cache = 0
+
+    def sortear_latencia(self):
+        with self._lock:
+            if self.distribuicao == "fixa":
+                return self.latencia
+            if self.distribuicao == "uniforme":
+                largura = min(self.dispersao, 1.0) * self.latencia
+                return self._aleatorio.uniform(self.latencia - largura, self.latencia + largura)
+            if self.distribuicao == "exponencial":
+                return self._aleatorio.expovariate(1 / self.latencia) if self.latencia > 0 else 0.0
+            # lognormal com a média pedida
+            mu = math.log(self.latencia) - self.dispersao ** 2 / 2 if self.latencia > 0 else 0.0
+            return self._aleatorio.lognormvariate(mu, self.dispersao) if self.latencia > 0 else 0.0
+
+    def admitir(self):
+        """False se o pedido deve receber 429 (sorteio ou cota de RPM esgotada)."""
+        with self._lock:
+            self.pedidos += 1
+            recusar = self._aleatorio.random() < self.taxa_429
+            if not recusar and self.cota is not None:
+                if self.cota.espera_para(1, time.monotonic()) > 0:
+                    recusar = True
+                else:
+                    self.cota.consumir(1)
+            if recusar:
+                self.erros_429 += 1
+            return not recusar
+
+
+    def tokens_em_cache_para(self, messages):
+        """Tokens do prefixo (todas as mensagens menos a última) já vistos em pedidos anteriores."""
+        conteudos = [m.get("content") or "" for m in messages[:-1]]
+        tokens = sum(len(c) for c in conteudos) // 4
+        if tokens < PREFIXO_MINIMO:
+            return 0
+        chave = hashlib.sha256("\x00".join(conteudos).encode("utf-8")).hexdigest()
+        with self._lock:
+            visto = self._prefixos.pop(chave, None) is not None
+            self._prefixos[chave] = True
+            while len(self._prefixos) > MAX_PREFIXOS:
+                self._prefixos.popitem(last=False)
+            if not visto:
+                return 0
+            em_cache = tokens - tokens % BLOCO_PREFIXO
+            self.tokens_em_cache += em_cache
+            return em_cache
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    config = None  # definido por criar_servidor
+
+    def log_message(self, formato, *args):
+        logger.debug(formato, *args)
+
+    def _responder_json(self, status, corpo, cabecalhos=None):
+        dados = json.dumps(corpo, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(dados)))
+        for nome, valor in (cabecalhos or {}).items():
+            self.send_header(nome, valor)
+        self.end_headers()
+        self.wfile.write(dados)
+
+    def _enviar_evento(self, corpo):
+        # Transfer-Encoding: chunked, um evento SSE por chunk
+        dados = f"data: {corpo}\n\n".encode("utf-8")
+        self.wfile.write(f"{len(dados):x}\r\n".encode("ascii") + dados + b"\r\n")
+        self.wfile.flush()
+
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("/models"):
+            self._responder_json(200, {"object": "list", "data": [{"id": "gpt-3.5-turbo", "object": "model"}]})
+        else:
+            self._responder_json(404, {"error": {"message": "not found", "type": "invalid_request_error"}})
+
+    def do_POST(self):
+        tamanho = int(self.headers.get("Content-Length", 0))
+        pedido = json.loads(self.rfile.read(tamanho) or b"{}")
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._responder_json(404, {"error": {"message": "not found", "type": "invalid_request_error"}})
+            return
+        config = self.config
+        if not config.admitir():
+            self._responder_json(
+                429,
+                {"error": {"message": "Rate limit reached (servidor falso)", "type": "requests", "code": "rate_limit_exceeded"}},
+                {"retry-after": f"{config.retry_after:g}", "retry-after-ms": str(int(config.retry_after * 1000))},
+            )
+            return
+
+        messages = pedido.get("messages", [])
+        modelo = pedido.get("model", "gpt-3.5-turbo")
+        texto = _texto_deterministico(messages, pedido.get("max_tokens"))
+        # Como a API: "length" quando o max_tokens cortou a resposta
+        motivo_fim = _motivo_fim(messages, texto)
+        latencia = config.sortear_latencia()
+        identificador = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+        criado = int(time.time())
+        tokens_entrada = sum(len(m.get("content") or "") for m in messages) // 4
+        tokens_saida = len(texto) // 4
+        uso = {
+            "prompt_tokens": tokens_entrada,
+            "completion_tokens": tokens_saida,
+            "total_tokens": tokens_entrada + tokens_saida,
+            "prompt_tokens_details": {"cached_tokens": config.tokens_em_cache_para(messages)},
+        }
+
+        if not pedido.get("stream"):
+            time.sleep(latencia)
+            self._responder_json(200, {
+                "id": identificador,
+                "object": "chat.completion",
+                "created": criado,
+                "model": modelo,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": texto}, "finish_reason": motivo_fim}],
+                "usage": uso,
+            })
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        def chunk(delta, fim=None, usage=None):
+            corpo = {
+                "id": identificador,
+                "object": "chat.completion.chunk",
+                "created": criado,
+                "model": modelo,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": fim}] if delta is not None else [],
+            }
+            if usage is not None:
+                corpo["usage"] = usage
+            return json.dumps(corpo, ensure_ascii=False)
+
+        trechos = _trechos(texto)
+        time.sleep(latencia * config.fracao_ttft)
+        self._enviar_evento(chunk({"role": "assistant", "content": ""}))
+        intervalo = latencia * (1 - config.fracao_ttft) / max(len(trechos), 1)
+        for trecho in trechos:
+            self._enviar_evento(chunk({"content": trecho}))
+            time.sleep(intervalo)
+        self._enviar_evento(chunk({}, motivo_fim))
+        if (pedido.get("stream_options") or {}).get("include_usage"):
+            self._enviar_evento(chunk(None, usage=uso))
+        self._enviar_evento("[DONE]")
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+
+class _Servidor(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Clientes fechando conexões keep-alive ociosas não são erros do servidor
+        if isinstance(sys.exc_info()[1], (ConnectionResetError, BrokenPipeError)):
+            logger.debug("Conexão encerrada pelo cliente %s", client_address)
+            return
+        super().handle_error(request, client_address)
+
+
+def criar_servidor(config, host="127.0.0.1", porta=0):
+    """Cria o servidor (porta=0 escolhe uma porta livre); a URL base fica em `servidor.url_base`."""
+    handler = type("Handler", (_Handler,), {"config": config})
+    servidor = _Servidor((host, porta), handler)
+    servidor.url_base = f"http://{host}:{servidor.server_address[1]}/v1"
+    return servidor
+
+
+def iniciar_em_segundo_plano(config, host="127.0.0.1", porta=0):
+    """Sobe o servidor numa thread daemon e o retorna (pare com servidor.shutdown())."""
+    servidor = criar_servidor(config, host, porta)
+    threading.Thread(target=servidor.serve_forever, name="fake-openai-server", daemon=True).start()
+    return servidor
+
+
+def adicionar_argumentos(parser):
+    parser.add_argument("--distribuicao", choices=DISTRIBUICOES, default="lognormal")
+    parser.add_argument("--latencia", type=float, default=1.0, help="latência média por resposta (s)")
+    parser.add_argument("--dispersao", type=float, default=0.5, help="sigma (lognormal) ou meia-largura relativa (uniforme)")
+    parser.add_argument("--fracao-ttft", type=float, default=0.2, help="fração da latência até o primeiro trecho")
+    parser.add_argument("--taxa-429", type=float, default=0.0, help="probabilidade de responder 429")
+    parser.add_argument("--rpm", type=int, help="cota de pedidos por minuto (429 quando esgotada)")
+    parser.add_argument("--retry-after", type=float, default=1.0)
+    parser.add_argument("--semente", type=int, default=0)
+
+
+def config_dos_argumentos(args):
+    return ConfigServidor(
+        distribuicao=args.distribuicao, latencia=args.latencia, dispersao=args.dispersao,
+        fracao_ttft=args.fracao_ttft, taxa_429=args.taxa_429, rpm=args.rpm,
+        retry_after=args.retry_after, semente=args.semente,
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--porta", type=int, default=8000)
+    adicionar_argumentos(parser)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    servidor = criar_servidor(config_dos_argumentos(args), args.host, args.porta)
+    logger.info("Servidor falso em %s", servidor.url_base)
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+
+
+if __name__ == "__main__":
+    main()
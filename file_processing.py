@@ -1,48 +1,266 @@
 from io import BytesIO
-from docx import Document
-import pandas as pd
-from PyPDF2 import PdfReader
+from collections import OrderedDict
+import copy
+import functools
+import hashlib
+import importlib
+import threading
+import time
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
 import streamlit as st
+from extraction_cache import calcular_chave, get_cache_extracao
+from instrumentation import medir
+
+# Planilhas maiores que isso são lidas em blocos e enviadas como resumo
+# (esquema, estatísticas por coluna e amostra de linhas) em vez da tabela inteira
+LIMITE_TABELA_COMPLETA = 256 * 1024
+
+# Quantos DOCX prontos ficam em memória (chave: título + hash do conteúdo)
+MAX_DOCX_EM_CACHE = 32
+
+# Arquivos extraídos ao mesmo tempo no upload múltiplo (PDFs grandes ainda usam o pool de processos)
+MAX_EXTRACOES_PARALELAS = 8
+
+# Formatos cuja extração é CPU-bound em Python (o GIL impede o paralelismo em threads):
+# no upload múltiplo, vão para o pool de processos de pdf_extraction
+EXTENSOES_EM_PROCESSO = (".docx", ".csv", ".xlsx")
+
+class TipoNaoSuportado(ValueError):
+    pass
+
+def _ler_bytes(uploaded_file):
+    """Lê o conteúdo do arquivo sem consumir o stream."""
+    if hasattr(uploaded_file, "getvalue"):
+        return uploaded_file.getvalue()
+    posicao = uploaded_file.tell()
+    dados = uploaded_file.read()
+    uploaded_file.seek(posicao)
+    return dados
+
+def _tamanho(uploaded_file):
+    """Tamanho do arquivo em bytes, sem consumir o stream."""
+    if hasattr(uploaded_file, "size"):
+        return uploaded_file.size
+    posicao = uploaded_file.tell()
+    uploaded_file.seek(0, os.SEEK_END)
+    tamanho = uploaded_file.tell()
+    uploaded_file.seek(posicao)
+    return tamanho
 
 def processar_arquivos(uploaded_file):
-    """Processa arquivos e retorna texto extraído."""
+    """Processa arquivos e retorna texto extraído.
+
+    O texto é guardado em cache pelo hash dos bytes do arquivo, então reruns do
+    Streamlit e reenvios do mesmo arquivo não repetem a extração.
+    """
     try:
-        if uploaded_file.name.endswith(".docx"):
-            doc = Document(uploaded_file)
-            texto = "\n".join([p.text for p in doc.paragraphs])
+        return _processar(uploaded_file)
+    except TipoNaoSuportado as e:
+        st.error(str(e))
+    except Exception as e:
+        st.error(f"Erro ao processar arquivo: {e}")
+    return None
+
+def processar_varios_arquivos(arquivos):
+    """Extrai vários arquivos ao mesmo tempo (mesmo cache de processar_arquivos).
 
-        elif uploaded_file.name.endswith(".txt"):
-            texto = uploaded_file.read().decode("utf-8")
+    É um gerador que produz (posição, nome, texto, erro) na ordem em que os
+    arquivos terminam; um arquivo que falha vem com texto None e o erro, sem
+    afetar os demais. Com mais de um DOCX, CSV ou XLSX e mais de um processo
+    disponível, esses formatos são extraídos no pool de processos (os PDFs já
+    distribuem as páginas nele), então o tempo total fica próximo ao do
+    arquivo mais lento. Junte os textos com mesclar_contextos.
+    """
+    if not arquivos:
+        return
+    extrair = _extrair_texto
+    pesados = sum(os.path.splitext(arquivo.name)[1].lower() in EXTENSOES_EM_PROCESSO for arquivo in arquivos)
+    if pesados > 1:
+        from pdf_extraction import processos_configurados
 
-        elif uploaded_file.name.endswith(".pdf"):
-            reader = PdfReader(uploaded_file)
-            texto = "\n".join([page.extract_text() for page in reader.pages])
+        # Com um processo só, enviar os bytes e receber o texto de volta só acrescenta custo
+        if processos_configurados() > 1:
+            extrair = _extrair_em_processo
+    with ThreadPoolExecutor(max_workers=min(len(arquivos), MAX_EXTRACOES_PARALELAS)) as executor:
+        futuros = {executor.submit(_processar, arquivo, extrair): posicao for posicao, arquivo in enumerate(arquivos)}
+        for futuro in as_completed(futuros):
+            posicao = futuros[futuro]
+            try:
+                yield posicao, arquivos[posicao].name, futuro.result(), None
+            except Exception as e:
+                yield posicao, arquivos[posicao].name, None, e
 
-        elif uploaded_file.name.endswith(".csv"):
-            df = pd.read_csv(uploaded_file)
-            texto = df.to_string()
+def mesclar_contextos(textos):
+    """Junta [(nome, texto)], na ordem dada, num único contexto com a origem de cada parte.
 
-        elif uploaded_file.name.endswith(".xlsx"):
-            df = pd.read_excel(uploaded_file)
-            texto = df.to_string()
+    Com um único arquivo o texto fica como está (mesma chave de cache e de resumo).
+    """
+    textos = [(nome, texto) for nome, texto in textos if texto]
+    if len(textos) == 1:
+        return textos[0][1]
+    return "\n\n".join(f"[Arquivo: {nome}]\n{texto}" for nome, texto in textos)
 
-        else:
-            st.error("Tipo de arquivo não suportado. Envie .docx, .txt, .pdf, .csv ou .xlsx.")
-            return None
+def _processar(uploaded_file, extrair=None):
+    """Extrai o texto (com cache); levanta a exceção em caso de falha."""
+    extensao = os.path.splitext(uploaded_file.name)[1].lower()
+    with medir("processar_arquivos", extensao=extensao, bytes=_tamanho(uploaded_file)) as evento:
+        chave = calcular_chave(_ler_bytes(uploaded_file), extensao)
+        cache = get_cache_extracao()
+        texto = cache.obter(chave)
+        evento["cache"] = texto is not None
+        if texto is not None:
+            return texto
 
+        inicio = time.perf_counter()
+        texto = (extrair or _extrair_texto)(uploaded_file)
+        evento["extracao_s"] = time.perf_counter() - inicio
+        cache.guardar(chave, texto)
         return texto
 
-    except Exception as e:
-        st.error(f"Erro ao processar arquivo: {e}")
-        return None
+# Extensão -> função de extração. Cada função importa sua biblioteca (python-docx,
+# PyPDF2, pandas...) só no primeiro uso, para o app subir sem carregá-las.
+MANIPULADORES = {}
+# Extensão -> módulos que a função usa (para o pré-aquecimento)
+MODULOS_MANIPULADORES = {}
 
-def gerar_docx(conteudo, titulo):
-    """Função para gerar um arquivo DOCX a partir do texto fornecido."""
-    doc = Document()
+def _manipulador(extensao, modulos=()):
+    def registrar(funcao):
+        MANIPULADORES[extensao] = funcao
+        MODULOS_MANIPULADORES[extensao] = modulos
+        return funcao
+    return registrar
+
+@_manipulador(".docx", modulos=("docx",))
+def _extrair_docx(uploaded_file):
+    from docx import Document
+
+    doc = Document(uploaded_file)
+    return "\n".join([p.text for p in doc.paragraphs])
+
+@_manipulador(".txt")
+def _extrair_txt(uploaded_file):
+    return uploaded_file.read().decode("utf-8")
+
+@_manipulador(".pdf", modulos=("pdf_extraction",))
+def _extrair_pdf(uploaded_file):
+    from pdf_extraction import extrair_texto_pdf
+
+    return extrair_texto_pdf(_ler_bytes(uploaded_file))
+
+@_manipulador(".csv", modulos=("pandas", "tabular_ingestion"))
+def _extrair_csv(uploaded_file):
+    if _tamanho(uploaded_file) > LIMITE_TABELA_COMPLETA:
+        from tabular_ingestion import resumir_csv
+
+        return resumir_csv(uploaded_file)
+    import pandas as pd
+
+    df = pd.read_csv(uploaded_file)
+    return df.to_string()
+
+@_manipulador(".xlsx", modulos=("pandas", "openpyxl", "tabular_ingestion"))
+def _extrair_xlsx(uploaded_file):
+    if _tamanho(uploaded_file) > LIMITE_TABELA_COMPLETA:
+        from tabular_ingestion import resumir_xlsx
+
+        return resumir_xlsx(uploaded_file)
+    import pandas as pd
+
+    df = pd.read_excel(uploaded_file)
+    return df.to_string()
+
+def precarregar_manipuladores():
+    """Importa as bibliotecas de todos os formatos (usado pelo pré-aquecimento)."""
+    for modulos in MODULOS_MANIPULADORES.values():
+        for modulo in modulos:
+            importlib.import_module(modulo)
+
+def _extrair_texto(uploaded_file):
+    """Extrai o texto do arquivo conforme a extensão."""
+    manipulador = MANIPULADORES.get(os.path.splitext(uploaded_file.name)[1].lower())
+    if manipulador is None:
+        raise TipoNaoSuportado("Tipo de arquivo não suportado. Envie .docx, .txt, .pdf, .csv ou .xlsx.")
+    return manipulador(uploaded_file)
+
+class _ArquivoEmMemoria(BytesIO):
+    """Bytes com `name` e `size`, como o UploadedFile do Streamlit (para os workers)."""
+
+    def __init__(self, dados, nome):
+        super().__init__(dados)
+        self.name = nome
+        self.size = len(dados)
+
+def _extrair_bytes(dados, nome):
+    """Executada no worker do pool de processos."""
+    return _extrair_texto(_ArquivoEmMemoria(dados, nome))
+
+def _extrair_em_processo(uploaded_file):
+    """Extrai DOCX/CSV/XLSX num processo do pool; os demais formatos, aqui mesmo."""
+    if os.path.splitext(uploaded_file.name)[1].lower() not in EXTENSOES_EM_PROCESSO:
+        return _extrair_texto(uploaded_file)
+    from pdf_extraction import descartar_pool_processos, obter_pool_processos
+
+    try:
+        futuro = obter_pool_processos().submit(_extrair_bytes, _ler_bytes(uploaded_file), uploaded_file.name)
+        return futuro.result()
+    except BrokenProcessPool:
+        descartar_pool_processos()
+        return _extrair_texto(uploaded_file)
+
+_modelo_docx = None
+_docx_gerados = OrderedDict()
+_docx_lock = threading.Lock()
+
+def _novo_documento():
+    """Cópia do documento-modelo do python-docx, lido e analisado uma única vez."""
+    global _modelo_docx
+    with _docx_lock:
+        if _modelo_docx is None:
+            from docx import Document
+
+            _modelo_docx = Document()
+        return copy.deepcopy(_modelo_docx)
+
+def _montar_docx(conteudo, titulo):
+    doc = _novo_documento()
     doc.add_heading(titulo, level=1)
     doc.add_paragraph(conteudo)
 
     buffer = BytesIO()
     doc.save(buffer)
-    buffer.seek(0)
-    return buffer
+    return buffer.getvalue()
+
+def gerar_docx(conteudo, titulo):
+    """Função para gerar um arquivo DOCX a partir do texto fornecido.
+
+    O resultado é memorizado por título e hash do conteúdo: gerar de novo o
+    mesmo texto não reconstrói o documento.
+    """
+    with medir("gerar_docx", caracteres=len(conteudo)) as evento:
+        chave = (titulo, hashlib.sha256(conteudo.encode("utf-8")).hexdigest())
+        with _docx_lock:
+            dados = _docx_gerados.get(chave)
+            if dados is not None:
+                _docx_gerados.move_to_end(chave)
+        evento["cache"] = dados is not None
+        if dados is None:
+            dados = _montar_docx(conteudo, titulo)
+            with _docx_lock:
+                _docx_gerados[chave] = dados
+                while len(_docx_gerados) > MAX_DOCX_EM_CACHE:
+                    _docx_gerados.popitem(last=False)
+        evento["bytes"] = len(dados)
+    return BytesIO(dados)
+
+def _bytes_docx(conteudo, titulo):
+    return gerar_docx(conteudo, titulo).getvalue()
+
+def docx_sob_demanda(conteudo, titulo):
+    """Retorna uma função que gera o DOCX só quando chamada.
+
+    Para o `data` de `st.download_button`: o documento é montado apenas quando
+    o usuário clica em baixar, não a cada rerun.
+    """
+    return functools.partial(_bytes_docx, conteudo, titulo)
@@ -0,0 +1,232 @@
+"""Métricas de latência, tokens e custo das etapas do app.
+
+Cada etapa instrumentada (extração de arquivos, chamadas ao modelo, geração
+de DOCX) registra um evento. As durações (chaves terminadas em `_s`) vão para
+histogramas em memória por módulo; tokens e custo vão para contadores. Cada
+evento também é gravado como uma linha JSON num log rotativo, e o estado
+agregado é exportado periodicamente em formato texto do Prometheus.
+"""
+import json
+import logging
+import logging.handlers
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+from utils import obter_config
+
+# Limites (em segundos) dos baldes dos histogramas exportados
+LIMITES_HISTOGRAMA = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+# Amostras recentes mantidas por histograma para calcular percentis
+MAX_AMOSTRAS = 2048
+# Campos numéricos somados em contadores (além do número de chamadas e erros)
+CONTADORES = (
+    "tokens_entrada", "tokens_saida", "tokens_em_cache", "custo_usd", "custo_estimado_usd",
+    "chamadas_economizadas", "tokens_economizados",
+)
+
+
+class Histograma:
+    def __init__(self, limites=LIMITES_HISTOGRAMA):
+        self.limites = limites
+        self.contagens = [0] * len(limites)
+        self.total = 0
+        self.soma = 0.0
+        self.amostras = deque(maxlen=MAX_AMOSTRAS)
+
+    def observar(self, valor):
+        self.total += 1
+        self.soma += valor
+        self.amostras.append(valor)
+        for i, limite in enumerate(self.limites):
+            if valor <= limite:
+                self.contagens[i] += 1
+
+    def percentil(self, p):
+        """Percentil `p` (0-100) das amostras recentes, ou None se não houver amostras."""
+        if not self.amostras:
+            return None
+        ordenadas = sorted(self.amostras)
+        return ordenadas[min(len(ordenadas) - 1, int(round(p / 100 * (len(ordenadas) - 1))))]
+
+
+class Metricas:
+    def __init__(self, caminho_log=None, caminho_prometheus=None, intervalo_prometheus=10.0,
+                 max_bytes_log=10 * 1024 * 1024, backups_log=5):
+        self.caminho_prometheus = caminho_prometheus
+        self.intervalo_prometheus = intervalo_prometheus
+        self._histogramas = {}
+        self._contadores = defaultdict(float)
+        self._medidores = {}
+        self._lock = threading.Lock()
+        self._ultima_exportacao = 0.0
+        self._log = None
+        if caminho_log:
+            os.makedirs(os.path.dirname(caminho_log) or ".", exist_ok=True)
+            self._log = logging.getLogger(f"{__name__}.eventos")
+            self._log.propagate = False
+            self._log.setLevel(logging.INFO)
+            if not self._log.handlers:
+                handler = logging.handlers.RotatingFileHandler(
+                    caminho_log, maxBytes=max_bytes_log, backupCount=backups_log, encoding="utf-8"
+                )
+                handler.setFormatter(logging.Formatter("%(message)s"))
+                self._log.addHandler(handler)
+
+    def registrar(self, modulo, evento):
+        """Registra um evento (dicionário) do `modulo`."""
+        with self._lock:
+            self._contadores[("chamadas", modulo)] += 1
+            if evento.get("erro"):
+                self._contadores[("erros", modulo)] += 1
+            for nome, valor in evento.items():
+                if not isinstance(valor, (int, float)) or isinstance(valor, bool):
+                    continue
+                if nome.endswith("_s"):
+                    chave = (nome[:-2], modulo)
+                    if chave not in self._histogramas:
+                        self._histogramas[chave] = Histograma()
+                    self._histogramas[chave].observar(valor)
+                elif nome in CONTADORES:
+                    self._contadores[(nome, modulo)] += valor
+            exportar = (
+                self.caminho_prometheus
+                and time.monotonic() - self._ultima_exportacao >= self.intervalo_prometheus
+            )
+            if exportar:
+                self._ultima_exportacao = time.monotonic()
+        if self._log is not None:
+            self._log.info(json.dumps({"ts": time.time(), "modulo": modulo, **evento}, ensure_ascii=False, default=str))
+        if exportar:
+            self.salvar_prometheus()
+
+    @contextmanager
+    def medir(self, modulo, **campos):
+        """Mede a duração do bloco como `total_s`; o bloco pode acrescentar campos ao evento.
+
+        Exceções são registradas em `erro` e repassadas.
+        """
+        evento = dict(campos)
+        inicio = time.perf_counter()
+        try:
+            yield evento
+        except BaseException as e:
+            evento["erro"] = type(e).__name__
+            raise
+        finally:
+            evento.setdefault("total_s", time.perf_counter() - inicio)
+            self.registrar(modulo, evento)
+
+    def resumo(self):
+        """Uma linha por (módulo, métrica): n, p50 e p95 em segundos."""
+        with self._lock:
+            return [
+                {
+                    "modulo": modulo,
+                    "metrica": nome,
+                    "n": histograma.total,
+                    "p50_s": histograma.percentil(50),
+                    "p95_s": histograma.percentil(95),
+                }
+                for (nome, modulo), histograma in sorted(self._histogramas.items(), key=lambda item: (item[0][1], item[0][0]))
+            ]
+
+    def contadores(self):
+        with self._lock:
+            return {f"{nome}:{modulo}": valor for (nome, modulo), valor in sorted(self._contadores.items())}
+
+    def registrar_medidor(self, modulo, funcao):
+        """Registra `funcao()`, que retorna o estado atual do `modulo` (dicionário de números).
+
+        Os valores são lidos a cada exportação e saem como gauges
+        (ex.: a fila do limitador de taxa).
+        """
+        with self._lock:
+            self._medidores[modulo] = funcao
+
+    def medidores(self):
+        """Estado atual de cada medidor registrado: {modulo: {nome: valor}}."""
+        with self._lock:
+            medidores = dict(self._medidores)
+        estados = {}
+        for modulo, funcao in sorted(medidores.items()):
+            try:
+                estados[modulo] = {
+                    nome: valor for nome, valor in funcao().items()
+                    if isinstance(valor, (int, float)) and not isinstance(valor, bool)
+                }
+            except Exception as e:
+                logging.getLogger(__name__).warning("Falha ao ler o medidor %s: %s", modulo, e)
+        return estados
+
+    def exportar_prometheus(self):
+        """Estado agregado no formato texto de exposição do Prometheus."""
+        linhas = []
+        # Lidos antes de pegar o lock: cada medidor usa o lock do próprio componente
+        for modulo, valores in self.medidores().items():
+            for nome, valor in sorted(valores.items()):
+                metrica = f"agentes_{modulo}_{nome}"
+                linhas.append(f"# TYPE {metrica} gauge")
+                linhas.append(f"{metrica} {valor}")
+        with self._lock:
+            for nome in sorted({nome for nome, _ in self._histogramas}):
+                metrica = f"agentes_{nome}_seconds"
+                linhas.append(f"# TYPE {metrica} histogram")
+                for (n, modulo), histograma in sorted(self._histogramas.items()):
+                    if n != nome:
+                        continue
+                    for limite, contagem in zip(histograma.limites, histograma.contagens):
+                        linhas.append(f'{metrica}_bucket{{modulo="{modulo}",le="{limite}"}} {contagem}')
+                    linhas.append(f'{metrica}_bucket{{modulo="{modulo}",le="+Inf"}} {histograma.total}')
+                    linhas.append(f'{metrica}_sum{{modulo="{modulo}"}} {histograma.soma}')
+                    linhas.append(f'{metrica}_count{{modulo="{modulo}"}} {histograma.total}')
+            for nome in sorted({nome for nome, _ in self._contadores}):
+                metrica = f"agentes_{nome}_total"
+                linhas.append(f"# TYPE {metrica} counter")
+                for (n, modulo), valor in sorted(self._contadores.items()):
+                    if n == nome:
+                        linhas.append(f'{metrica}{{modulo="{modulo}"}} {valor}')
+        return "\n".join(linhas) + "\n"
+
+    def salvar_prometheus(self):
+        """Grava o dump para ser lido pelo textfile collector do node_exporter."""
+        if not self.caminho_prometheus:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.caminho_prometheus) or ".", exist_ok=True)
+            temporario = f"{self.caminho_prometheus}.tmp"
+            with open(temporario, "w", encoding="utf-8") as f:
+                f.write(self.exportar_prometheus())
+            os.replace(temporario, self.caminho_prometheus)
+        except OSError as e:
+            logging.getLogger(__name__).warning("Falha ao gravar as métricas em %s: %s", self.caminho_prometheus, e)
+
+
+_metricas = None
+_metricas_lock = threading.Lock()
+
+
+def get_metricas():
+    """Retorna as métricas compartilhadas pelo processo.
+
+    Configuração: METRICAS_LOG_PATH, METRICAS_LOG_MAX_MB, METRICAS_LOG_BACKUPS,
+    METRICAS_PROMETHEUS_PATH e METRICAS_PROMETHEUS_INTERVALO_S.
+    """
+    global _metricas
+    with _metricas_lock:
+        if _metricas is None:
+            _metricas = Metricas(
+                caminho_log=obter_config("METRICAS_LOG_PATH", os.path.join(".cache", "metricas.jsonl")),
+                caminho_prometheus=obter_config("METRICAS_PROMETHEUS_PATH", os.path.join(".cache", "metricas.prom")),
+                intervalo_prometheus=float(obter_config("METRICAS_PROMETHEUS_INTERVALO_S", 10)),
+                max_bytes_log=int(float(obter_config("METRICAS_LOG_MAX_MB", 10)) * 1024 * 1024),
+                backups_log=int(obter_config("METRICAS_LOG_BACKUPS", 5)),
+            )
+        return _metricas
+
+
+def medir(modulo, **campos):
+    """Atalho para get_metricas().medir(...)."""
+    return get_metricas().medir(modulo, **campos)
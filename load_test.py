@@ -0,0 +1,177 @@
+"""Gerador de carga: simula N professores usando os geradores ao mesmo tempo.
+
+Cada professor é uma thread que chama, em sequência, gerar_plano_aula,
+gerar_assunto_contextualizado, gerar_questoes e corrigir_questoes (sorteados)
+por openai_functions, com streaming como na interface, e espera um tempo de
+"leitura" entre as chamadas. Ao fim, mostra vazão e percentis de latência
+(tempo total e até o primeiro trecho) por gerador.
+
+Por segurança só roda contra o servidor falso: use --servidor-embutido, ou
+aponte OPENAI_BASE_URL para um fake_openai_server já em execução.
+
+Uso:
+    python load_test.py --professores 50 --duracao 60 --servidor-embutido --latencia 1.5 --taxa-429 0.02
+    OPENAI_BASE_URL=http://127.0.0.1:8000/v1 OPENAI_API_KEY=falsa python load_test.py --professores 20
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from collections import defaultdict
+
+from fake_openai_server import adicionar_argumentos, config_dos_argumentos, iniciar_em_segundo_plano
+
+ASSUNTOS = ["Frações", "Fotossíntese", "Revolução Francesa", "Relevo brasileiro", "Verbos", "Equações do 1º grau"]
+ANOS = ["EF - 6º Ano", "EF - 7º Ano", "EF - 8º Ano", "EF - 9º Ano", "EM - 1º Ano"]
+
+
+def _chamadas(openai_functions, aleatorio, contexto):
+    """Sorteia um gerador e seus argumentos, como um professor preenchendo o formulário."""
+    ano, assunto = aleatorio.choice(ANOS), aleatorio.choice(ASSUNTOS)
+    opcoes = {
+        "gerar_plano_aula": lambda: openai_functions.gerar_plano_aula(
+            ano, "Matemática", "3", "2", 50, "Interativa", "Turma distraída", assunto, contexto,
+            stream=True, forcar_novo=True,
+        ),
+        "gerar_assunto_contextualizado": lambda: openai_functions.gerar_assunto_contextualizado(
+            ano, "Ciências", assunto, aleatorio.choice(["Futebol", "Games", "Música"]), contexto,
+            stream=True, forcar_novo=True,
+        ),
+        "gerar_questoes": lambda: openai_functions.gerar_questoes(
+            ano, "História", assunto, "Médio", aleatorio.choice([3, 5]), "Objetivas", contexto,
+            stream=True, forcar_novo=True,
+        ),
+        "corrigir_questoes": lambda: openai_functions.corrigir_questoes(
+            "1) A 2) C 3) B", "1) A 2) B 3) B", "Objetivas", contexto, stream=True,
+        ),
+    }
+    nome = aleatorio.choice(list(opcoes))
+    return nome, opcoes[nome]
+
+
+def _percentil(valores, p):
+    if not valores:
+        return None
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))]
+
+
+def executar_carga(professores, duracao, pensar=1.0, contexto=None, semente=0):
+    """Roda a carga por `duracao` segundos e retorna o relatório."""
+    import openai_functions
+
+    amostras = defaultdict(lambda: {"total": [], "ttft": [], "erros": 0})
+    lock = threading.Lock()
+    fim = time.monotonic() + duracao
+
+    def professor(numero):
+        aleatorio = random.Random(semente * 100_003 + numero)
+        # Chegadas espalhadas no primeiro segundo, como usuários reais
+        time.sleep(aleatorio.uniform(0, min(1.0, duracao)))
+        while time.monotonic() < fim:
+            nome, chamar = _chamadas(openai_functions, aleatorio, contexto)
+            inicio = time.perf_counter()
+            ttft = None
+            try:
+                for _ in chamar():
+                    if ttft is None:
+                        ttft = time.perf_counter() - inicio
+                erro = False
+            except Exception:
+                erro = True
+            total = time.perf_counter() - inicio
+            with lock:
+                if erro:
+                    amostras[nome]["erros"] += 1
+                else:
+                    amostras[nome]["total"].append(total)
+                    amostras[nome]["ttft"].append(ttft if ttft is not None else total)
+            time.sleep(aleatorio.uniform(0, 2 * pensar))
+
+    inicio = time.perf_counter()
+    threads = [threading.Thread(target=professor, args=(i,), daemon=True) for i in range(professores)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    decorrido = time.perf_counter() - inicio
+
+    relatorio = {"professores": professores, "segundos": round(decorrido, 2), "geradores": {}}
+    concluidas = erros = 0
+    for nome, dados in sorted(amostras.items()):
+        concluidas += len(dados["total"])
+        erros += dados["erros"]
+        relatorio["geradores"][nome] = {
+            "concluidas": len(dados["total"]),
+            "erros": dados["erros"],
+            **{f"total_p{p}_s": _percentil(dados["total"], p) for p in (50, 95, 99)},
+            **{f"ttft_p{p}_s": _percentil(dados["ttft"], p) for p in (50, 95)},
+        }
+    relatorio["concluidas"] = concluidas
+    relatorio["erros"] = erros
+    relatorio["vazao_por_s"] = round(concluidas / decorrido, 2) if decorrido else 0.0
+    return relatorio
+
+
+def imprimir_relatorio(relatorio):
+    def ms(valor):
+        return f"{valor * 1000:>8.0f}" if valor is not None else f"{'-':>8}"
+
+    print(f"{relatorio['professores']} professores, {relatorio['segundos']} s: "
+          f"{relatorio['concluidas']} chamadas ({relatorio['vazao_por_s']}/s), {relatorio['erros']} erros")
+    print(f"{'gerador':<32}{'n':>6}{'erros':>7}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'ttft50':>9}{'ttft95':>9}")
+    for nome, dados in relatorio["geradores"].items():
+        print(f"{nome:<32}{dados['concluidas']:>6}{dados['erros']:>7} {ms(dados['total_p50_s'])} {ms(dados['total_p95_s'])} "
+              f"{ms(dados['total_p99_s'])} {ms(dados['ttft_p50_s'])} {ms(dados['ttft_p95_s'])}")
+    if "limitador" in relatorio:
+        print(f"Limitador de taxa: {relatorio['limitador']}")
+    if "servidor" in relatorio:
+        print(f"Servidor falso: {relatorio['servidor']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--professores", type=int, default=10)
+    parser.add_argument("--duracao", type=float, default=30.0, help="segundos de carga")
+    parser.add_argument("--pensar", type=float, default=1.0, help="pausa média entre chamadas de um professor (s)")
+    parser.add_argument("--contexto-palavras", type=int, default=0, help="tamanho do material enviado (0 = sem contexto)")
+    parser.add_argument("--servidor-embutido", action="store_true", help="sobe o servidor falso neste processo")
+    parser.add_argument("--json", help="grava o relatório neste arquivo")
+    adicionar_argumentos(parser)
+    args = parser.parse_args(argv)
+
+    servidor = None
+    if args.servidor_embutido:
+        servidor = iniciar_em_segundo_plano(config_dos_argumentos(args))
+        os.environ["OPENAI_BASE_URL"] = servidor.url_base
+        os.environ.setdefault("OPENAI_API_KEY", "chave-falsa")
+    from utils import obter_config
+    base_url = obter_config("OPENAI_BASE_URL")
+    if not base_url or "api.openai.com" in base_url:
+        parser.error("use --servidor-embutido ou aponte OPENAI_BASE_URL para o servidor falso")
+
+    contexto = None
+    if args.contexto_palavras:
+        from benchmarks.fixtures import gerar_texto
+        contexto = gerar_texto(args.contexto_palavras)
+
+    relatorio = executar_carga(args.professores, args.duracao, args.pensar, contexto, args.semente)
+    from rate_limiter import get_limitador_taxa
+    relatorio["limitador"] = get_limitador_taxa().estatisticas()
+    if servidor is not None:
+        config = servidor.RequestHandlerClass.config
+        relatorio["servidor"] = {"pedidos": config.pedidos, "erros_429": config.erros_429,
+                                 "tokens_em_cache": config.tokens_em_cache}
+        servidor.shutdown()
+    imprimir_relatorio(relatorio)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(relatorio, f, ensure_ascii=False, indent=2)
+    return 0 if relatorio["erros"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
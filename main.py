@@ -1,18 +1,38 @@
 import streamlit as st
-from openai_functions import gerar_plano_aula, gerar_assunto_contextualizado, gerar_questoes
-from file_processing import processar_arquivos, gerar_docx
-from utils import redirecionar_com_query_params
+from openai_functions import gerar_plano_aula, gerar_assunto_contextualizado, gerar_questoes, gerar_questoes_em_partes, QUESTOES_POR_PARTE, estatisticas_coalescencia
+from openai_functions import estimar_assunto_contextualizado, estimar_plano_aula, estimar_questoes
+from question_sharding import dividir_em_partes, mesclar_questoes
+from file_processing import processar_varios_arquivos, mesclar_contextos, docx_sob_demanda
+from retrieval import obter_indice
+from token_budget import PedidoGrandeDemais, contar_tokens
+from utils import redirecionar_com_query_params, guardar_contexto_da_sessao, contexto_da_sessao
+from instrumentation import get_metricas
+from prewarm import iniciar_preaquecimento
+from background_jobs import CANCELADA, CONCLUIDA, FALHOU, get_executor_tarefas, transmitir
+from document_summary import iniciar_resumo, situacao_resumo
+from textbook_library import get_biblioteca, rotulo
 import streamlit as st
 from jose import jwt, JWTError
 
-def validate_token(token: str) -> bool:
+def decode_token(token: str):
+    """Retorna as claims do token, ou None se ele for inválido."""
     try:
         # Substitua "sua_chave_secreta" pela sua chave real
-        jwt.decode(token, "suaChaveSecreta", algorithms=["HS256"])
-        return True
+        return jwt.decode(token, "suaChaveSecreta", algorithms=["HS256"])
     except JWTError:
-        return False
+        return None
+
+def validate_token(token: str) -> bool:
+    return decode_token(token) is not None
+
+def is_admin(token: str) -> bool:
+    """Administradores têm a claim role="admin" (ou admin=true) no token."""
+    claims = decode_token(token) or {}
+    return claims.get("role") == "admin" or claims.get("admin") is True
+
 
+# Adianta em segundo plano as importações pesadas e a conexão com a API
+iniciar_preaquecimento()
 
 # Obtém os parâmetros da URL
 query_params = st.experimental_get_query_params()
@@ -23,6 +43,11 @@ if not token or not validate_token(token):
     st.error("Acesso negado. Você precisa estar autenticado para acessar esta página.")
     st.stop()
 
+# As tarefas em segundo plano são do professor, não da sessão: uma sessão nova
+# (ex.: após reconectar) encontra as gerações que ele deixou em andamento
+professor = (decode_token(token) or {}).get("sub") or token
+executor = get_executor_tarefas()
+
 # Configuração do Streamlit
 st.set_page_config(page_title="Assistente de IA para Professores", layout="wide")
 
@@ -30,6 +55,94 @@ st.set_page_config(page_title="Assistente de IA para Professores", layout="wide"
 st.title("Área Protegida - Assistente de IA para Professores")
 st.write("Bem-vindo, você está autenticado!")
 
+### Gerações em segundo plano
+# Funções executadas pelas tarefas (fora do script: não podem usar st.*)
+
+def _tarefa_stream(tarefa, gerar, *args, **kwargs):
+    return transmitir(tarefa, gerar(*args, stream=True, **kwargs))
+
+def _tarefa_questoes_em_partes(tarefa, ano, componente, assunto, dificuldade, numero_questoes, tipo, contexto, forcar_novo):
+    # Listas grandes: partes geradas em paralelo, o progresso é publicado à medida que terminam
+    partes = {}
+    falhas = []
+    total_partes = len(dividir_em_partes(numero_questoes, QUESTOES_POR_PARTE))
+    for parte, texto, erro in gerar_questoes_em_partes(
+        ano, componente, assunto, dificuldade, numero_questoes, tipo, contexto, forcar_novo=forcar_novo
+    ):
+        partes[parte] = texto
+        if erro is not None:
+            falhas.append(f"parte {parte} falhou: {erro}")
+        else:
+            # Cada parte aparece no acompanhamento assim que fica pronta
+            tarefa.acrescentar(f"**Parte {parte} pronta**\n\n{texto}\n\n---\n\n")
+        tarefa.relatar(len(partes), total_partes, "; ".join([f"{len(partes)}/{total_partes} partes prontas", *falhas]))
+    textos = [partes[parte] for parte in sorted(partes) if partes[parte]]
+    if not textos:
+        raise RuntimeError("nenhuma parte foi gerada")
+    return mesclar_questoes(textos)
+
+def _tarefa_correcao(tarefa, df_respostas, df_gabarito, contexto):
+    from batch_grading import corrigir_turma
+
+    return corrigir_turma(
+        df_respostas, df_gabarito, contexto=contexto,
+        ao_concluir=lambda feitos, total: tarefa.relatar(feitos, total, f"{feitos}/{total} alunos avaliados")
+    )
+
+@st.fragment(run_every=1.0)
+def acompanhar_tarefa(tipo, rotulo, mensagem_erro, entregar):
+    """Mostra o andamento da tarefa `tipo` do professor, reexecutando só este trecho a cada segundo.
+
+    Quando a tarefa termina, `entregar(resultado)` guarda o resultado na sessão
+    e a página inteira é recarregada para exibi-lo.
+    """
+    tarefa = executor.ultima(professor, tipo)
+    if tarefa is None:
+        st.rerun()
+    if tarefa.finalizada:
+        executor.descartar(tarefa.id)
+        st.session_state.pop(f"estimativa_{tipo}", None)
+        if tarefa.estado == CONCLUIDA:
+            entregar(tarefa.resultado)
+        elif tarefa.estado == FALHOU:
+            st.session_state[f"erro_tarefa_{tipo}"] = f"{mensagem_erro}: {tarefa.erro}"
+        st.rerun()
+    st.info(rotulo if tarefa.estado != CANCELADA else "Cancelando...")
+    mostrar_estimativa(tipo)
+    if tarefa.progresso is not None:
+        st.progress(tarefa.progresso, text=tarefa.mensagem)
+    parcial = tarefa.texto_parcial()
+    if parcial:
+        st.markdown(parcial)
+    st.button("Cancelar", key=f"cancelar_tarefa_{tipo}", on_click=executor.cancelar, args=(tarefa.id,))
+
+def estimar_pedido(tipo, estimar, *args, **kwargs):
+    """Guarda na sessão a previsão de tempo e custo do pedido antes de enviá-lo.
+
+    Retorna False (com o erro na tela) se o pedido não cabe no modelo: assim
+    ele nem chega a ir para a fila.
+    """
+    try:
+        st.session_state[f"estimativa_{tipo}"] = estimar(*args, **kwargs)
+    except PedidoGrandeDemais as e:
+        st.error(str(e))
+        return False
+    return True
+
+def mostrar_estimativa(tipo):
+    estimativa = st.session_state.get(f"estimativa_{tipo}")
+    if estimativa:
+        st.caption(
+            f"Previsão: ~{estimativa['latencia_estimada']:.0f} s e ~US$ {estimativa['custo_estimado']:.4f} "
+            f"({estimativa['tokens_entrada']} tokens de entrada, até {estimativa['tokens_saida']} de saída)"
+            + ("; o material foi resumido para caber no modelo." if estimativa["contexto_cortado"] else ".")
+        )
+
+def mostrar_erro_tarefa(tipo):
+    erro = st.session_state.pop(f"erro_tarefa_{tipo}", None)
+    if erro:
+        st.error(erro)
+
 # Listas globais
 ANOS_SERIES = [
     "Selecione uma opção",
@@ -45,17 +158,69 @@ COMPONENTES_CURRICULARES = [
     "Filosofia", "Redação", "Literatura"
 ]
 
+@st.fragment(run_every=2.0)
+def acompanhar_resumo(chave):
+    """Atualiza o andamento do resumo; quando fica pronto, recarrega a página para oferecê-lo."""
+    pronto, tarefa = situacao_resumo(chave)
+    if pronto or tarefa is None or tarefa.finalizada:
+        st.rerun()
+    st.caption("Resumindo o material em segundo plano...")
+    if tarefa.progresso is not None:
+        st.progress(tarefa.progresso, text=tarefa.mensagem)
+
+def mostrar_resumo(chave, texto):
+    pronto, tarefa = situacao_resumo(chave)
+    if pronto:
+        st.toggle(
+            "Usar o resumo do material como contexto", key="usar_resumo",
+            help="Mais rápido e barato que os trechos do texto original; pode omitir detalhes."
+        )
+    elif tarefa is not None and tarefa.estado == FALHOU:
+        st.caption(f"Não foi possível resumir o material: {tarefa.erro}")
+        if st.button("Tentar resumir de novo", key="tentar_resumo"):
+            iniciar_resumo(texto, chave, tentar_novamente=True)
+            st.rerun()
+    elif tarefa is not None and not tarefa.finalizada:
+        acompanhar_resumo(chave)
+
 # Barra lateral para upload de arquivo
 st.sidebar.title("Assistente de IA para Professores")
-uploaded_file = st.sidebar.file_uploader(
-    "Envie um arquivo para servir de contexto",
-    type=["docx", "txt", "pdf", "csv", "xlsx"]
+uploaded_files = st.sidebar.file_uploader(
+    "Envie arquivos para servir de contexto",
+    type=["docx", "txt", "pdf", "csv", "xlsx"],
+    accept_multiple_files=True
 )
-if uploaded_file:
-    contexto_texto = processar_arquivos(uploaded_file)
+if uploaded_files:
+    # Extração em paralelo; cada arquivo mostra seu resultado assim que termina
+    textos = [None] * len(uploaded_files)
+    with st.sidebar.status(f"Processando {len(uploaded_files)} arquivo(s)...") as status:
+        progresso = st.progress(0.0)
+        for concluidos, (posicao, nome, texto, erro) in enumerate(processar_varios_arquivos(uploaded_files), start=1):
+            progresso.progress(concluidos / len(uploaded_files), text=f"{concluidos}/{len(uploaded_files)} arquivos")
+            if erro is not None:
+                st.warning(f"{nome}: não foi possível processar ({erro})")
+            else:
+                textos[posicao] = (nome, texto)
+                st.write(f"✅ {nome}")
+        falhas = sum(texto is None for texto in textos)
+        status.update(
+            label=f"{len(uploaded_files) - falhas} de {len(uploaded_files)} arquivo(s) processado(s)",
+            state="error" if falhas == len(uploaded_files) else "complete",
+            expanded=falhas > 0
+        )
+    contexto_texto = mesclar_contextos([texto for texto in textos if texto is not None])
     if contexto_texto:
-        st.session_state["uploaded_file_content"] = contexto_texto
-        st.sidebar.success("Arquivo processado com sucesso!")
+        chave_contexto = guardar_contexto_da_sessao(contexto_texto)
+        st.sidebar.success("Arquivos processados com sucesso!" if len(uploaded_files) > 1 else "Arquivo processado com sucesso!")
+        indice = obter_indice(contexto_texto)
+        st.sidebar.caption(
+            f"~{contar_tokens(contexto_texto)} tokens; {len(indice.trechos)} trechos indexados em "
+            f"{indice.tempo_construcao * 1000:.0f} ms; cada geração usa apenas os mais relevantes."
+        )
+        # Documentos longos: o resumo começa já, para estar pronto quando o formulário for enviado
+        if iniciar_resumo(contexto_texto, chave_contexto):
+            with st.sidebar:
+                mostrar_resumo(chave_contexto, contexto_texto)
 
 # Inicializa estados gerais se ainda não existirem
 if "texto_gerado_plano" not in st.session_state:
@@ -79,8 +244,45 @@ tabs = st.tabs(["Plano de Aula", "Assunto Contextualizado", "Questões", "Corre
 ### Aba 1: Plano de Aula
 with tabs[0]:
     st.header("Plano de Aula")
-    # Se ainda não foi gerado conteúdo, exibe o formulário para gerar
-    if st.session_state.get("texto_gerado_plano") is None:
+    # Se ainda não foi gerado conteúdo, acompanha a geração em andamento ou exibe o formulário
+    if st.session_state.get("texto_gerado_plano") is None and executor.ultima(professor, "plano"):
+        acompanhar_tarefa(
+            "plano", "Gerando plano de aula... Você pode usar as outras abas enquanto isso.",
+            "Erro ao gerar plano de aula",
+            lambda plano_aula: st.session_state.update({
+                "texto_gerado_plano": plano_aula,
+                "texto_editado_plano": plano_aula,
+                "modo_edicao_plano": False
+            })
+        )
+    elif st.session_state.get("texto_gerado_plano") is None:
+        mostrar_erro_tarefa("plano")
+        # Livro didático da biblioteca da escola: fora do formulário para que
+        # os capítulos e módulos acompanhem o livro escolhido
+        livro = capitulo_livro = modulo_livro = None
+        livros = {livro["id"]: livro for livro in get_biblioteca().listar()}
+        if livros:
+            with st.expander("📚 Livro didático (opcional)"):
+                id_livro = st.selectbox(
+                    "Livro", [None, *livros], key="livro_plano",
+                    format_func=lambda id: "Nenhum" if id is None else f"{livros[id]['titulo']} ({livros[id]['componente'] or '-'}, {livros[id]['ano'] or '-'})"
+                )
+                livro = livros.get(id_livro)
+                if livro and livro["capitulos"]:
+                    capitulos = {c["numero"]: c for c in livro["capitulos"]}
+                    capitulo_livro = st.selectbox(
+                        "Capítulo", list(capitulos), key="capitulo_plano",
+                        format_func=lambda numero: rotulo(capitulos[numero], "capitulo")
+                    )
+                    modulos = {m["numero"]: m for m in capitulos[capitulo_livro]["modulos"]}
+                    if modulos:
+                        modulo_livro = st.selectbox(
+                            "Módulo", [None, *modulos], key="modulo_plano",
+                            format_func=lambda numero: "Capítulo inteiro" if numero is None else rotulo(modulos[numero], "modulo")
+                        )
+                    st.caption("O trecho escolhido do livro é usado como contexto no lugar do arquivo enviado.")
+                elif livro:
+                    st.caption("Nenhum capítulo foi identificado neste livro.")
         with st.form("plano_aula_form"):
             col1, col2 = st.columns(2)
             with col1:
@@ -118,30 +320,33 @@ with tabs[0]:
                 ", ".join(st.session_state["caracteristicas_selecionadas"]) +
                 (", " + caracteristicas_personalizadas if caracteristicas_personalizadas.strip() else "")
             )
+            forcar_novo = st.checkbox("Gerar nova variação (ignorar respostas salvas)", key="forcar_novo_plano")
             gerar = st.form_submit_button("Gerar Plano de Aula ✅")
         if gerar:
             if ano == "Selecione uma opção" or componente == "Selecione uma opção" or metodologia == "Selecione uma opção":
                 st.error("Por favor, preencha todos os campos obrigatórios!")
             else:
-                with st.spinner("Gerando plano de aula..."):
-                    try:
-                        plano_aula = gerar_plano_aula(
-                            ano=ano,
-                            componente=componente,
-                            capitulo=None,
-                            modulo=None,
-                            duracao=duracao,
-                            metodologia=metodologia,
-                            caracteristicas=caracteristicas,
-                            assunto=assunto,
-                            contexto=st.session_state.get("uploaded_file_content", None)
-                        )
-                        st.session_state["texto_gerado_plano"] = plano_aula
-                        st.session_state["texto_editado_plano"] = plano_aula
-                        st.session_state["modo_edicao_plano"] = False
-                        st.success("Plano de aula gerado com sucesso! ✅")
-                    except Exception as e:
-                        st.error(f"Erro ao gerar plano de aula: {e}")
+                capitulo = modulo = None
+                contexto = contexto_da_sessao()
+                if capitulo_livro is not None:
+                    # Só a fatia do capítulo/módulo é lida do livro (mmap), em milissegundos
+                    contexto, item = get_biblioteca().trecho(livro["id"], capitulo_livro, modulo_livro)
+                    capitulo = rotulo(capitulos[capitulo_livro], "capitulo")
+                    modulo = rotulo(item, "modulo") if modulo_livro is not None else None
+                parametros = dict(
+                    ano=ano,
+                    componente=componente,
+                    capitulo=capitulo,
+                    modulo=modulo,
+                    duracao=duracao,
+                    metodologia=metodologia,
+                    caracteristicas=caracteristicas,
+                    assunto=assunto,
+                    contexto=contexto,
+                )
+                if estimar_pedido("plano", estimar_plano_aula, **parametros):
+                    executor.enviar(professor, "plano", _tarefa_stream, gerar_plano_aula, **parametros, forcar_novo=forcar_novo)
+                    st.rerun()
     # Exibição ou edição do conteúdo gerado
     if st.session_state.get("texto_gerado_plano") is not None:
         if not st.session_state.get("modo_edicao_plano", False):
@@ -149,10 +354,9 @@ with tabs[0]:
             with col_editar:
                 st.button("✏️ Editar", key="editar_plano", on_click=lambda: st.session_state.update({"modo_edicao_plano": True}))
             with col_download:
-                buffer = gerar_docx(st.session_state["texto_gerado_plano"], "Plano de Aula")
                 st.download_button(
                     label="📥 Baixar Plano",
-                    data=buffer,
+                    data=docx_sob_demanda(st.session_state["texto_gerado_plano"], "Plano de Aula"),
                     file_name="plano_de_aula.docx",
                     mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
                     key="download_plano"
@@ -185,7 +389,18 @@ with tabs[0]:
 ### Aba 2: Assunto Contextualizado
 with tabs[1]:
     st.header("Assunto Contextualizado")
-    if st.session_state.get("conteudo_gerado_assunto") is None:
+    if st.session_state.get("conteudo_gerado_assunto") is None and executor.ultima(professor, "assunto"):
+        acompanhar_tarefa(
+            "assunto", "Gerando assunto contextualizado... Você pode usar as outras abas enquanto isso.",
+            "Erro ao gerar assunto contextualizado",
+            lambda conteudo: st.session_state.update({
+                "conteudo_gerado_assunto": conteudo,
+                "conteudo_editado_assunto": conteudo,
+                "modo_edicao_assunto": False
+            })
+        )
+    elif st.session_state.get("conteudo_gerado_assunto") is None:
+        mostrar_erro_tarefa("assunto")
         with st.form("contexto_form"):
             col1, col2 = st.columns(2)
             with col1:
@@ -194,31 +409,27 @@ with tabs[1]:
                 assunto = st.text_input("Assunto (opcional)", placeholder="Exemplo: Aceleração")
             with col2:
                 interesse = st.text_input("Tema de Interesse (opcional)", placeholder="Exemplo: Fórmula 1")
-            contexto = st.session_state.get("uploaded_file_content", None)
+            contexto = contexto_da_sessao()
+            forcar_novo = st.checkbox("Gerar nova variação (ignorar respostas salvas)", key="forcar_novo_assunto")
             gerar = st.form_submit_button("Gerar Assunto Contextualizado ✅")
         if gerar:
             if ano == "Selecione uma opção" or componente == "Selecione uma opção":
                 st.error("Por favor, preencha todos os campos obrigatórios!")
-            else:
-                with st.spinner("Gerando assunto contextualizado..."):
-                    try:
-                        conteudo = gerar_assunto_contextualizado(ano, componente, assunto, interesse, contexto)
-                        st.session_state["conteudo_gerado_assunto"] = conteudo
-                        st.session_state["conteudo_editado_assunto"] = conteudo
-                        st.session_state["modo_edicao_assunto"] = False
-                        st.success("Assunto contextualizado gerado com sucesso! ✅")
-                    except Exception as e:
-                        st.error(f"Erro ao gerar assunto contextualizado: {e}")
+            elif estimar_pedido("assunto", estimar_assunto_contextualizado, ano, componente, assunto, interesse, contexto):
+                executor.enviar(
+                    professor, "assunto", _tarefa_stream, gerar_assunto_contextualizado,
+                    ano, componente, assunto, interesse, contexto, forcar_novo=forcar_novo
+                )
+                st.rerun()
     if st.session_state.get("conteudo_gerado_assunto") is not None:
         if not st.session_state.get("modo_edicao_assunto", False):
             col1, col2, col3 = st.columns([1, 1, 1])
             with col1:
                 st.button("✏️ Editar Assunto", key="editar_assunto", on_click=lambda: st.session_state.update({"modo_edicao_assunto": True}))
             with col2:
-                buffer = gerar_docx(st.session_state["conteudo_gerado_assunto"], "Assunto Contextualizado")
                 st.download_button(
                     label="📥 Baixar Assunto",
-                    data=buffer,
+                    data=docx_sob_demanda(st.session_state["conteudo_gerado_assunto"], "Assunto Contextualizado"),
                     file_name="assunto_contextualizado.docx",
                     mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
                     key="download_assunto"
@@ -251,7 +462,18 @@ with tabs[1]:
 ### Aba 3: Questões
 with tabs[2]:
     st.header("Questões")
-    if st.session_state.get("questoes_geradas") is None:
+    if st.session_state.get("questoes_geradas") is None and executor.ultima(professor, "questoes"):
+        acompanhar_tarefa(
+            "questoes", "Gerando questões... Você pode usar as outras abas enquanto isso.",
+            "Erro ao gerar questões",
+            lambda questoes: st.session_state.update({
+                "questoes_geradas": questoes,
+                "questoes_editadas": questoes,
+                "modo_edicao_questoes": False
+            })
+        )
+    elif st.session_state.get("questoes_geradas") is None:
+        mostrar_erro_tarefa("questoes")
         with st.form("questoes_form"):
             col1, col2 = st.columns(2)
             with col1:
@@ -262,21 +484,27 @@ with tabs[2]:
             with col2:
                 dificuldade = st.selectbox("Dificuldade", ["Selecione uma opção", "Fácil", "Médio", "Difícil"])
                 tipo = st.selectbox("Tipo de Questões", ["Selecione uma opção", "Objetivas", "Dissertativas"])
-            contexto = st.session_state.get("uploaded_file_content", None)
+            contexto = contexto_da_sessao()
+            forcar_novo = st.checkbox("Gerar nova variação (ignorar respostas salvas)", key="forcar_novo_questoes")
             gerar = st.form_submit_button("Gerar Questões ✅")
         if gerar:
             if ano == "Selecione uma opção" or componente == "Selecione uma opção" or dificuldade == "Selecione uma opção" or tipo == "Selecione uma opção":
                 st.error("Por favor, preencha todos os campos obrigatórios!")
-            else:
-                with st.spinner("Gerando questões..."):
-                    try:
-                        questoes = gerar_questoes(ano, componente, assunto, dificuldade, numero_questoes, tipo, contexto)
-                        st.session_state["questoes_geradas"] = questoes
-                        st.session_state["questoes_editadas"] = questoes
-                        st.session_state["modo_edicao_questoes"] = False
-                        st.success("Questões geradas com sucesso!")
-                    except Exception as e:
-                        st.error(f"Erro ao gerar questões: {e}")
+            elif estimar_pedido(
+                "questoes", estimar_questoes, ano, componente, assunto, dificuldade, numero_questoes, tipo, contexto,
+                questoes_por_parte=QUESTOES_POR_PARTE if numero_questoes > QUESTOES_POR_PARTE else None,
+            ):
+                if numero_questoes > QUESTOES_POR_PARTE:
+                    executor.enviar(
+                        professor, "questoes", _tarefa_questoes_em_partes,
+                        ano, componente, assunto, dificuldade, numero_questoes, tipo, contexto, forcar_novo
+                    )
+                else:
+                    executor.enviar(
+                        professor, "questoes", _tarefa_stream, gerar_questoes,
+                        ano, componente, assunto, dificuldade, numero_questoes, tipo, contexto, forcar_novo=forcar_novo
+                    )
+                st.rerun()
     if st.session_state.get("questoes_geradas") is not None:
         if not st.session_state.get("modo_edicao_questoes", False):
             st.markdown("###")
@@ -284,10 +512,9 @@ with tabs[2]:
             with col_editar:
                 st.button("✏️ Editar Questões", key="editar_questoes", on_click=lambda: st.session_state.update({"modo_edicao_questoes": True}))
             with col_download:
-                buffer = gerar_docx(st.session_state["questoes_geradas"], "Questões")
                 st.download_button(
                     label="📥 Baixar Questões",
-                    data=buffer,
+                    data=docx_sob_demanda(st.session_state["questoes_geradas"], "Questões"),
                     file_name="questoes.docx",
                     mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
                     key="download_questoes"
@@ -320,4 +547,103 @@ with tabs[2]:
 ### Aba 4: Correção de Questões
 with tabs[3]:
     st.header("Correção de Questões")
-    st.info("🚧 Este módulo estará disponível em breve! Fique ligado.")
+    st.markdown(
+        "Envie a planilha de respostas da turma (uma linha por aluno, uma coluna por questão) e o gabarito "
+        "com as colunas **questao**, **resposta**, **tipo** (Objetiva/Dissertativa) e, opcionalmente, "
+        "**valor** e **enunciado**. As objetivas são corrigidas na hora; só as dissertativas vão para a IA."
+    )
+    if executor.ultima(professor, "correcao"):
+        acompanhar_tarefa(
+            "correcao", "Corrigindo dissertativas... Você pode usar as outras abas enquanto isso.",
+            "Erro ao corrigir a turma",
+            lambda resultado: st.session_state.update({"correcao_turma": resultado})
+        )
+    else:
+        mostrar_erro_tarefa("correcao")
+        with st.form("correcao_form"):
+            col1, col2 = st.columns(2)
+            with col1:
+                arquivo_respostas = st.file_uploader("Respostas da turma", type=["csv", "xlsx"], key="arquivo_respostas")
+            with col2:
+                arquivo_gabarito = st.file_uploader("Gabarito", type=["csv", "xlsx"], key="arquivo_gabarito")
+            corrigir = st.form_submit_button("Corrigir Turma ✅")
+        if corrigir:
+            if arquivo_respostas is None or arquivo_gabarito is None:
+                st.error("Por favor, envie a planilha de respostas e o gabarito!")
+            else:
+                from batch_grading import ler_tabela
+
+                try:
+                    # As planilhas são lidas aqui: os arquivos enviados pertencem à sessão
+                    tabelas = ler_tabela(arquivo_respostas), ler_tabela(arquivo_gabarito)
+                except Exception as e:
+                    st.error(f"Erro ao ler as planilhas: {e}")
+                else:
+                    executor.enviar(professor, "correcao", _tarefa_correcao, *tabelas, contexto_da_sessao())
+                    st.rerun()
+    if st.session_state.get("correcao_turma") is not None:
+        resultado = st.session_state["correcao_turma"]
+        st.success(f"Turma corrigida em {resultado['tempo']:.1f} s! ✅")
+        st.markdown("### Notas por Aluno e Questão")
+        st.dataframe(resultado["notas"], use_container_width=True)
+        st.download_button(
+            label="📥 Baixar Notas (CSV)",
+            data=resultado["notas"].to_csv().encode("utf-8"),
+            file_name="notas_turma.csv",
+            mime="text/csv",
+            key="download_notas"
+        )
+        st.markdown("### Desempenho por Questão")
+        st.dataframe(resultado["por_questao"], use_container_width=True)
+        if not resultado["comentarios"].empty:
+            with st.expander("Comentários das questões dissertativas"):
+                st.dataframe(resultado["comentarios"], use_container_width=True)
+
+### Painel de métricas (apenas administradores)
+# Fica no fim do script para já incluir as chamadas feitas neste rerun.
+if is_admin(token):
+    with st.sidebar.expander("📊 Métricas (admin)"):
+        metricas = get_metricas()
+        linhas = [
+            {
+                "Módulo": linha["modulo"],
+                "Métrica": linha["metrica"],
+                "N": linha["n"],
+                "p50 (ms)": round(linha["p50_s"] * 1000, 1),
+                "p95 (ms)": round(linha["p95_s"] * 1000, 1),
+            }
+            for linha in metricas.resumo()
+        ]
+        if linhas:
+            st.dataframe(linhas, hide_index=True, use_container_width=True)
+            contadores = metricas.contadores()
+            custo = sum(v for k, v in contadores.items() if k.startswith("custo_usd:"))
+            custo_estimado = sum(v for k, v in contadores.items() if k.startswith("custo_estimado_usd:"))
+            tokens = sum(v for k, v in contadores.items() if k.startswith(("tokens_entrada:", "tokens_saida:")))
+            em_cache = sum(v for k, v in contadores.items() if k.startswith("tokens_em_cache:"))
+            economizados = sum(v for k, v in contadores.items() if k.startswith("tokens_economizados:"))
+            coalescencia = estatisticas_coalescencia()
+            st.caption(f"Tarefas em segundo plano: {executor.estatisticas()}")
+            for modulo, valores in metricas.medidores().items():
+                st.caption(f"{modulo}: " + ", ".join(
+                    f"{nome}={valor:.2f}" if isinstance(valor, float) else f"{nome}={valor}"
+                    for nome, valor in valores.items()
+                ))
+            st.caption(
+                f"Pedidos idênticos simultâneos: {coalescencia['chamadas_economizadas']} chamadas "
+                f"economizadas (~{economizados:.0f} tokens), {coalescencia['em_andamento']} em andamento."
+            )
+            st.caption(
+                f"{tokens:.0f} tokens ({em_cache:.0f} de entrada em cache de prefixo), "
+                f"~US$ {custo:.4f} desde o início do processo "
+                f"(previsto antes das chamadas: ~US$ {custo_estimado:.4f})."
+            )
+            st.download_button(
+                label="Baixar métricas (Prometheus)",
+                data=metricas.exportar_prometheus,
+                file_name="metricas.prom",
+                mime="text/plain",
+                key="download_metricas"
+            )
+        else:
+            st.caption("Nenhuma chamada registrada ainda.")
@@ -1,110 +1,1024 @@
-import streamlit as st
-from openai import OpenAI
+import asyncio
+import hashlib
+import importlib
+import importlib.util
+import logging
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from utils import obter_config
+from concurrency import get_limite_concorrencia
+from rate_limiter import get_limitador_taxa
+from instrumentation import get_metricas
+from response_cache import calcular_chave as calcular_chave_resposta, get_cache_respostas
+from retrieval import selecionar_contexto
+from token_budget import (
+    TOKENS_POR_MENSAGEM, contar_tokens, estimar_custo_latencia, planejar,
+    tokens_saida_correcao, tokens_saida_plano, tokens_saida_questoes,
+)
+from question_sharding import ENFOQUES, dividir_em_partes
+from prompt_templates import MODELOS as MODELOS_PROMPT, SISTEMA, montar_mensagens
 
-def get_openai_client():
-    # Pega a chave da API armazenada no st.secrets
-    api_key = st.secrets["OPENAI_API_KEY"]
-    return OpenAI(api_key=api_key)
+logger = logging.getLogger(__name__)
 
-def gerar_questoes(ano, componente, assunto, dificuldade, numero_questoes, tipo, contexto=None):
-    """Função para gerar questões usando a OpenAI"""
-    tipo_texto = "dissertativas" if tipo == "Dissertativas" else "objetivas"
-    contexto_texto = f"Utilize o seguinte contexto: \n{contexto}\n\n" if contexto else ""
-
-    prompt = f"""
-    {contexto_texto}
-    Crie um conjunto de {numero_questoes} questões {tipo_texto} sobre o seguinte assunto:
-    - Ano/Série: {ano}
-    - Componente Curricular: {componente}
-    - Assunto: {assunto if assunto else "N/A"}
-    - Dificuldade: {dificuldade}
-
-    Certifique-se de que as questões sejam claras e adequadas ao nível de ensino informado.
+# Cliente único por processo: reaproveita o pool de conexões (e o handshake TLS)
+# entre chamadas, reruns e sessões do Streamlit.
+_client = None
+_client_lock = threading.Lock()
+
+# Clientes assíncronos, um por event loop (o pool do httpx fica preso ao loop em que foi criado)
+_async_clients = weakref.WeakKeyDictionary()
+_async_client_fixo = None
+
+def _pacote_http():
+    """Pacote HTTP (httpx ou httpx2) em que o SDK baseia seus clientes.
+
+    Limits e Timeout precisam ser do mesmo pacote do cliente, senão o
+    transporte não os reconhece.
     """
-    client = get_openai_client()
-    response = client.chat.completions.create(
-        model="gpt-3.5-turbo",
-        messages=[
-            {"role": "system", "content": "Você é um assistente especializado na criação de questões educacionais."},
-            {"role": "user", "content": prompt}
-        ]
+    from openai import DefaultHttpxClient
+
+    return importlib.import_module(DefaultHttpxClient.__bases__[0].__module__.split(".")[0])
+
+def _criar_http_client(assincrono=False):
+    """Cria o cliente HTTP com pool de conexões persistentes."""
+    from openai import DefaultAsyncHttpxClient, DefaultHttpxClient
+
+    http = _pacote_http()
+    tamanho_pool = int(obter_config("OPENAI_POOL_CONEXOES", 20))
+    http2 = str(obter_config("OPENAI_HTTP2", "false")).lower() in ("1", "true", "sim")
+    if http2 and importlib.util.find_spec("h2") is None:
+        # HTTP/2 requer o pacote h2 (pip install httpx[http2])
+        http2 = False
+    classe = DefaultAsyncHttpxClient if assincrono else DefaultHttpxClient
+    return classe(
+        http2=http2,
+        limits=http.Limits(
+            max_connections=tamanho_pool,
+            max_keepalive_connections=tamanho_pool,
+            keepalive_expiry=float(obter_config("OPENAI_KEEPALIVE_S", 60)),
+        ),
+        timeout=http.Timeout(
+            float(obter_config("OPENAI_TIMEOUT_S", 60)),
+            connect=float(obter_config("OPENAI_TIMEOUT_CONEXAO_S", 10)),
+        ),
     )
-    return response.choices[0].message.content
 
-def gerar_plano_aula(ano, componente, capitulo, modulo, duracao, metodologia, caracteristicas, assunto=None, contexto=None):
-    """Função para gerar plano de aula usando a OpenAI"""
-    contexto_texto = f"Utilize o seguinte contexto: \n{contexto}\n\n" if contexto else ""
-
-    prompt = f"""
-    {contexto_texto}
-    Crie um plano de aula com as seguintes características:
-    - Ano/Série: {ano}
-    - Componente Curricular: {componente}
-    - Capítulo do livro: {capitulo}
-    - Módulo do capítulo: {modulo}
-    - Assunto: {assunto}
-    - Duração: {duracao} minutos
-    - Metodologia: {metodologia}
-    - Características da Turma: {caracteristicas if caracteristicas else "N/A"}
+def get_openai_client():
+    """Retorna o cliente OpenAI compartilhado (thread-safe) do processo."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                # O SDK é importado só aqui: é a dependência mais lenta de carregar
+                from openai import OpenAI
+
+                # Pega a chave da API armazenada no st.secrets (ou na variável de ambiente)
+                api_key = obter_config("OPENAI_API_KEY")
+                _client = OpenAI(
+                    api_key=api_key,
+                    # Outro endpoint compatível (ex.: o servidor falso de fake_openai_server)
+                    base_url=obter_config("OPENAI_BASE_URL"),
+                    max_retries=int(obter_config("OPENAI_MAX_RETRIES", 0)),
+                    http_client=_criar_http_client(),
+                )
+    return _client
+
+def definir_openai_client(client, async_client=None):
+    """Substitui os clientes compartilhados (ex.: backend falso na CLI e em testes de carga)."""
+    global _client, _async_client_fixo
+    with _client_lock:
+        _client = client
+        _async_client_fixo = async_client
+
+def get_async_openai_client():
+    """Retorna o cliente AsyncOpenAI do event loop atual (criado uma vez por loop)."""
+    if _async_client_fixo is not None:
+        return _async_client_fixo
+    loop = asyncio.get_running_loop()
+    with _client_lock:
+        client = _async_clients.get(loop)
+        if client is None:
+            from openai import AsyncOpenAI
+
+            client = AsyncOpenAI(
+                api_key=obter_config("OPENAI_API_KEY"),
+                base_url=obter_config("OPENAI_BASE_URL"),
+                max_retries=int(obter_config("OPENAI_MAX_RETRIES", 0)),
+                http_client=_criar_http_client(assincrono=True),
+            )
+            _async_clients[loop] = client
+    return client
+
+MODELO = "gpt-3.5-turbo"
+
+# Funções que consultam o cache persistente de respostas (opt-in por função)
+CACHE_RESPOSTAS = {
+    "gerar_questoes": True,
+    "gerar_plano_aula": True,
+    "gerar_assunto_contextualizado": True,
+    "corrigir_questoes": False,
+    "avaliar_dissertativas": False,
+    "resumir_trecho": True,
+    "combinar_resumos": True,
+}
+
+# Listas maiores que isso podem ser geradas em partes concorrentes
+QUESTOES_POR_PARTE = 5
+
+# Tokens de saída reservados quando a função não tem uma estimativa própria
+TOKENS_SAIDA_PADRAO = 1200
+
+# Acrescentado às respostas interrompidas pelo max_tokens (finish_reason "length"),
+# que também não vão para o cache. As operações internas, cujo texto é lido por
+# código (JSON, resumos usados como contexto), não recebem o aviso.
+AVISO_RESPOSTA_CORTADA = (
+    "\n\n⚠️ *A resposta foi interrompida por atingir o limite de tamanho. "
+    "Gere novamente com menos itens ou com um material menor.*"
+)
+OPERACOES_SEM_AVISO = {"avaliar_dissertativas", "resumir_trecho", "combinar_resumos"}
+
+# O cache de prefixo da API guarda um prefixo por alguns minutos; um prefixo
+# (sistema + material) enviado há menos que isso provavelmente será reaproveitado
+PREFIXO_JANELA_S = 600
+MAX_PREFIXOS = 512
+_prefixos_recentes = OrderedDict()
+_prefixos_lock = threading.Lock()
+
+def _registrar_prefixo(messages):
+    """True se o mesmo prefixo (todas as mensagens menos a última) foi enviado há menos de PREFIXO_JANELA_S."""
+    prefixo = hashlib.sha256(
+        "\x00".join(m["content"] for m in messages[:-1]).encode("utf-8")
+    ).hexdigest()
+    agora = time.monotonic()
+    with _prefixos_lock:
+        anterior = _prefixos_recentes.pop(prefixo, None)
+        _prefixos_recentes[prefixo] = agora
+        while len(_prefixos_recentes) > MAX_PREFIXOS:
+            _prefixos_recentes.popitem(last=False)
+    return anterior is not None and agora - anterior < PREFIXO_JANELA_S
+
+def _preparar(prompt, usar_cache=False, forcar_novo=False,
+              contexto=None, tokens_saida=TOKENS_SAIDA_PADRAO, seed=None):
+    """Monta o pedido e consulta o cache; retorna (pedido, resposta em cache ou None).
+
+    `prompt` são as instruções do pedido (última mensagem); o `contexto` vai
+    numa mensagem própria antes delas (veja prompt_templates) e é
+    compactado/cortado para caber na janela do modelo com `tokens_saida`
+    reservados para a resposta. `seed` é repassado à API para variar
+    respostas de pedidos parecidos.
     """
-    client = get_openai_client()
-    response = client.chat.completions.create(
-        model="gpt-3.5-turbo",
-        messages=[
-            {"role": "system", "content": "Você é um assistente especializado em geração de planejamento educacional para os professores."},
-            {"role": "user", "content": prompt}
-        ]
+    plano = planejar(MODELO, SISTEMA, prompt, contexto or "", tokens_saida)
+    logger.info(
+        "Pedido: %d tokens de entrada (contexto %d%s), %d reservados p/ saída, ~US$ %.4f, ~%.1f s",
+        plano["tokens_entrada"], plano["tokens_contexto"],
+        ", cortado" if plano["contexto_cortado"] else "",
+        plano["tokens_saida"], plano["custo_estimado"], plano["latencia_estimada"],
     )
-    return response.choices[0].message.content
+    parametros = {"max_tokens": plano["tokens_saida"]}
+    if seed is not None:
+        parametros["seed"] = seed
+    messages = montar_mensagens(prompt, plano["contexto"])
+    pedido = {
+        "messages": messages,
+        "parametros": parametros,
+        "cache": None,
+        # Identifica pedidos equivalentes (prompt normalizado + parâmetros): cache e coalescência
+        "chave": calcular_chave_resposta(MODELO, messages, parametros),
+        "tokens_entrada": plano["tokens_entrada"],
+        "tokens_estimados": plano["tokens_entrada"] + plano["tokens_saida"],
+        "tokens_prefixo": plano["tokens_entrada"] - contar_tokens(prompt) - TOKENS_POR_MENSAGEM,
+        "prefixo_reutilizado": False,
+        "custo_estimado": plano["custo_estimado"],
+        "latencia_estimada": plano["latencia_estimada"],
+    }
+    if usar_cache:
+        pedido["cache"] = get_cache_respostas()
+        if not forcar_novo:
+            resposta = pedido["cache"].obter(pedido["chave"])
+            if resposta is not None:
+                return pedido, resposta
+    pedido["prefixo_reutilizado"] = _registrar_prefixo(messages)
+    return pedido, None
 
-def gerar_assunto_contextualizado(ano, componente, assunto, interesse, contexto=None):
-    """Função para gerar um assunto contextualizado usando a OpenAI"""
-    contexto_texto = f"Utilize o seguinte contexto: \n{contexto}\n\n" if contexto else ""
-
-    prompt = f"""
-    {contexto_texto}
-    Crie um conteúdo contextualizado com as seguintes informações:
-    - Ano/Série: {ano}
-    - Componente Curricular: {componente}
-    - Assunto: {assunto if assunto else "N/A"}
-    - Tema de Interesse: {interesse if interesse else "N/A"}
+def _aviso_se_cortada(finish_reason, operacao, evento):
+    """Marca o evento se a resposta foi cortada pelo max_tokens; retorna o aviso para o usuário (ou "")."""
+    if finish_reason != "length":
+        return ""
+    evento["cortada"] = True
+    logger.warning("Resposta de %s interrompida pelo limite de %s tokens de saída", operacao, evento.get("max_tokens"))
+    return "" if operacao in OPERACOES_SEM_AVISO else AVISO_RESPOSTA_CORTADA
+
+def _guardar(pedido, texto):
+    if pedido["cache"] is not None and texto:
+        pedido["cache"].guardar(pedido["chave"], texto)
+
+def _ajustar_cota(limitador, pedido, uso):
+    """Devolve à cota de tokens a diferença entre a estimativa e o uso informado pela API."""
+    if uso is not None and getattr(uso, "total_tokens", None) is not None:
+        limitador.ajustar_tokens(pedido["tokens_estimados"], uso.total_tokens)
+
+def _registrar_chamada(operacao, evento, texto=None, uso=None, erro=None):
+    """Registra nas métricas a chamada ao modelo: tempos, tokens, tokens em cache e custo estimado.
+
+    `uso` é o `usage` informado pela API (no stream, vem no último chunk).
     """
-    client = get_openai_client()
-    response = client.chat.completions.create(
-        model="gpt-3.5-turbo",
-        messages=[
-            {"role": "system", "content": "Você é um assistente especializado em gerar contextualização educacional."},
-            {"role": "user", "content": prompt}
-        ]
-    )
-    return response.choices[0].message.content
+    evento["total_s"] = time.perf_counter() - evento.pop("inicio")
+    if erro is not None:
+        evento["erro"] = type(erro).__name__
+    if uso is not None:
+        evento["tokens_entrada"] = uso.prompt_tokens
+        evento["tokens_saida"] = uso.completion_tokens
+        detalhes = getattr(uso, "prompt_tokens_details", None)
+        evento["tokens_em_cache"] = getattr(detalhes, "cached_tokens", None) or 0
+    elif texto is not None:
+        evento["tokens_saida"] = contar_tokens(texto)
+    if evento.get("coalescida"):
+        # Nada foi gasto: os tokens contam como economizados, não como consumidos
+        evento["tokens_economizados"] = evento.pop("tokens_entrada", 0) + evento.pop("tokens_saida", 0)
+    elif not evento.get("cache"):
+        evento["custo_usd"], _ = estimar_custo_latencia(
+            MODELO, evento.get("tokens_entrada", 0), evento.get("tokens_saida", 0)
+        )
+    get_metricas().registrar(operacao, evento)
 
-def corrigir_questoes(respostas_aluno, gabarito, tipo, contexto=None):
-    """Função para corrigir questões usando a OpenAI"""
-    tipo_texto = "dissertativas" if tipo == "Dissertativas" else "objetivas"
-    contexto_texto = f"Utilize o seguinte contexto: \n{contexto}\n\n" if contexto else ""
+class _Chamada:
+    """Etapas de uma chamada ao modelo comuns aos caminhos síncrono e assíncrono.
+
+    Preparação (pedido, cache), leitura da resposta ou dos chunks, liberação
+    da vaga, ajuste da cota, aviso de resposta cortada, métricas e gravação
+    no cache ficam aqui; os dois caminhos só duplicam o transporte (a
+    chamada à API e a iteração do stream).
+    """
+
+    def __init__(self, stream, operacao):
+        self.stream = stream
+        self.operacao = operacao
+        self.evento = {"inicio": time.perf_counter(), "stream": stream, "cache": False, "fila_s": 0.0, "tentativas": 0}
+        self.pedido = None
+        self.partes = []
+        self.uso = None
+        self.fim = None
+        self.aviso = ""
+
+    def preparar(self, prompt, usar_cache, forcar_novo, contexto, tokens_saida, seed):
+        """Monta o pedido (veja _preparar); retorna a resposta em cache (já registrada) ou None."""
+        self.pedido, resposta = _preparar(prompt, usar_cache, forcar_novo, contexto, tokens_saida, seed)
+        self.evento["tokens_entrada"] = self.pedido["tokens_entrada"]
+        if resposta is not None:
+            self.evento.update(cache=True, tokens_saida=contar_tokens(resposta))
+            _registrar_chamada(self.operacao, self.evento)
+        return resposta
+
+    def iniciar(self):
+        """Marca no evento os dados do pedido que de fato vai à API (com a previsão, para comparar com o real)."""
+        self.evento["prefixo_reutilizado"] = self.pedido["prefixo_reutilizado"]
+        self.evento["tokens_prefixo"] = self.pedido["tokens_prefixo"]
+        self.evento["max_tokens"] = self.pedido["parametros"]["max_tokens"]
+        self.evento["custo_estimado_usd"] = self.pedido["custo_estimado"]
+        self.evento["latencia_estimada_s"] = self.pedido["latencia_estimada"]
+
+    def argumentos(self):
+        """Argumentos de chat.completions.create."""
+        return {
+            "model": MODELO,
+            "messages": self.pedido["messages"],
+            "stream": self.stream,
+            **_opcoes_stream(self.stream),
+            **self.pedido["parametros"],
+        }
+
+    def falhou(self, erro):
+        """Libera a vaga da tentativa que falhou; retorna a espera até a próxima, ou None (erro registrado)."""
+        get_limite_concorrencia().liberar()
+        tentativa = self.evento["tentativas"]
+        espera = get_limitador_taxa().espera_retentativa(erro, tentativa) if isinstance(erro, Exception) else None
+        if espera is None:
+            _registrar_chamada(self.operacao, self.evento, erro=erro)
+        else:
+            logger.warning("%s na tentativa %d; nova tentativa em %.1f s", type(erro).__name__, tentativa, espera)
+        return espera
+
+    def receber(self, chunk):
+        """Lê um chunk do stream; retorna o trecho de texto dele (ou None)."""
+        # Com include_usage, o último chunk traz só o usage (sem choices)
+        self.uso = getattr(chunk, "usage", None) or self.uso
+        if not chunk.choices:
+            return None
+        self.fim = chunk.choices[0].finish_reason or self.fim
+        trecho = chunk.choices[0].delta.content
+        if trecho:
+            if not self.partes:
+                self.evento["ttft_s"] = time.perf_counter() - self.evento["inicio"]
+            self.partes.append(trecho)
+        return trecho
+
+    def receber_resposta(self, response):
+        """Lê a resposta completa (sem stream) e encerra a chamada; retorna o texto para o usuário."""
+        self.evento["ttft_s"] = time.perf_counter() - self.evento["inicio"]
+        self.uso = getattr(response, "usage", None)
+        self.fim = response.choices[0].finish_reason
+        self.partes.append(response.choices[0].message.content or "")
+        self.encerrar()
+        return self.texto + self.aviso
+
+    def encerrar(self, erro=None):
+        """Libera a vaga, devolve à cota o que não foi usado e registra a chamada nas métricas."""
+        get_limite_concorrencia().liberar()
+        # O usage vem no fim da resposta; sem ele (stream abandonado) a reserva fica como estava
+        _ajustar_cota(get_limitador_taxa(), self.pedido, self.uso)
+        if erro is None:
+            self.aviso = _aviso_se_cortada(self.fim, self.operacao, self.evento)
+        _registrar_chamada(self.operacao, self.evento, self.texto, self.uso, erro)
+
+    @property
+    def texto(self):
+        return "".join(self.partes)
+
+    def guardar(self):
+        """Grava o texto no cache de respostas, a menos que tenha sido cortado pelo max_tokens."""
+        if not self.evento.get("cortada"):
+            _guardar(self.pedido, self.texto)
+
+# Coalescência (single-flight): pedidos idênticos feitos enquanto a mesma chamada
+# ainda está em andamento esperam por ela em vez de abrir outra. Complementa o cache
+# de respostas, que só ajuda depois que a primeira chamada termina. Vale entre os
+# caminhos síncrono e assíncrono: leitores assíncronos são acordados no próprio loop.
+
+class _Voo:
+    """Uma chamada em andamento e o texto recebido até agora, compartilhados por pedidos idênticos."""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._partes = []
+        self._fim = False
+        self.erro = None
+        self.assinantes = 0
+        self.seguidores = 0
+        # (loop, asyncio.Event) de cada leitor assíncrono
+        self._esperas = []
+        # Chamado quando o último leitor desiste antes do fim (interrompe a chamada)
+        self.ao_abandonar = None
+
+    def _acordar(self):
+        """Acorda os leitores (chamado com o lock)."""
+        self._cond.notify_all()
+        for loop, sinal in self._esperas:
+            try:
+                loop.call_soon_threadsafe(sinal.set)
+            except RuntimeError:
+                # Loop já encerrado: o leitor não existe mais
+                pass
+
+    def publicar(self, trecho):
+        with self._cond:
+            self._partes.append(trecho)
+            self._acordar()
+
+    def concluir(self, erro=None):
+        with self._cond:
+            if self._fim:
+                return
+            self.erro = erro
+            self._fim = True
+            self._acordar()
+
+    def texto(self):
+        """Espera o fim da chamada e retorna o texto completo (ou levanta o erro dela).
+
+        Quem espera conta como assinante, para que o stream não seja
+        abandonado enquanto ainda há pedidos precisando do resultado.
+        """
+        with self._cond:
+            self.assinantes += 1
+            try:
+                self._cond.wait_for(lambda: self._fim)
+            finally:
+                self.assinantes -= 1
+        if self.erro is not None:
+            raise self.erro
+        return "".join(self._partes)
+
+    def trechos(self):
+        """Gerador com todos os trechos, desde o primeiro, à medida que chegam."""
+        with self._cond:
+            self.assinantes += 1
+        return self._acompanhar()
+
+    def _acompanhar(self):
+        lidos = 0
+        try:
+            while True:
+                with self._cond:
+                    self._cond.wait_for(lambda: self._fim or len(self._partes) > lidos)
+                    novos = self._partes[lidos:]
+                    fim, erro = self._fim, self.erro
+                for trecho in novos:
+                    yield trecho
+                lidos += len(novos)
+                if fim:
+                    if erro is not None:
+                        raise erro
+                    return
+        finally:
+            self._sair()
+
+    def _sair(self):
+        with self._cond:
+            self.assinantes -= 1
+            ao_abandonar = self.ao_abandonar if self.assinantes == 0 and not self._fim else None
+        if ao_abandonar is not None:
+            ao_abandonar()
+
+    async def texto_async(self):
+        """Versão assíncrona de texto() (não bloqueia o event loop)."""
+        return "".join([trecho async for trecho in self.trechos_async()])
+
+    def trechos_async(self):
+        """Versão assíncrona de trechos()."""
+        with self._cond:
+            self.assinantes += 1
+        return self._acompanhar_async()
+
+    async def _acompanhar_async(self):
+        espera = (asyncio.get_running_loop(), asyncio.Event())
+        sinal = espera[1]
+        lidos = 0
+        try:
+            with self._cond:
+                self._esperas.append(espera)
+            while True:
+                with self._cond:
+                    # Limpo com o lock: um publicar() depois disto volta a acendê-lo
+                    sinal.clear()
+                    novos = self._partes[lidos:]
+                    fim, erro = self._fim, self.erro
+                if not novos and not fim:
+                    await sinal.wait()
+                    continue
+                for trecho in novos:
+                    yield trecho
+                lidos += len(novos)
+                if fim:
+                    if erro is not None:
+                        raise erro
+                    return
+        finally:
+            with self._cond:
+                if espera in self._esperas:
+                    self._esperas.remove(espera)
+            self._sair()
+
+    @property
+    def abandonado(self):
+        """True se ninguém mais está lendo o stream."""
+        with self._cond:
+            return self.assinantes == 0
+
+_voos = {}
+_voos_lock = threading.Lock()
+_chamadas_economizadas = 0
+
+def _entrar_no_voo(chave):
+    """Retorna (voo, True) para o primeiro pedido com a chave, ou (voo em andamento, False)."""
+    global _chamadas_economizadas
+    with _voos_lock:
+        voo = _voos.get(chave)
+        if voo is not None:
+            voo.seguidores += 1
+            _chamadas_economizadas += 1
+            return voo, False
+        voo = _voos[chave] = _Voo()
+        return voo, True
+
+def _encerrar_voo(chave, voo, erro=None):
+    # Sai da tabela antes de concluir: pedidos que chegarem depois abrem outra chamada
+    # (ou encontram a resposta no cache)
+    with _voos_lock:
+        if _voos.get(chave) is voo:
+            del _voos[chave]
+    if erro is not None and not isinstance(erro, Exception):
+        # O cancelamento é do líder, não dos seguidores: eles recebem um erro comum
+        erro = RuntimeError(f"geração interrompida: a chamada compartilhada foi cancelada ({type(erro).__name__})")
+    voo.concluir(erro)
+
+def estatisticas_coalescencia():
+    """Chamadas compartilhadas em andamento e chamadas à API economizadas desde o início do processo."""
+    with _voos_lock:
+        return {"em_andamento": len(_voos), "chamadas_economizadas": _chamadas_economizadas}
+
+def _seguir_voo(voo, stream, operacao, evento):
+    """Atende um pedido com o resultado da chamada idêntica já em andamento."""
+    evento.update(coalescida=True, chamadas_economizadas=1)
+    if stream:
+        return _trechos_seguidos(voo.trechos(), operacao, evento)
+    try:
+        texto = voo.texto()
+    except Exception as e:
+        _registrar_chamada(operacao, evento, erro=e)
+        raise
+    evento["ttft_s"] = time.perf_counter() - evento["inicio"]
+    _registrar_chamada(operacao, evento, texto)
+    return texto
+
+def _trechos_seguidos(trechos, operacao, evento):
+    partes = []
+    erro = None
+    try:
+        for trecho in trechos:
+            if not partes:
+                evento["ttft_s"] = time.perf_counter() - evento["inicio"]
+            partes.append(trecho)
+            yield trecho
+    except BaseException as e:
+        erro = e
+        raise
+    finally:
+        trechos.close()
+        _registrar_chamada(operacao, evento, "".join(partes), erro=erro)
+
+async def _seguir_voo_async(voo, stream, operacao, evento):
+    """Versão assíncrona de _seguir_voo."""
+    evento.update(coalescida=True, chamadas_economizadas=1)
+    if stream:
+        return _trechos_seguidos_async(voo.trechos_async(), operacao, evento)
+    try:
+        texto = await voo.texto_async()
+    except Exception as e:
+        _registrar_chamada(operacao, evento, erro=e)
+        raise
+    evento["ttft_s"] = time.perf_counter() - evento["inicio"]
+    _registrar_chamada(operacao, evento, texto)
+    return texto
+
+async def _trechos_seguidos_async(trechos, operacao, evento):
+    partes = []
+    erro = None
+    try:
+        async for trecho in trechos:
+            if not partes:
+                evento["ttft_s"] = time.perf_counter() - evento["inicio"]
+            partes.append(trecho)
+            yield trecho
+    except BaseException as e:
+        erro = e
+        raise
+    finally:
+        await trechos.aclose()
+        _registrar_chamada(operacao, evento, "".join(partes), erro=erro)
+
+def _bombear(chave, voo, trechos):
+    """Consome o stream da API e distribui os trechos a todos os pedidos do voo.
+
+    Roda numa thread própria, para que o stream não dependa de um leitor
+    específico; para (e libera a vaga) se todos os leitores desistirem.
+    """
+    erro = None
+    try:
+        for trecho in trechos:
+            voo.publicar(trecho)
+            if voo.abandonado:
+                erro = RuntimeError("geração interrompida: nenhum pedido aguardando o resultado")
+                break
+    except Exception as e:
+        erro = e
+    finally:
+        trechos.close()
+        _encerrar_voo(chave, voo, erro)
+
+# Tarefas de _bombear_async em andamento (o loop só guarda referências fracas)
+_bombas_async = set()
 
-    prompt = f"""
-    {contexto_texto}
-    Corrija as seguintes questões {tipo_texto} respondidas por um aluno. Baseie-se no gabarito fornecido e forneça uma análise detalhada de cada resposta:
+async def _bombear_async(chave, voo, trechos):
+    """Versão assíncrona de _bombear: roda como tarefa no event loop do líder."""
+    erro = None
+    try:
+        async for trecho in trechos:
+            voo.publicar(trecho)
+            if voo.abandonado:
+                erro = RuntimeError("geração interrompida: nenhum pedido aguardando o resultado")
+                break
+    except BaseException as e:
+        erro = e
+        if not isinstance(e, Exception):
+            raise
+    finally:
+        await trechos.aclose()
+        _encerrar_voo(chave, voo, erro)
 
-    Respostas do Aluno:
-    {respostas_aluno}
+def _iniciar_bomba_async(chave, voo, trechos):
+    """Põe _bombear_async para rodar no loop atual, interrompendo-o assim que ninguém mais ler."""
+    loop = asyncio.get_running_loop()
+    bomba = asyncio.ensure_future(_bombear_async(chave, voo, trechos))
+    _bombas_async.add(bomba)
 
-    Gabarito:
-    {gabarito}
+    def terminou(tarefa):
+        _bombas_async.discard(tarefa)
+        # Cancelada antes de começar, a bomba não passa pelo próprio finally
+        _encerrar_voo(chave, voo, RuntimeError("geração interrompida: nenhum pedido aguardando o resultado"))
 
-    Para cada questão, avalie:
-    1. Se a resposta está correta ou não.
-    2. Para questões incorretas, explique o erro e forneça a resposta correta.
-    3. Para questões dissertativas, avalie a qualidade da resposta e sugira melhorias.
+    def interromper():
+        try:
+            loop.call_soon_threadsafe(bomba.cancel)
+        except RuntimeError:
+            # Loop já encerrado (e a bomba, cancelada com ele)
+            pass
+
+    bomba.add_done_callback(terminou)
+    voo.ao_abandonar = interromper
+
+def _opcoes_stream(stream):
+    """Pede o usage no fim do stream (tokens e tokens em cache, como nas respostas completas)."""
+    return {"stream_options": {"include_usage": True}} if stream else {}
+
+def _completar(prompt, stream=False, usar_cache=False, forcar_novo=False,
+               contexto=None, tokens_saida=TOKENS_SAIDA_PADRAO, seed=None, operacao="completar"):
+    """Envia o prompt ao modelo.
+
+    Com stream=False retorna o texto completo; com stream=True retorna um
+    gerador que produz os trechos de texto à medida que chegam da API.
+    Com usar_cache=True a resposta é lida/gravada no cache de respostas;
+    forcar_novo=True ignora a leitura (para pedir uma nova variação), mas
+    ainda grava o resultado. Veja _preparar para `contexto`, `tokens_saida`
+    e `seed`.
+
+    Antes de cada tentativa o pedido espera sua vez na cota de RPM/TPM do
+    processo (rate_limiter); 429 e falhas transitórias são repetidos com
+    backoff exponencial, respeitando o retry-after da API.
+
+    Cada chamada é registrada nas métricas (instrumentation) sob `operacao`:
+    espera na fila (fila_s), tempo até o primeiro trecho (ttft_s), tempo
+    total (total_s), tokens, custo estimado e reaproveitamento do prefixo
+    (prefixo_reutilizado, tokens_prefixo e tokens_em_cache, informado pela API).
+
+    Pedidos idênticos (mesma chave) feitos enquanto a chamada está em
+    andamento recebem o mesmo resultado, ou o mesmo stream, sem outra
+    chamada à API (registrados com coalescida=True e tokens_economizados).
+    forcar_novo=True não entra nessa partilha.
+    """
+    chamada = _Chamada(stream, operacao)
+    resposta = chamada.preparar(prompt, usar_cache, forcar_novo, contexto, tokens_saida, seed)
+    if resposta is not None:
+        return iter([resposta]) if stream else resposta
+
+    voo = None
+    if not forcar_novo:
+        voo, lider = _entrar_no_voo(chamada.pedido["chave"])
+        if not lider:
+            return _seguir_voo(voo, stream, operacao, chamada.evento)
+
+    chamada.iniciar()
+    if stream:
+        # A chamada só é feita (e a vaga só é ocupada) quando o stream começa a ser lido
+        trechos = _trechos_do_stream(chamada)
+        if voo is None:
+            return trechos
+        # O stream é lido por uma thread e repassado a este pedido e aos idênticos que chegarem
+        leitura = voo.trechos()
+        threading.Thread(target=_bombear, args=(chamada.pedido["chave"], voo, trechos), name="stream-compartilhado", daemon=True).start()
+        return leitura
+    try:
+        texto = chamada.receber_resposta(_abrir_chamada(chamada))
+        chamada.guardar()
+        if voo is not None:
+            voo.publicar(texto)
+            _encerrar_voo(chamada.pedido["chave"], voo)
+        return texto
+    except BaseException as e:
+        if voo is not None:
+            _encerrar_voo(chamada.pedido["chave"], voo, e)
+        raise
+
+def _abrir_chamada(chamada):
+    """Ocupa uma vaga do limite de concorrência e faz a chamada, com novas tentativas.
+
+    Retorna a resposta com a vaga ocupada (liberada em chamada.encerrar). Se a
+    chamada falhar ou for interrompida, a vaga é liberada e o erro registrado.
+    """
+    limite = get_limite_concorrencia()
+    limitador = get_limitador_taxa()
+    while True:
+        chamada.evento["tentativas"] += 1
+        inicio_fila = time.perf_counter()
+        limitador.aguardar(chamada.pedido["tokens_estimados"])
+        limite.adquirir()
+        chamada.evento["fila_s"] += time.perf_counter() - inicio_fila
+        try:
+            return get_openai_client().chat.completions.create(**chamada.argumentos())
+        except BaseException as e:
+            espera = chamada.falhou(e)
+            if espera is None:
+                raise
+            time.sleep(espera)
+
+def _trechos_do_stream(chamada):
+    """Faz a chamada em stream e converte os chunks da API em trechos de texto.
+
+    A vaga do limitador é ocupada na primeira leitura e liberada quando o
+    stream termina ou é abandonado (um gerador descartado antes de ser lido
+    não ocupa vaga). O texto completo vai para o cache no fim do stream.
+    """
+    response = _abrir_chamada(chamada)
+    erro = None
+    try:
+        for chunk in response:
+            trecho = chamada.receber(chunk)
+            if trecho:
+                yield trecho
+    except BaseException as e:
+        erro = e
+        raise
+    finally:
+        # Fecha a conexão se o stream foi abandonado antes do fim
+        close = getattr(response, "close", None)
+        if close is not None:
+            close()
+        chamada.encerrar(erro)
+    if chamada.aviso:
+        yield chamada.aviso
+    chamada.guardar()
+
+async def _completar_async(prompt, stream=False, usar_cache=False, forcar_novo=False,
+                           contexto=None, tokens_saida=TOKENS_SAIDA_PADRAO, seed=None, operacao="completar"):
+    """Versão assíncrona de _completar (com stream=True retorna um gerador assíncrono).
+
+    Partilha as chamadas em andamento com os pedidos idênticos dos dois caminhos.
     """
-    client = get_openai_client()
-    response = client.chat.completions.create(
-        model="gpt-3.5-turbo",
-        messages=[
-            {"role": "system", "content": "Você é um assistente especializado em correção de questões educacionais."},
-            {"role": "user", "content": prompt}
-        ]
+    chamada = _Chamada(stream, operacao)
+    resposta = await asyncio.to_thread(
+        chamada.preparar, prompt, usar_cache, forcar_novo, contexto, tokens_saida, seed
     )
-    return response.choices[0].message.content
+    if resposta is not None:
+        return _um_trecho_async(resposta) if stream else resposta
+
+    voo = None
+    if not forcar_novo:
+        voo, lider = _entrar_no_voo(chamada.pedido["chave"])
+        if not lider:
+            return await _seguir_voo_async(voo, stream, operacao, chamada.evento)
+
+    chamada.iniciar()
+    if stream:
+        trechos = _trechos_do_stream_async(chamada)
+        if voo is None:
+            return trechos
+        leitura = voo.trechos_async()
+        _iniciar_bomba_async(chamada.pedido["chave"], voo, trechos)
+        return leitura
+    try:
+        texto = chamada.receber_resposta(await _abrir_chamada_async(chamada))
+        await asyncio.to_thread(chamada.guardar)
+        if voo is not None:
+            voo.publicar(texto)
+            _encerrar_voo(chamada.pedido["chave"], voo)
+        return texto
+    except BaseException as e:
+        if voo is not None:
+            _encerrar_voo(chamada.pedido["chave"], voo, e)
+        raise
+
+async def _abrir_chamada_async(chamada):
+    """Versão assíncrona de _abrir_chamada (a vaga é liberada também se a tarefa for cancelada)."""
+    limite = get_limite_concorrencia()
+    limitador = get_limitador_taxa()
+    while True:
+        chamada.evento["tentativas"] += 1
+        inicio_fila = time.perf_counter()
+        await limitador.aguardar_async(chamada.pedido["tokens_estimados"])
+        await limite.adquirir_async()
+        chamada.evento["fila_s"] += time.perf_counter() - inicio_fila
+        try:
+            return await get_async_openai_client().chat.completions.create(**chamada.argumentos())
+        except BaseException as e:
+            espera = chamada.falhou(e)
+            if espera is None:
+                raise
+            await asyncio.sleep(espera)
+
+async def _um_trecho_async(texto):
+    yield texto
+
+async def _trechos_do_stream_async(chamada):
+    response = await _abrir_chamada_async(chamada)
+    erro = None
+    try:
+        async for chunk in response:
+            trecho = chamada.receber(chunk)
+            if trecho:
+                yield trecho
+    except BaseException as e:
+        erro = e
+        raise
+    finally:
+        close = getattr(response, "close", None)
+        if close is not None:
+            fechamento = close()
+            if asyncio.iscoroutine(fechamento):
+                await fechamento
+        chamada.encerrar(erro)
+    if chamada.aviso:
+        yield chamada.aviso
+    await asyncio.to_thread(chamada.guardar)
+
+def _contexto_relevante(contexto, consulta):
+    """Mantém do contexto apenas os trechos relevantes para a consulta do pedido."""
+    if not contexto:
+        return contexto
+    contexto, relatorio = selecionar_contexto(contexto, consulta)
+    logger.info(
+        "Contexto: %d/%d trechos, ~%d de ~%d tokens (índice %.1f ms, consulta %.1f ms)",
+        relatorio["trechos_usados"], relatorio["trechos_total"],
+        relatorio["tokens_contexto"], relatorio["tokens_original"],
+        relatorio["tempo_construcao_ms"], relatorio["tempo_consulta_ms"],
+    )
+    return contexto
+
+# Montagem dos pedidos: cada função retorna os argumentos de _completar/_completar_async,
+# compartilhados pelas versões síncronas e assíncronas. Os textos ficam no registro de
+# prompt_templates; aqui só se calculam os valores dos campos.
+
+def _pedido(operacao, contexto=None, tokens_saida=TOKENS_SAIDA_PADRAO, seed=None, **valores):
+    modelo = MODELOS_PROMPT[operacao]
+    pedido = {
+        "operacao": operacao,
+        "prompt": modelo.instrucoes(valores),
+        "usar_cache": CACHE_RESPOSTAS[operacao],
+        "contexto": contexto if modelo.consulta is None else _contexto_relevante(contexto, modelo.texto_consulta(valores)),
+        "tokens_saida": tokens_saida,
+    }
+    if seed is not None:
+        pedido["seed"] = seed
+    return pedido
+
+def _tipo_texto(tipo):
+    return "dissertativas" if tipo == "Dissertativas" else "objetivas"
+
+def _pedido_questoes(ano, componente, assunto, dificuldade, numero_questoes, tipo, contexto=None,
+                     parte=None, enfoque=None):
+    return _pedido(
+        "gerar_questoes", contexto, tokens_saida_questoes(numero_questoes, tipo), seed=parte,
+        numero_questoes=numero_questoes, tipo_texto=_tipo_texto(tipo), ano=ano,
+        componente=componente, assunto=assunto, dificuldade=dificuldade, enfoque=enfoque,
+    )
+
+def _pedido_plano_aula(ano, componente, capitulo, modulo, duracao, metodologia, caracteristicas, assunto=None, contexto=None):
+    return _pedido(
+        "gerar_plano_aula", contexto, tokens_saida_plano(duracao),
+        ano=ano, componente=componente, capitulo=capitulo, modulo=modulo, assunto=assunto,
+        duracao=duracao, metodologia=metodologia, caracteristicas=caracteristicas,
+    )
+
+def _pedido_assunto_contextualizado(ano, componente, assunto, interesse, contexto=None):
+    return _pedido(
+        "gerar_assunto_contextualizado", contexto,
+        ano=ano, componente=componente, assunto=assunto, interesse=interesse,
+    )
+
+def _pedido_correcao(respostas_aluno, gabarito, tipo, contexto=None):
+    return _pedido(
+        "corrigir_questoes", contexto, tokens_saida_correcao(respostas_aluno, gabarito),
+        tipo_texto=_tipo_texto(tipo), respostas_aluno=respostas_aluno, gabarito=gabarito,
+    )
+
+def _pedido_avaliacao_dissertativas(questoes, contexto=None):
+    """`questoes`: lista de dicts com questao, enunciado, resposta_esperada, valor e resposta_aluno."""
+    itens = "\n\n".join(
+        f"Questão {q['questao']} (vale {q['valor']})\n"
+        f"Enunciado: {q.get('enunciado') or 'N/A'}\n"
+        f"Resposta esperada: {q['resposta_esperada']}\n"
+        f"Resposta do aluno: {q['resposta_aluno'] or '(em branco)'}"
+        for q in questoes
+    )
+    return _pedido(
+        "avaliar_dissertativas", contexto, 120 * len(questoes) + 50,
+        itens=itens, respostas_esperadas=" ".join(q["resposta_esperada"] for q in questoes),
+    )
+
+def _pedido_resumo_trecho(trecho, parte, total, tokens_saida):
+    return _pedido("resumir_trecho", trecho, tokens_saida, parte=f"{parte} de {total}")
+
+def _pedido_combinacao_resumos(resumos, tokens_saida):
+    return _pedido(
+        "combinar_resumos", None, tokens_saida,
+        resumos="\n\n".join(f"[Parte {numero}]\n{resumo}" for numero, resumo in enumerate(resumos, start=1)),
+    )
+
+# Previsões de custo e tempo, feitas antes de enviar (para mostrar ao professor). Não
+# consideram o cache de respostas: um pedido já respondido sai de graça e na hora.
+
+def _estimar(*pedidos):
+    """Tokens, custo somado e latência do mais lento dos pedidos (feitos em paralelo).
+
+    Levanta PedidoGrandeDemais (token_budget) se algum deles não cabe no modelo.
+    """
+    planos = [planejar(MODELO, SISTEMA, p["prompt"], p["contexto"] or "", p["tokens_saida"]) for p in pedidos]
+    return {
+        "tokens_entrada": sum(plano["tokens_entrada"] for plano in planos),
+        "tokens_saida": sum(plano["tokens_saida"] for plano in planos),
+        "contexto_cortado": any(plano["contexto_cortado"] for plano in planos),
+        "custo_estimado": sum(plano["custo_estimado"] for plano in planos),
+        "latencia_estimada": max(plano["latencia_estimada"] for plano in planos),
+    }
+
+def estimar_questoes(ano, componente, assunto, dificuldade, numero_questoes, tipo, contexto=None, questoes_por_parte=None):
+    """Previsão de gerar_questoes (ou de gerar_questoes_em_partes, se `questoes_por_parte` for informado)."""
+    if questoes_por_parte is None:
+        return _estimar(_pedido_questoes(ano, componente, assunto, dificuldade, numero_questoes, tipo, contexto))
+    return _estimar(*(
+        _pedido_questoes(ano, componente, assunto, dificuldade, quantidade, tipo, contexto,
+                         parte=numero, enfoque=ENFOQUES[(numero - 1) % len(ENFOQUES)])
+        for numero, quantidade in enumerate(dividir_em_partes(numero_questoes, questoes_por_parte), start=1)
+    ))
+
+def estimar_plano_aula(ano, componente, capitulo, modulo, duracao, metodologia, caracteristicas, assunto=None, contexto=None):
+    """Previsão de gerar_plano_aula."""
+    return _estimar(_pedido_plano_aula(ano, componente, capitulo, modulo, duracao, metodologia, caracteristicas, assunto, contexto))
+
+def estimar_assunto_contextualizado(ano, componente, assunto, interesse, contexto=None):
+    """Previsão de gerar_assunto_contextualizado."""
+    return _estimar(_pedido_assunto_contextualizado(ano, componente, assunto, interesse, contexto))
+
+def gerar_questoes(ano, componente, assunto, dificuldade, numero_questoes, tipo, contexto=None, stream=False, forcar_novo=False):
+    """Função para gerar questões usando a OpenAI"""
+    pedido = _pedido_questoes(ano, componente, assunto, dificuldade, numero_questoes, tipo, contexto)
+    return _completar(**pedido, stream=stream, forcar_novo=forcar_novo)
+
+def gerar_questoes_em_partes(ano, componente, assunto, dificuldade, numero_questoes, tipo, contexto=None,
+                             questoes_por_parte=QUESTOES_POR_PARTE, forcar_novo=False):
+    """Gera as questões em partes concorrentes (ex.: 20 = 4 partes de 5).
+
+    Cada parte recebe um enfoque e um seed diferentes. É um gerador que produz
+    (número da parte, texto, erro) na ordem em que as partes terminam; uma parte
+    que falha vem com texto None e o erro, sem derrubar as demais. Junte os
+    textos com question_sharding.mesclar_questoes.
+    """
+    def gerar_parte(numero, quantidade):
+        pedido = _pedido_questoes(ano, componente, assunto, dificuldade, quantidade, tipo, contexto,
+                                  parte=numero, enfoque=ENFOQUES[(numero - 1) % len(ENFOQUES)])
+        return _completar(**pedido, forcar_novo=forcar_novo)
+
+    partes = dividir_em_partes(numero_questoes, questoes_por_parte)
+    with ThreadPoolExecutor(max_workers=len(partes)) as executor:
+        futuros = {
+            executor.submit(gerar_parte, numero, quantidade): numero
+            for numero, quantidade in enumerate(partes, start=1)
+        }
+        for futuro in as_completed(futuros):
+            try:
+                yield futuros[futuro], futuro.result(), None
+            except Exception as e:
+                logger.warning("Parte %d das questões falhou: %s", futuros[futuro], e)
+                yield futuros[futuro], None, e
+
+def gerar_plano_aula(ano, componente, capitulo, modulo, duracao, metodologia, caracteristicas, assunto=None, contexto=None, stream=False, forcar_novo=False):
+    """Função para gerar plano de aula usando a OpenAI"""
+    pedido = _pedido_plano_aula(ano, componente, capitulo, modulo, duracao, metodologia, caracteristicas, assunto, contexto)
+    return _completar(**pedido, stream=stream, forcar_novo=forcar_novo)
+
+def gerar_assunto_contextualizado(ano, componente, assunto, interesse, contexto=None, stream=False, forcar_novo=False):
+    """Função para gerar um assunto contextualizado usando a OpenAI"""
+    pedido = _pedido_assunto_contextualizado(ano, componente, assunto, interesse, contexto)
+    return _completar(**pedido, stream=stream, forcar_novo=forcar_novo)
+
+def corrigir_questoes(respostas_aluno, gabarito, tipo, contexto=None, stream=False, forcar_novo=False):
+    """Função para corrigir questões usando a OpenAI"""
+    pedido = _pedido_correcao(respostas_aluno, gabarito, tipo, contexto)
+    return _completar(**pedido, stream=stream, forcar_novo=forcar_novo)
+
+def resumir_trecho(trecho, parte, total, tokens_saida=TOKENS_SAIDA_PADRAO):
+    """Resume uma parte de um documento longo (etapa map de document_summary)"""
+    return _completar(**_pedido_resumo_trecho(trecho, parte, total, tokens_saida))
+
+def combinar_resumos(resumos, tokens_saida=TOKENS_SAIDA_PADRAO):
+    """Combina os resumos das partes, na ordem, num único resumo (etapa reduce de document_summary)"""
+    return _completar(**_pedido_combinacao_resumos(resumos, tokens_saida))
+
+# Versões assíncronas: mesmos parâmetros; podem ser combinadas com asyncio.gather.
+# O número de chamadas simultâneas no processo é limitado por OPENAI_MAX_CONCORRENCIA.
+
+async def gerar_questoes_async(ano, componente, assunto, dificuldade, numero_questoes, tipo, contexto=None, stream=False, forcar_novo=False):
+    """Versão assíncrona de gerar_questoes"""
+    pedido = await asyncio.to_thread(_pedido_questoes, ano, componente, assunto, dificuldade, numero_questoes, tipo, contexto)
+    return await _completar_async(**pedido, stream=stream, forcar_novo=forcar_novo)
+
+async def gerar_plano_aula_async(ano, componente, capitulo, modulo, duracao, metodologia, caracteristicas, assunto=None, contexto=None, stream=False, forcar_novo=False):
+    """Versão assíncrona de gerar_plano_aula"""
+    pedido = await asyncio.to_thread(_pedido_plano_aula, ano, componente, capitulo, modulo, duracao, metodologia, caracteristicas, assunto, contexto)
+    return await _completar_async(**pedido, stream=stream, forcar_novo=forcar_novo)
+
+async def gerar_assunto_contextualizado_async(ano, componente, assunto, interesse, contexto=None, stream=False, forcar_novo=False):
+    """Versão assíncrona de gerar_assunto_contextualizado"""
+    pedido = await asyncio.to_thread(_pedido_assunto_contextualizado, ano, componente, assunto, interesse, contexto)
+    return await _completar_async(**pedido, stream=stream, forcar_novo=forcar_novo)
+
+async def corrigir_questoes_async(respostas_aluno, gabarito, tipo, contexto=None, stream=False, forcar_novo=False):
+    """Versão assíncrona de corrigir_questoes"""
+    pedido = await asyncio.to_thread(_pedido_correcao, respostas_aluno, gabarito, tipo, contexto)
+    return await _completar_async(**pedido, stream=stream, forcar_novo=forcar_novo)
+
+async def avaliar_dissertativas_async(questoes, contexto=None):
+    """Avalia as respostas dissertativas de um aluno; retorna o texto JSON com nota e comentário por questão."""
+    pedido = await asyncio.to_thread(_pedido_avaliacao_dissertativas, questoes, contexto)
+    return await _completar_async(**pedido)
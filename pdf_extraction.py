@@ -0,0 +1,149 @@
+import logging
+import multiprocessing
+import os
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from io import BytesIO
+
+from PyPDF2 import PdfReader
+
+logger = logging.getLogger(__name__)
+
+# Abaixo deste número de páginas o custo de distribuir o trabalho não compensa
+MIN_PAGINAS_PARALELO = 16
+
+# Pool compartilhado pelo processo; os workers são criados com "spawn" para não
+# herdar as threads do servidor do Streamlit.
+_pool = None
+_processos = 1
+_pool_lock = threading.Lock()
+
+# Cache de leitores dentro de cada worker: caminho do arquivo -> PdfReader
+_leitores = {}
+
+
+def processos_configurados():
+    """Tamanho do pool de processos (PDF_PROCESSOS, padrão: número de CPUs)."""
+    # Importado aqui para que os workers não carreguem o Streamlit ao importar este módulo
+    from utils import obter_config
+    return int(obter_config("PDF_PROCESSOS", os.cpu_count() or 1))
+
+
+def _obter_pool():
+    global _pool, _processos
+    with _pool_lock:
+        if _pool is None:
+            _processos = processos_configurados()
+            _pool = ProcessPoolExecutor(
+                max_workers=_processos,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def _descartar_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def obter_pool_processos():
+    """Pool de processos do app (PDF_PROCESSOS workers); file_processing o usa para os demais formatos."""
+    return _obter_pool()
+
+
+def descartar_pool_processos():
+    """Descarta o pool (ex.: depois de um BrokenProcessPool); o próximo uso cria outro."""
+    _descartar_pool()
+
+
+def _extrair_paginas(reader, inicio, fim):
+    """Extrai as páginas [inicio, fim) de um leitor; páginas com erro viram texto vazio."""
+    textos = []
+    falhas = []
+    for numero in range(inicio, fim):
+        try:
+            textos.append(reader.pages[numero].extract_text() or "")
+        except Exception:
+            textos.append("")
+            falhas.append(numero)
+    return textos, falhas
+
+
+def _extrair_faixa(caminho, inicio, fim):
+    """Executada no worker: abre (uma vez por worker) o PDF e extrai a faixa de páginas."""
+    reader = _leitores.get(caminho)
+    if reader is None:
+        _leitores.clear()
+        reader = PdfReader(caminho)
+        _leitores[caminho] = reader
+    return _extrair_paginas(reader, inicio, fim)
+
+
+def _dividir_faixas(inicio, fim, partes):
+    tamanho = max(1, -(-(fim - inicio) // partes))
+    return [(i, min(i + tamanho, fim)) for i in range(inicio, fim, tamanho)]
+
+
+def extrair_texto_pdf(dados, paginas=None, paralelo=True):
+    """Extrai o texto de um PDF, dividindo as páginas entre vários processos.
+
+    `paginas` é uma faixa opcional (primeira, última), numerada a partir de 1 e
+    inclusiva, ex.: (40, 80). A ordem das páginas é preservada; páginas que
+    falham na extração entram como texto vazio e são registradas no log.
+    """
+    return "\n".join(extrair_paginas_pdf(dados, paginas, paralelo))
+
+
+def extrair_paginas_pdf(dados, paginas=None, paralelo=True):
+    """Como extrair_texto_pdf, mas retorna a lista com o texto de cada página."""
+    reader = PdfReader(BytesIO(dados))
+    total = len(reader.pages)
+    inicio, fim = 0, total
+    if paginas is not None:
+        inicio = max(0, paginas[0] - 1)
+        fim = min(total, paginas[1])
+
+    # Com um processo só, o pool apenas somaria o custo de subir o worker e de reabrir o PDF
+    if not paralelo or fim - inicio < MIN_PAGINAS_PARALELO or processos_configurados() <= 1:
+        textos, falhas = _extrair_paginas(reader, inicio, fim)
+    else:
+        textos, falhas = _extrair_paralelo(reader, dados, inicio, fim)
+
+    if falhas:
+        logger.warning("Falha ao extrair %d página(s) do PDF: %s", len(falhas), [n + 1 for n in falhas])
+    return textos
+
+
+def _extrair_paralelo(reader, dados, inicio, fim):
+    # Os workers leem o PDF de um arquivo temporário em vez de receber os bytes em cada tarefa
+    with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as arquivo:
+        arquivo.write(dados)
+        caminho = arquivo.name
+    try:
+        pool = _obter_pool()
+        faixas = _dividir_faixas(inicio, fim, _processos * 2)
+        futuros = [pool.submit(_extrair_faixa, caminho, a, b) for a, b in faixas]
+        textos = []
+        falhas = []
+        for (a, b), futuro in zip(faixas, futuros):
+            try:
+                parte, falhas_parte = futuro.result()
+            except Exception as e:
+                # Worker caiu ou o pool quebrou: extrai esta faixa aqui mesmo
+                logger.warning("Extração paralela falhou nas páginas %d-%d (%s); extraindo em série", a + 1, b, e)
+                if isinstance(e, BrokenProcessPool):
+                    _descartar_pool()
+                parte, falhas_parte = _extrair_paginas(reader, a, b)
+            textos.extend(parte)
+            falhas.extend(falhas_parte)
+        return textos, falhas
+    finally:
+        try:
+            os.remove(caminho)
+        except OSError:
+            pass
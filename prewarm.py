@@ -0,0 +1,56 @@
+"""Pré-aquecimento em segundo plano quando o app sobe.
+
+Os formatos de arquivo e o SDK da OpenAI são importados só no primeiro uso,
+para a primeira página aparecer logo. O pré-aquecimento adianta esse custo
+numa thread: importa as bibliotecas dos formatos, carrega o tokenizador e
+abre a conexão com a API, de modo que o primeiro upload e a primeira geração
+também não paguem a partida a frio. Desligue com PREAQUECER=false.
+"""
+import logging
+import threading
+import time
+
+from instrumentation import medir
+from utils import obter_config
+
+logger = logging.getLogger(__name__)
+
+_iniciado = False
+_lock = threading.Lock()
+
+
+def _preaquecer():
+    from file_processing import precarregar_manipuladores
+    from openai_functions import get_openai_client
+    from token_budget import contar_tokens
+
+    with medir("preaquecimento") as evento:
+        inicio = time.perf_counter()
+        precarregar_manipuladores()
+        evento["manipuladores_s"] = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        contar_tokens("pré-aquecimento")
+        evento["tokenizador_s"] = time.perf_counter() - inicio
+
+        if not obter_config("OPENAI_API_KEY"):
+            return
+        inicio = time.perf_counter()
+        try:
+            # Chamada gratuita que deixa uma conexão TLS aberta no pool do cliente
+            get_openai_client().with_options(timeout=10).models.list()
+            evento["conexao_s"] = time.perf_counter() - inicio
+        except Exception as e:
+            logger.warning("Pré-aquecimento da conexão com a API falhou: %s", e)
+
+
+def iniciar_preaquecimento():
+    """Dispara o pré-aquecimento uma vez por processo (chamadas seguintes não fazem nada)."""
+    global _iniciado
+    if str(obter_config("PREAQUECER", "true")).lower() not in ("1", "true", "sim"):
+        return
+    with _lock:
+        if _iniciado:
+            return
+        _iniciado = True
+    threading.Thread(target=_preaquecer, name="preaquecimento", daemon=True).start()
@@ -0,0 +1,189 @@
+"""Registro declarativo dos prompts das funções de geração.
+
+Cada pedido é montado do trecho mais estável para o mais variável:
+
+1. mensagem de sistema, a mesma para todos os modelos (SISTEMA);
+2. material de referência enviado pelo professor, em mensagem própria;
+3. papel, tarefa e orientações do modelo (fixos por modelo);
+4. campos do pedido (ano, assunto, dificuldade...).
+
+Assim, quando o professor gera o plano, depois as questões e depois o assunto
+contextualizado a partir do mesmo material, as mensagens 1 e 2 se repetem e o
+cache de prefixo do provedor pode aproveitá-las.
+"""
+
+SISTEMA = (
+    "Você é um assistente de IA para professores da educação básica brasileira. "
+    "Siga a tarefa descrita na última mensagem e, quando houver material de "
+    "referência enviado pelo professor, baseie-se nele."
+)
+
+CABECALHO_CONTEXTO = "Material de referência enviado pelo professor:\n\n"
+
+# Campos usados para escolher os trechos do material: os mesmos nas três funções de
+# geração, para que a mesma aula (ano, componente, assunto) produza o mesmo contexto
+CONSULTA_PADRAO = ("ano", "componente", "assunto")
+
+
+class ModeloPrompt:
+    """Um tipo de pedido: texto fixo (papel, tarefa, orientações) e a lista de campos variáveis.
+
+    `campos` é uma lista de (rótulo, nome) ou (rótulo, nome, opcional). Campos
+    vazios aparecem como "N/A", exceto os opcionais, que são omitidos.
+    `consulta` são os campos usados para selecionar os trechos do material;
+    None envia o material inteiro.
+    """
+
+    def __init__(self, operacao, papel, tarefa, campos, orientacoes="", consulta=CONSULTA_PADRAO):
+        self.operacao = operacao
+        self.papel = papel
+        self.tarefa = tarefa
+        self.campos = campos
+        self.orientacoes = orientacoes
+        self.consulta = consulta
+
+    def instrucoes(self, valores):
+        """Texto da última mensagem: partes fixas primeiro, campos do pedido no fim."""
+        linhas = []
+        for campo in self.campos:
+            rotulo, nome = campo[0], campo[1]
+            opcional = len(campo) > 2 and campo[2]
+            valor = valores.get(nome)
+            if valor in (None, ""):
+                if opcional:
+                    continue
+                valor = "N/A"
+            valor = str(valor)
+            linhas.append(f"{rotulo}:\n{valor}" if "\n" in valor else f"- {rotulo}: {valor}")
+        partes = [self.papel, self.tarefa]
+        if self.orientacoes:
+            partes.append(self.orientacoes)
+        partes.append("\n".join(linhas))
+        return "\n\n".join(partes)
+
+    def texto_consulta(self, valores):
+        """Consulta usada para selecionar os trechos relevantes do material."""
+        return " ".join(str(valores[nome]) for nome in self.consulta if valores.get(nome))
+
+
+MODELOS = {}
+
+
+def registrar(modelo):
+    MODELOS[modelo.operacao] = modelo
+    return modelo
+
+
+def montar_mensagens(instrucoes, contexto=None):
+    """Mensagens do chat no layout estável: sistema, material (se houver), instruções."""
+    mensagens = [{"role": "system", "content": SISTEMA}]
+    if contexto:
+        mensagens.append({"role": "user", "content": CABECALHO_CONTEXTO + contexto})
+    mensagens.append({"role": "user", "content": instrucoes})
+    return mensagens
+
+
+registrar(ModeloPrompt(
+    "gerar_questoes",
+    papel="Você é um assistente especializado na criação de questões educacionais.",
+    tarefa="Crie um conjunto de questões com as seguintes características:",
+    orientacoes="Certifique-se de que as questões sejam claras e adequadas ao nível de ensino informado.",
+    campos=[
+        ("Quantidade de questões", "numero_questoes"),
+        ("Tipo", "tipo_texto"),
+        ("Ano/Série", "ano"),
+        ("Componente Curricular", "componente"),
+        ("Assunto", "assunto"),
+        ("Dificuldade", "dificuldade"),
+        ("Enfoque desta parte da lista", "enfoque", True),
+    ],
+))
+
+registrar(ModeloPrompt(
+    "gerar_plano_aula",
+    papel="Você é um assistente especializado em geração de planejamento educacional para os professores.",
+    tarefa="Crie um plano de aula com as seguintes características:",
+    campos=[
+        ("Ano/Série", "ano"),
+        ("Componente Curricular", "componente"),
+        ("Capítulo do livro", "capitulo"),
+        ("Módulo do capítulo", "modulo"),
+        ("Assunto", "assunto"),
+        ("Duração (minutos)", "duracao"),
+        ("Metodologia", "metodologia"),
+        ("Características da Turma", "caracteristicas"),
+    ],
+))
+
+registrar(ModeloPrompt(
+    "gerar_assunto_contextualizado",
+    papel="Você é um assistente especializado em gerar contextualização educacional.",
+    tarefa="Crie um conteúdo contextualizado com as seguintes informações:",
+    campos=[
+        ("Ano/Série", "ano"),
+        ("Componente Curricular", "componente"),
+        ("Assunto", "assunto"),
+        ("Tema de Interesse", "interesse"),
+    ],
+))
+
+registrar(ModeloPrompt(
+    "corrigir_questoes",
+    papel="Você é um assistente especializado em correção de questões educacionais.",
+    tarefa=(
+        "Corrija as questões respondidas por um aluno. Baseie-se no gabarito fornecido "
+        "e forneça uma análise detalhada de cada resposta."
+    ),
+    orientacoes=(
+        "Para cada questão, avalie:\n"
+        "1. Se a resposta está correta ou não.\n"
+        "2. Para questões incorretas, explique o erro e forneça a resposta correta.\n"
+        "3. Para questões dissertativas, avalie a qualidade da resposta e sugira melhorias."
+    ),
+    campos=[
+        ("Tipo das questões", "tipo_texto"),
+        ("Respostas do Aluno", "respostas_aluno"),
+        ("Gabarito", "gabarito"),
+    ],
+    consulta=("gabarito",),
+))
+
+registrar(ModeloPrompt(
+    "avaliar_dissertativas",
+    papel="Você é um assistente especializado em correção de questões educacionais.",
+    tarefa="Avalie as respostas dissertativas de um aluno comparando-as com a resposta esperada.",
+    orientacoes=(
+        "Responda apenas com um objeto JSON no formato\n"
+        '{"<questão>": {"nota": <número entre 0 e o valor da questão>, "comentario": "<feedback curto>"}}'
+    ),
+    campos=[("Questões", "itens")],
+    consulta=("respostas_esperadas",),
+))
+
+registrar(ModeloPrompt(
+    "resumir_trecho",
+    papel="Você é um assistente especializado em preparar material didático.",
+    tarefa=(
+        "Resuma o material de referência acima, que é uma parte de um documento maior. "
+        "O resumo será usado como contexto para gerar planos de aula, questões e conteúdos."
+    ),
+    orientacoes=(
+        "Preserve conceitos, definições, fórmulas, datas, nomes e exemplos importantes, "
+        "e mantenha os títulos de capítulos e seções que aparecerem. Não acrescente "
+        "informações que não estejam no material."
+    ),
+    campos=[("Parte", "parte")],
+    consulta=None,
+))
+
+registrar(ModeloPrompt(
+    "combinar_resumos",
+    papel="Você é um assistente especializado em preparar material didático.",
+    tarefa="Combine os resumos das partes de um documento, na ordem, num único resumo coeso.",
+    orientacoes=(
+        "Elimine repetições entre as partes, mas preserve conceitos, definições, fórmulas, "
+        "datas, exemplos e a estrutura de capítulos e seções."
+    ),
+    campos=[("Resumos das partes", "resumos")],
+    consulta=None,
+))
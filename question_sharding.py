@@ -0,0 +1,124 @@
+import re
+import unicodedata
+
+# Enfoques distribuídos entre as partes para que cada uma explore um ângulo diferente do assunto
+ENFOQUES = [
+    "conceitos fundamentais e definições",
+    "aplicações práticas e situações do cotidiano",
+    "interpretação de textos, gráficos ou tabelas",
+    "resolução de problemas em várias etapas",
+    "relações com outros conteúdos e análise crítica",
+]
+
+# Linha que inicia uma questão: "1.", "2)", "**3.**", "Questão 4:", "### 5 -"
+_INICIO_QUESTAO = re.compile(
+    r"^(?P<prefixo>[ \t>#*]*(?:Quest[aã]o\s*)?)(?P<numero>\d{1,3})(?P<sufixo>\s*[.):\-–])",
+    re.IGNORECASE | re.MULTILINE,
+)
+
+# Início do gabarito: "Gabarito", "**Respostas:**", "### Gabarito comentado", "Gabarito: 1-a, 2-c".
+# Só conta como seção se a linha não tiver mais nada ou já trouxer itens numerados,
+# para não confundir com o "Gabarito: b" de uma questão isolada.
+_INICIO_GABARITO = re.compile(
+    r"^[ \t>#*_]*(?:gabarito|respostas|resolu[cç](?:[aã]o|[oõ]es))(?:\s+comentad[oa]s?)?[ \t*_]*:?[ \t*_]*"
+    r"(?P<resto>[^\n]*)$",
+    re.IGNORECASE | re.MULTILINE,
+)
+_ITEM_NA_LINHA = re.compile(r"\d{1,3}\s*[.):\-–]")
+# Números (inteiros, decimais e frações) entram na comparação: "1/2 + 1/4" e "1/3 + 1/6" diferem
+_TERMO = re.compile(r"\d+(?:[.,/]\d+)*|[^\W\d_]{3,}")
+
+
+def dividir_em_partes(numero_questoes, por_parte):
+    """Divide o total de questões em partes de no máximo `por_parte` (ex.: 20 -> [5, 5, 5, 5])."""
+    numero_questoes = int(numero_questoes)
+    partes = [por_parte] * (numero_questoes // por_parte)
+    if numero_questoes % por_parte:
+        partes.append(numero_questoes % por_parte)
+    return partes
+
+
+def separar_questoes(texto):
+    """Separa um texto de questões numeradas em blocos (um por questão).
+
+    Textos sem numeração reconhecível retornam como um único bloco.
+    """
+    inicios = [m.start() for m in _INICIO_QUESTAO.finditer(texto)]
+    if not inicios:
+        return [texto.strip()] if texto.strip() else []
+    return [texto[a:b].strip() for a, b in zip(inicios, inicios[1:] + [len(texto)])]
+
+
+def separar_gabarito(texto):
+    """Separa o texto em (questões, cabeçalho do gabarito, itens do gabarito).
+
+    Sem gabarito reconhecível, retorna (texto, None, []). Itens de um gabarito
+    numa linha só ("Gabarito: 1-a, 2-c") são separados um por item.
+    """
+    for m in _INICIO_GABARITO.finditer(texto):
+        resto = m.group("resto").strip()
+        if resto and not _ITEM_NA_LINHA.match(resto):
+            continue
+        cabecalho = m.group(0)[:len(m.group(0)) - len(m.group("resto"))].strip()
+        corpo = texto[m.end():]
+        if resto:
+            corpo = re.sub(r"[,;]\s*(?=\d{1,3}\s*[.):\-–])", "\n", resto) + corpo
+        return texto[:m.start()], cabecalho, separar_questoes(corpo)
+    return texto, None, []
+
+
+def _numero(bloco):
+    m = _INICIO_QUESTAO.match(bloco)
+    return int(m.group("numero")) if m else None
+
+
+def _renumerar(bloco, numero):
+    return _INICIO_QUESTAO.sub(lambda m: f"{m.group('prefixo')}{numero}{m.group('sufixo')}", bloco, count=1)
+
+
+def _termos(texto):
+    texto = unicodedata.normalize("NFKD", texto.lower())
+    texto = "".join(c for c in texto if not unicodedata.combining(c))
+    texto = _INICIO_QUESTAO.sub("", texto, count=1)
+    return set(_TERMO.findall(texto))
+
+
+def _similaridade(a, b):
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def mesclar_questoes(textos, limite_similaridade=0.8):
+    """Junta as questões das partes, remove quase-duplicatas e renumera de 1 em diante.
+
+    Os gabaritos das partes são reunidos num só, no fim, com a nova numeração
+    (sem os itens das questões removidas).
+    """
+    questoes = []
+    gabarito = []
+    cabecalho_gabarito = None
+    vistos = []
+    for texto in textos:
+        texto, cabecalho, itens = separar_gabarito(texto)
+        cabecalho_gabarito = cabecalho_gabarito or cabecalho
+        novos, descartados = {}, set()
+        for bloco in separar_questoes(texto):
+            termos = _termos(bloco)
+            if any(_similaridade(termos, outro) >= limite_similaridade for outro in vistos):
+                descartados.add(_numero(bloco))
+                continue
+            vistos.append(termos)
+            questoes.append(_renumerar(bloco, len(questoes) + 1))
+            novos[_numero(bloco)] = len(questoes)
+        for item in itens:
+            numero = _numero(item)
+            if numero in novos:
+                gabarito.append(_renumerar(item, novos[numero]))
+            elif numero not in descartados:
+                gabarito.append(item)
+
+    resultado = "\n\n".join(questoes)
+    if gabarito:
+        resultado += f"\n\n{cabecalho_gabarito}\n" + "\n".join(gabarito)
+    return resultado
@@ -0,0 +1,209 @@
+import asyncio
+import random
+import threading
+import time
+from collections import deque
+
+from instrumentation import get_metricas
+from utils import obter_config
+
+
+def _erros_retentaveis():
+    """Erros em que vale a pena tentar de novo (o SDK só é importado quando há erro)."""
+    import openai
+
+    return (
+        openai.RateLimitError,
+        openai.APITimeoutError,
+        openai.APIConnectionError,
+        openai.InternalServerError,
+    )
+
+
+class BaldeTokens:
+    """Token bucket: `capacidade` unidades, repostas continuamente a `taxa` por segundo."""
+
+    def __init__(self, capacidade):
+        self.capacidade = float(capacidade)
+        self.taxa = self.capacidade / 60.0
+        self.disponivel = self.capacidade
+        self._atualizado = time.monotonic()
+
+    def _repor(self, agora):
+        self.disponivel = min(self.capacidade, self.disponivel + (agora - self._atualizado) * self.taxa)
+        self._atualizado = agora
+
+    def espera_para(self, quantidade, agora):
+        """Segundos até haver `quantidade` disponível (0 se já houver)."""
+        self._repor(agora)
+        falta = min(quantidade, self.capacidade) - self.disponivel
+        return max(0.0, falta / self.taxa)
+
+    def consumir(self, quantidade):
+        self.disponivel -= min(quantidade, self.capacidade)
+
+    def devolver(self, quantidade):
+        self.disponivel = min(self.capacidade, self.disponivel + quantidade)
+
+
+class LimitadorTaxa:
+    """Limita pedidos por minuto (RPM) e tokens por minuto (TPM) no processo.
+
+    Os pedidos entram numa fila FIFO e esperam a vez em vez de serem
+    rejeitados; um 429 com retry-after pausa a fila inteira pelo tempo indicado.
+    """
+
+    def __init__(self, rpm, tpm, tentativas=5, espera_base=1.0, espera_maxima=60.0):
+        self.pedidos = BaldeTokens(rpm)
+        self.tokens = BaldeTokens(tpm)
+        self.tentativas = tentativas
+        self.espera_base = espera_base
+        self.espera_maxima = espera_maxima
+        self._fila = deque()
+        self._cond = threading.Condition()
+        self._pausado_ate = 0.0
+        self._proxima_senha = 0
+        self.atendidos = 0
+        self.espera_total = 0.0
+        self.espera_maxima_observada = 0.0
+        self.retentativas = 0
+        self.erros_429 = 0
+
+    def _entrar(self):
+        with self._cond:
+            senha = self._proxima_senha
+            self._proxima_senha += 1
+            self._fila.append(senha)
+            return senha
+
+    def _tentar_sair(self, senha, tokens):
+        """Com o lock: retorna 0 se o pedido foi liberado, senão quantos segundos esperar."""
+        agora = time.monotonic()
+        if self._fila[0] != senha:
+            return None
+        espera = max(
+            self._pausado_ate - agora,
+            self.pedidos.espera_para(1, agora),
+            self.tokens.espera_para(tokens, agora),
+        )
+        if espera > 0:
+            return espera
+        self.pedidos.consumir(1)
+        self.tokens.consumir(tokens)
+        self._fila.popleft()
+        self._cond.notify_all()
+        return 0.0
+
+    def _registrar_espera(self, inicio):
+        espera = time.monotonic() - inicio
+        with self._cond:
+            self.atendidos += 1
+            self.espera_total += espera
+            self.espera_maxima_observada = max(self.espera_maxima_observada, espera)
+
+    def aguardar(self, tokens):
+        """Bloqueia até o pedido (estimado em `tokens`) caber na cota, respeitando a fila."""
+        inicio = time.monotonic()
+        senha = self._entrar()
+        with self._cond:
+            while True:
+                espera = self._tentar_sair(senha, tokens)
+                if espera == 0.0:
+                    break
+                self._cond.wait(timeout=espera)
+        self._registrar_espera(inicio)
+
+    async def aguardar_async(self, tokens):
+        """Versão para corrotinas de `aguardar` (não bloqueia o event loop)."""
+        inicio = time.monotonic()
+        senha = self._entrar()
+        try:
+            while True:
+                with self._cond:
+                    espera = self._tentar_sair(senha, tokens)
+                if espera == 0.0:
+                    break
+                await asyncio.sleep(min(espera, 0.05) if espera is not None else 0.01)
+        except BaseException:
+            # Cancelado enquanto esperava: sai da fila para não travar os seguintes
+            with self._cond:
+                if senha in self._fila:
+                    self._fila.remove(senha)
+                    self._cond.notify_all()
+            raise
+        self._registrar_espera(inicio)
+
+    def ajustar_tokens(self, estimado, real):
+        """Corrige a cota de tokens com o uso real informado pela API."""
+        with self._cond:
+            self.tokens.devolver(estimado - real)
+            # A cota devolvida pode liberar o primeiro da fila antes do fim da espera calculada
+            self._cond.notify_all()
+
+    def espera_retentativa(self, erro, tentativa):
+        """Segundos a esperar antes da próxima tentativa, ou None se não deve repetir."""
+        if not isinstance(erro, _erros_retentaveis()) or tentativa >= self.tentativas:
+            return None
+        # Backoff exponencial com jitter ("full jitter")
+        espera = random.uniform(0, min(self.espera_maxima, self.espera_base * 2 ** tentativa))
+        indicada = _retry_after(erro)
+        limite_429 = getattr(erro, "status_code", None) == 429
+        with self._cond:
+            self.retentativas += 1
+            if limite_429:
+                self.erros_429 += 1
+            if limite_429 and indicada is not None:
+                espera = indicada * random.uniform(1.0, 1.2)
+                # Todos esperam: não adianta os outros pedidos baterem na mesma cota esgotada
+                self._pausado_ate = max(self._pausado_ate, time.monotonic() + indicada)
+            elif indicada is not None:
+                espera = max(espera, indicada)
+        return espera
+
+    def estatisticas(self):
+        with self._cond:
+            return {
+                "fila": len(self._fila),
+                "atendidos": self.atendidos,
+                "espera_media_s": self.espera_total / self.atendidos if self.atendidos else 0.0,
+                "espera_maxima_s": self.espera_maxima_observada,
+                "retentativas": self.retentativas,
+                "erros_429": self.erros_429,
+                "rpm_disponivel": self.pedidos.disponivel,
+                "tpm_disponivel": self.tokens.disponivel,
+            }
+
+
+def _retry_after(erro):
+    """Lê o tempo sugerido pelos cabeçalhos retry-after-ms / retry-after, em segundos."""
+    response = getattr(erro, "response", None)
+    if response is None:
+        return None
+    cabecalhos = response.headers
+    try:
+        if "retry-after-ms" in cabecalhos:
+            return float(cabecalhos["retry-after-ms"]) / 1000
+        if "retry-after" in cabecalhos:
+            return float(cabecalhos["retry-after"])
+    except ValueError:
+        pass
+    return None
+
+
+_limitador = None
+_limitador_lock = threading.Lock()
+
+
+def get_limitador_taxa():
+    """Retorna o limitador compartilhado pelo processo (OPENAI_RPM, OPENAI_TPM, OPENAI_TENTATIVAS)."""
+    global _limitador
+    with _limitador_lock:
+        if _limitador is None:
+            _limitador = LimitadorTaxa(
+                rpm=int(obter_config("OPENAI_RPM", 500)),
+                tpm=int(obter_config("OPENAI_TPM", 200000)),
+                tentativas=int(obter_config("OPENAI_TENTATIVAS", 5)),
+            )
+            # Fila e esperas exportadas com as métricas (Prometheus e painel do admin)
+            get_metricas().registrar_medidor("limitador_taxa", _limitador.estatisticas)
+        return _limitador
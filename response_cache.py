@@ -0,0 +1,126 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from utils import obter_config
+
+
+def normalizar_prompt(texto):
+    """Remove espaços redundantes para que prompts equivalentes gerem a mesma chave."""
+    return re.sub(r"\s+", " ", texto).strip()
+
+
+def calcular_chave(modelo, mensagens, parametros=None):
+    """Gera a chave do cache a partir do modelo, das mensagens e dos parâmetros."""
+    dados = {
+        "modelo": modelo,
+        "mensagens": [{"role": m["role"], "content": normalizar_prompt(m["content"])} for m in mensagens],
+        "parametros": parametros or {},
+    }
+    serializado = json.dumps(dados, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(serializado.encode("utf-8")).hexdigest()
+
+
+class CacheRespostas:
+    """Cache persistente (SQLite) de respostas do modelo, com TTL e despejo LRU por tamanho."""
+
+    def __init__(self, caminho, ttl_segundos, limite_bytes):
+        self.caminho = caminho
+        self.ttl_segundos = ttl_segundos
+        self.limite_bytes = limite_bytes
+        self._lock = threading.Lock()
+        self.acertos = 0
+        self.falhas = 0
+        diretorio = os.path.dirname(caminho)
+        if diretorio:
+            os.makedirs(diretorio, exist_ok=True)
+        with self._conectar() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS respostas (
+                    chave TEXT PRIMARY KEY,
+                    resposta TEXT NOT NULL,
+                    tamanho INTEGER NOT NULL,
+                    criado_em REAL NOT NULL,
+                    acessado_em REAL NOT NULL
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_respostas_acesso ON respostas (acessado_em)")
+
+    def _conectar(self):
+        # Uma conexão por operação: o SQLite cuida da concorrência entre threads e processos
+        return sqlite3.connect(self.caminho, timeout=10)
+
+    def obter(self, chave):
+        """Retorna a resposta em cache (ainda válida) ou None."""
+        agora = time.time()
+        with self._conectar() as conn:
+            linha = conn.execute(
+                "SELECT resposta, criado_em FROM respostas WHERE chave = ?", (chave,)
+            ).fetchone()
+            if linha is None or agora - linha[1] > self.ttl_segundos:
+                if linha is not None:
+                    conn.execute("DELETE FROM respostas WHERE chave = ?", (chave,))
+                with self._lock:
+                    self.falhas += 1
+                return None
+            conn.execute("UPDATE respostas SET acessado_em = ? WHERE chave = ?", (agora, chave))
+        with self._lock:
+            self.acertos += 1
+        return linha[0]
+
+    def guardar(self, chave, resposta):
+        """Armazena a resposta e despeja as menos usadas se o limite for excedido."""
+        agora = time.time()
+        tamanho = len(resposta.encode("utf-8"))
+        with self._conectar() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO respostas (chave, resposta, tamanho, criado_em, acessado_em) VALUES (?, ?, ?, ?, ?)",
+                (chave, resposta, tamanho, agora, agora),
+            )
+            conn.execute("DELETE FROM respostas WHERE criado_em < ?", (agora - self.ttl_segundos,))
+            self._despejar(conn)
+
+    def _despejar(self, conn):
+        total = conn.execute("SELECT COALESCE(SUM(tamanho), 0) FROM respostas").fetchone()[0]
+        if total <= self.limite_bytes:
+            return
+        for chave, tamanho in conn.execute(
+            "SELECT chave, tamanho FROM respostas ORDER BY acessado_em ASC"
+        ).fetchall():
+            if total <= self.limite_bytes:
+                break
+            conn.execute("DELETE FROM respostas WHERE chave = ?", (chave,))
+            total -= tamanho
+
+    def estatisticas(self):
+        """Retorna acertos, falhas, número de entradas e bytes ocupados."""
+        with self._conectar() as conn:
+            itens, total = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(tamanho), 0) FROM respostas"
+            ).fetchone()
+        with self._lock:
+            return {"acertos": self.acertos, "falhas": self.falhas, "itens": itens, "bytes": total}
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache_respostas():
+    """Retorna o cache de respostas compartilhado pelo processo."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = CacheRespostas(
+                caminho=obter_config("RESPOSTAS_CACHE_PATH", os.path.join(".cache", "respostas.sqlite3")),
+                ttl_segundos=float(obter_config("RESPOSTAS_CACHE_TTL_H", 24 * 7)) * 3600,
+                limite_bytes=int(obter_config("RESPOSTAS_CACHE_MAX_MB", 100)) * 1024 * 1024,
+            )
+        return _cache
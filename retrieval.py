@@ -0,0 +1,136 @@
+import hashlib
+import math
+import re
+import threading
+import time
+import unicodedata
+from collections import Counter, OrderedDict, defaultdict
+
+from token_budget import contar_tokens
+from utils import obter_config
+
+# Palavras muito frequentes que não ajudam a diferenciar trechos
+STOPWORDS = {
+    "a", "o", "as", "os", "um", "uma", "uns", "umas", "de", "do", "da", "dos", "das",
+    "em", "no", "na", "nos", "nas", "por", "pelo", "pela", "para", "com", "sem", "e",
+    "ou", "que", "se", "ao", "aos", "como", "mais", "mas", "sua", "seu", "suas", "seus",
+    "este", "esta", "esse", "essa", "isso", "isto", "ele", "ela", "eles", "elas", "nao",
+    "sao", "ser", "foi", "tem", "ja", "entre", "sobre",
+}
+
+
+def tokenizar(texto):
+    """Converte o texto em termos: minúsculas, sem acentos e sem stopwords."""
+    texto = unicodedata.normalize("NFKD", texto.lower())
+    texto = "".join(c for c in texto if not unicodedata.combining(c))
+    return [t for t in re.findall(r"\w+", texto) if len(t) > 1 and t not in STOPWORDS]
+
+
+def dividir_em_trechos(texto, palavras_por_trecho=250, sobreposicao=50):
+    """Divide o texto em trechos de tamanho fixo (em palavras) que se sobrepõem."""
+    palavras = texto.split()
+    if not palavras:
+        return []
+    passo = max(1, palavras_por_trecho - sobreposicao)
+    trechos = []
+    for inicio in range(0, len(palavras), passo):
+        trechos.append(" ".join(palavras[inicio:inicio + palavras_por_trecho]))
+        if inicio + palavras_por_trecho >= len(palavras):
+            break
+    return trechos
+
+
+class IndiceBM25:
+    """Índice lexical BM25 sobre uma lista de trechos."""
+
+    def __init__(self, trechos, k1=1.5, b=0.75):
+        inicio = time.perf_counter()
+        self.trechos = trechos
+        self.k1 = k1
+        self.b = b
+        self.tamanhos = []
+        # Índice invertido: termo -> [(posição do trecho, frequência no trecho)]
+        self.postings = defaultdict(list)
+        for i, trecho in enumerate(trechos):
+            frequencias = Counter(tokenizar(trecho))
+            self.tamanhos.append(sum(frequencias.values()))
+            for termo, freq in frequencias.items():
+                self.postings[termo].append((i, freq))
+        total = len(trechos)
+        self.tamanho_medio = (sum(self.tamanhos) / total) if total else 0.0
+        self.idf = {
+            termo: math.log(1 + (total - len(lista) + 0.5) / (len(lista) + 0.5))
+            for termo, lista in self.postings.items()
+        }
+        self.tempo_construcao = time.perf_counter() - inicio
+
+    def buscar(self, consulta, k=5):
+        """Retorna as posições dos k trechos mais relevantes, em ordem de relevância."""
+        pontuacoes = defaultdict(float)
+        for termo in set(tokenizar(consulta)):
+            idf = self.idf.get(termo)
+            if idf is None:
+                continue
+            for i, freq in self.postings[termo]:
+                normalizacao = self.k1 * (1 - self.b + self.b * self.tamanhos[i] / (self.tamanho_medio or 1))
+                pontuacoes[i] += idf * freq * (self.k1 + 1) / (freq + normalizacao)
+        return sorted(pontuacoes, key=pontuacoes.get, reverse=True)[:k]
+
+
+# Índices já construídos, por hash do texto (compartilhados entre sessões)
+_indices = OrderedDict()
+_indices_lock = threading.Lock()
+_MAX_INDICES = 16
+
+
+def obter_indice(texto):
+    """Retorna o índice BM25 do texto, construindo-o apenas na primeira vez."""
+    chave = hashlib.sha256(texto.encode("utf-8")).hexdigest()
+    with _indices_lock:
+        if chave in _indices:
+            _indices.move_to_end(chave)
+            return _indices[chave]
+
+    indice = IndiceBM25(dividir_em_trechos(
+        texto,
+        palavras_por_trecho=int(obter_config("RETRIEVAL_PALAVRAS_TRECHO", 250)),
+        sobreposicao=int(obter_config("RETRIEVAL_SOBREPOSICAO", 50)),
+    ))
+    with _indices_lock:
+        _indices[chave] = indice
+        while len(_indices) > _MAX_INDICES:
+            _indices.popitem(last=False)
+    return indice
+
+
+def selecionar_contexto(texto, consulta, k=None):
+    """Seleciona os trechos do texto mais relevantes para a consulta.
+
+    Retorna o contexto reduzido (trechos na ordem original do documento) e um
+    relatório com tempos de construção/consulta e a economia estimada de tokens.
+    Textos que já cabem em k trechos são devolvidos inteiros.
+    """
+    k = k or int(obter_config("RETRIEVAL_TOP_K", 6))
+    indice = obter_indice(texto)
+    relatorio = {
+        "trechos_total": len(indice.trechos),
+        "trechos_usados": len(indice.trechos),
+        "tempo_construcao_ms": indice.tempo_construcao * 1000,
+        "tempo_consulta_ms": 0.0,
+        "tokens_original": contar_tokens(texto),
+    }
+    if len(indice.trechos) <= k:
+        relatorio["tokens_contexto"] = relatorio["tokens_original"]
+        return texto, relatorio
+
+    inicio = time.perf_counter()
+    selecionados = indice.buscar(consulta, k)
+    if not selecionados:
+        # Nenhum termo em comum: usa o início do documento
+        selecionados = list(range(k))
+    relatorio["tempo_consulta_ms"] = (time.perf_counter() - inicio) * 1000
+
+    contexto = "\n[...]\n".join(indice.trechos[i] for i in sorted(selecionados))
+    relatorio["trechos_usados"] = len(selecionados)
+    relatorio["tokens_contexto"] = contar_tokens(contexto)
+    return contexto, relatorio
@@ -0,0 +1,141 @@
+import math
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+# Valores distintos acompanhados por coluna não numérica (o excedente é descartado)
+MAX_VALORES_DISTINTOS = 1000
+
+
+class _ResumoColuna:
+    """Estatísticas de uma coluna acumuladas bloco a bloco."""
+
+    def __init__(self, nome):
+        self.nome = nome
+        self.tipos = set()
+        self.preenchidos = 0
+        self.nulos = 0
+        self.n_numericos = 0
+        self.soma = 0.0
+        self.soma_quadrados = 0.0
+        self.minimo = None
+        self.maximo = None
+        self.valores = Counter()
+        self.alta_cardinalidade = False
+
+    def atualizar(self, serie):
+        self.tipos.add(str(serie.dtype))
+        nulos = int(serie.isna().sum())
+        self.nulos += nulos
+        self.preenchidos += len(serie) - nulos
+        valida = serie.dropna()
+        if valida.empty:
+            return
+        if pd.api.types.is_numeric_dtype(valida) and not pd.api.types.is_bool_dtype(valida):
+            valores = valida.astype(float)
+            self.n_numericos += len(valores)
+            self.soma += float(valores.sum())
+            self.soma_quadrados += float((valores ** 2).sum())
+            minimo, maximo = float(valores.min()), float(valores.max())
+            self.minimo = minimo if self.minimo is None else min(self.minimo, minimo)
+            self.maximo = maximo if self.maximo is None else max(self.maximo, maximo)
+        elif not self.alta_cardinalidade:
+            self.valores.update(valida.astype(str).value_counts().to_dict())
+            if len(self.valores) > MAX_VALORES_DISTINTOS:
+                # Coluna do tipo identificador (nomes, matrículas): frequências não ajudam
+                self.alta_cardinalidade = True
+                self.valores = Counter()
+
+    def descrever(self):
+        tipo = next(iter(self.tipos)) if len(self.tipos) == 1 else "misto"
+        partes = [f"- {self.nome} ({tipo}): {self.preenchidos} preenchidos, {self.nulos} vazios"]
+        if self.n_numericos:
+            media = self.soma / self.n_numericos
+            variancia = max(0.0, self.soma_quadrados / self.n_numericos - media ** 2)
+            partes.append(
+                f"min {self.minimo:g}, max {self.maximo:g}, média {media:.4g}, desvio {math.sqrt(variancia):.4g}"
+            )
+        if self.alta_cardinalidade:
+            partes.append(f"mais de {MAX_VALORES_DISTINTOS} valores distintos")
+        elif self.valores:
+            frequentes = ", ".join(f"{valor} ({n})" for valor, n in self.valores.most_common(5))
+            partes.append(f"mais frequentes: {frequentes}")
+        return "; ".join(partes)
+
+
+class ResumoTabela:
+    """Acumula esquema, estatísticas e uma amostra de linhas de uma tabela lida em blocos.
+
+    A memória usada depende do número de colunas e do tamanho da amostra, não do
+    número de linhas.
+    """
+
+    def __init__(self, max_amostra=30, semente=0):
+        self.max_amostra = max_amostra
+        self.colunas = {}
+        self.total_linhas = 0
+        self.amostra = []
+        self._aleatorio = np.random.default_rng(semente)
+
+    def atualizar(self, bloco):
+        for nome in bloco.columns:
+            if nome not in self.colunas:
+                self.colunas[nome] = _ResumoColuna(nome)
+            self.colunas[nome].atualizar(bloco[nome])
+        # Amostragem por reservatório: cada linha tem a mesma chance de entrar na amostra.
+        # As posições são sorteadas de uma vez para o bloco; só as linhas sorteadas são copiadas.
+        inicio = self.total_linhas
+        self.total_linhas += len(bloco)
+        faltam = max(0, min(self.max_amostra - len(self.amostra), len(bloco)))
+        for i in range(faltam):
+            self.amostra.append(tuple(bloco.iloc[i]))
+        if faltam < len(bloco):
+            vistos = np.arange(inicio + faltam + 1, self.total_linhas + 1)
+            posicoes = (self._aleatorio.random(len(vistos)) * vistos).astype(np.int64)
+            for i in np.flatnonzero(posicoes < self.max_amostra):
+                self.amostra[posicoes[i]] = tuple(bloco.iloc[faltam + i])
+
+    def para_texto(self):
+        linhas = [f"Tabela com {self.total_linhas} linhas e {len(self.colunas)} colunas.", "", "Colunas:"]
+        linhas.extend(coluna.descrever() for coluna in self.colunas.values())
+        if self.amostra:
+            amostra = pd.DataFrame(self.amostra, columns=list(self.colunas))
+            linhas += ["", f"Amostra de {len(self.amostra)} linhas:", amostra.to_string(index=False)]
+        return "\n".join(linhas)
+
+
+def resumir_csv(arquivo, linhas_por_bloco=50_000, max_amostra=30):
+    """Lê um CSV em blocos e retorna a representação compacta da tabela."""
+    resumo = ResumoTabela(max_amostra=max_amostra)
+    for bloco in pd.read_csv(arquivo, chunksize=linhas_por_bloco):
+        resumo.atualizar(bloco)
+    return resumo.para_texto()
+
+
+def resumir_xlsx(arquivo, linhas_por_bloco=50_000, max_amostra=30):
+    """Lê a primeira planilha de um XLSX linha a linha (modo read-only do openpyxl)."""
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(arquivo, read_only=True, data_only=True)
+    try:
+        linhas = workbook.worksheets[0].iter_rows(values_only=True)
+        cabecalho = next(linhas, None)
+        resumo = ResumoTabela(max_amostra=max_amostra)
+        if cabecalho is None:
+            return resumo.para_texto()
+        cabecalho = [str(c) if c is not None else f"Unnamed: {i}" for i, c in enumerate(cabecalho)]
+        colunas = len(cabecalho)
+        bloco = []
+        for linha in linhas:
+            # Planilhas sem dimensão gravada (ex.: geradas em modo write-only) vêm com linhas
+            # de tamanhos diferentes: completa as curtas com células vazias
+            bloco.append(tuple(linha[:colunas]) + (None,) * (colunas - len(linha)))
+            if len(bloco) >= linhas_por_bloco:
+                resumo.atualizar(pd.DataFrame(bloco, columns=cabecalho).infer_objects())
+                bloco = []
+        if bloco:
+            resumo.atualizar(pd.DataFrame(bloco, columns=cabecalho).infer_objects())
+        return resumo.para_texto()
+    finally:
+        workbook.close()
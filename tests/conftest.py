@@ -0,0 +1,31 @@
+import os
+import sys
+
+import pytest
+
+# Os módulos do app ficam na raiz do repositório
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def servidor(monkeypatch, tmp_path):
+    """Servidor falso da API (fake_openai_server) ligado aos clientes de openai_functions."""
+    import openai
+
+    import openai_functions
+    from fake_openai_server import ConfigServidor, iniciar_em_segundo_plano
+
+    monkeypatch.setenv("RESPOSTAS_CACHE_PATH", str(tmp_path / "respostas.sqlite3"))
+    monkeypatch.setenv("METRICAS_LOG_PATH", str(tmp_path / "metricas.jsonl"))
+    config = ConfigServidor(distribuicao="uniforme", latencia=0.3, dispersao=0.0)
+    servidor = iniciar_em_segundo_plano(config)
+    servidor.config = config
+    cliente = openai.OpenAI(base_url=servidor.url_base, api_key="teste")
+    monkeypatch.setattr(openai_functions, "get_openai_client", lambda: cliente)
+    # Um cliente por chamada: o pool do cliente assíncrono fica preso ao loop de cada teste
+    monkeypatch.setattr(
+        openai_functions, "get_async_openai_client",
+        lambda: openai.AsyncOpenAI(base_url=servidor.url_base, api_key="teste"),
+    )
+    yield servidor
+    servidor.shutdown()
@@ -0,0 +1,82 @@
+import asyncio
+import threading
+import time
+
+import pandas as pd
+
+import batch_grading
+from background_jobs import CANCELADA, CONCLUIDA, ExecutorTarefas
+
+
+def _turma(alunos=6):
+    gabarito = pd.DataFrame({
+        "questao": ["1", "2"],
+        "resposta": ["A", "Resposta esperada"],
+        "tipo": ["objetiva", "dissertativa"],
+        "valor": ["1", "2,5"],
+    })
+    respostas = pd.DataFrame({
+        "aluno": [f"aluno {i}" for i in range(alunos)],
+        "1": ["A", "b)"] * (alunos // 2),
+        "2": ["texto"] * alunos,
+    })
+    return respostas, gabarito
+
+
+def test_corrigir_turma_aceita_nota_sem_objeto_e_isola_falhas(monkeypatch):
+    chamadas = []
+
+    async def avaliar(questoes, contexto=None):
+        chamadas.append(1)
+        if len(chamadas) == 2:
+            raise RuntimeError("falha da API")
+        return '{"2": 1.5}' if len(chamadas) == 1 else '{"2": {"nota": "2,0", "comentario": "ok"}}'
+
+    monkeypatch.setattr(batch_grading, "avaliar_dissertativas_async", avaliar)
+    respostas, gabarito = _turma(alunos=4)
+    resultado = batch_grading.corrigir_turma(respostas, gabarito)
+    notas = resultado["notas"]
+    assert notas["1"].tolist() == [1.0, 0.0, 1.0, 0.0]
+    assert notas["2"].isna().sum() == 1
+    assert sorted(notas["2"].dropna().tolist()) == [1.5, 2.0, 2.0]
+    assert resultado["por_questao"].loc["2", "valor"] == 2.5
+
+
+def test_cancelar_a_tarefa_interrompe_a_correcao(monkeypatch):
+    iniciadas = []
+    liberar = threading.Event()
+
+    async def avaliar(questoes, contexto=None):
+        iniciadas.append(1)
+        if len(iniciadas) > 1:
+            # Os demais alunos ficam esperando até a tarefa ser cancelada
+            while not liberar.is_set():
+                await asyncio.sleep(0.01)
+        return '{"2": 1}'
+
+    monkeypatch.setattr(batch_grading, "avaliar_dissertativas_async", avaliar)
+    respostas, gabarito = _turma()
+
+    def corrigir(tarefa):
+        return batch_grading.corrigir_turma(
+            respostas, gabarito, ao_concluir=lambda feitos, total: tarefa.relatar(feitos, total)
+        )
+
+    executor = ExecutorTarefas(max_workers=1, ttl_segundos=60)
+    id = executor.enviar("professor", "correcao", corrigir)
+    while executor.obter(id).progresso is None:
+        time.sleep(0.01)
+    executor.cancelar(id)
+    liberar.set()
+    tarefa = executor.obter(id)
+    while not tarefa.finalizada:
+        time.sleep(0.01)
+    assert tarefa.estado == CANCELADA
+    assert tarefa.resultado is None
+
+    # Sem cancelamento, a mesma correção termina normalmente
+    id = executor.enviar("professor", "correcao", corrigir)
+    tarefa = executor.obter(id)
+    while not tarefa.finalizada:
+        time.sleep(0.01)
+    assert tarefa.estado == CONCLUIDA
@@ -0,0 +1,50 @@
+import time
+
+import pytest
+
+import document_summary
+import openai_functions
+from response_cache import CacheRespostas
+
+
+@pytest.fixture
+def cache(monkeypatch, tmp_path):
+    cache = CacheRespostas(str(tmp_path / "respostas.sqlite3"), ttl_segundos=3600, limite_bytes=10 * 1024 * 1024)
+    monkeypatch.setattr(document_summary, "get_cache_respostas", lambda: cache)
+    monkeypatch.setenv("RESUMO_MIN_TOKENS", "10")
+    return cache
+
+
+def _esperar_resumo(chave, prazo=5.0):
+    limite = time.monotonic() + prazo
+    while time.monotonic() < limite:
+        pronto, _ = document_summary.situacao_resumo(chave)
+        if pronto:
+            return True
+        time.sleep(0.02)
+    return False
+
+
+def test_resumo_expirado_e_calculado_de_novo(cache, monkeypatch):
+    chamadas = []
+
+    def resumir_trecho(trecho, parte, total, tokens_saida):
+        chamadas.append(parte)
+        return f"resumo {parte}"
+
+    monkeypatch.setattr(openai_functions, "resumir_trecho", resumir_trecho)
+    monkeypatch.setattr(openai_functions, "combinar_resumos", lambda resumos, tokens_saida: " + ".join(resumos))
+    texto = "material expirado " * 300
+
+    chave = document_summary.iniciar_resumo(texto)
+    assert _esperar_resumo(chave)
+    assert document_summary.iniciar_resumo(texto) == chave
+    assert len(chamadas) == 1
+
+    # O cache expira o resumo: a próxima chamada percebe e o calcula de novo
+    cache.ttl_segundos = 0
+    assert document_summary.situacao_resumo(chave)[0] is False
+    cache.ttl_segundos = 3600
+    document_summary.iniciar_resumo(texto)
+    assert _esperar_resumo(chave)
+    assert len(chamadas) == 2
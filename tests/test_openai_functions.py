@@ -0,0 +1,139 @@
+import asyncio
+import time
+
+import pytest
+
+import openai_functions
+from concurrency import get_limite_concorrencia
+
+
+async def _ler(trechos):
+    return "".join([trecho async for trecho in trechos])
+
+
+def test_async_coalesce_pedidos_identicos(servidor):
+    async def principal():
+        return await asyncio.gather(*(openai_functions._completar_async("Pergunta igual", operacao="t") for _ in range(5)))
+
+    textos = asyncio.run(principal())
+    assert len(set(textos)) == 1 and textos[0]
+    assert servidor.config.pedidos == 1
+
+
+def test_async_coalesce_streams(servidor):
+    async def principal():
+        streams = [await openai_functions._completar_async("Stream igual", stream=True, operacao="t") for _ in range(3)]
+        return await asyncio.gather(*(_ler(s) for s in streams))
+
+    textos = asyncio.run(principal())
+    assert len(set(textos)) == 1 and textos[0]
+    assert servidor.config.pedidos == 1
+
+
+def test_async_segue_chamada_sincrona(servidor):
+    async def principal():
+        sincrona = asyncio.create_task(asyncio.to_thread(openai_functions._completar, "Pergunta mista", operacao="t"))
+        await asyncio.sleep(0.05)
+        assincrona = await openai_functions._completar_async("Pergunta mista", operacao="t")
+        return await sincrona, assincrona
+
+    sincrona, assincrona = asyncio.run(principal())
+    assert sincrona == assincrona
+    assert servidor.config.pedidos == 1
+
+
+def test_forcar_novo_nao_coalesce(servidor):
+    async def principal():
+        return await asyncio.gather(*(
+            openai_functions._completar_async("Pergunta nova", forcar_novo=True, operacao="t") for _ in range(2)
+        ))
+
+    asyncio.run(principal())
+    assert servidor.config.pedidos == 2
+
+
+def test_vaga_liberada_quando_o_lider_abandona_o_stream(servidor):
+    limite = get_limite_concorrencia()
+
+    async def principal():
+        stream = await openai_functions._completar_async("Stream abandonado", stream=True, operacao="t")
+        await stream.__anext__()
+        assert limite.em_andamento == 1
+        await stream.aclose()
+        # A chamada é interrompida na hora, sem esperar o resto do stream (~0,3 s)
+        for _ in range(10):
+            if limite.em_andamento == 0:
+                break
+            await asyncio.sleep(0.005)
+
+    asyncio.run(principal())
+    assert limite.em_andamento == 0
+    assert openai_functions.estatisticas_coalescencia()["em_andamento"] == 0
+
+
+def test_cancelar_o_lider_nao_cancela_o_seguidor(servidor):
+    async def principal():
+        lider = asyncio.create_task(openai_functions._completar_async("Pergunta cancelada", operacao="t"))
+        await asyncio.sleep(0.05)
+        seguidor = asyncio.create_task(openai_functions._completar_async("Pergunta cancelada", operacao="t"))
+        await asyncio.sleep(0.05)
+        lider.cancel()
+        with pytest.raises(RuntimeError, match="cancelada"):
+            await seguidor
+
+    asyncio.run(principal())
+    assert get_limite_concorrencia().em_andamento == 0
+
+
+def test_stream_sincrono_abandonado_libera_a_vaga(servidor):
+    stream = openai_functions._completar("Stream síncrono", stream=True, operacao="t")
+    next(stream)
+    stream.close()
+    prazo = time.monotonic() + 5
+    while get_limite_concorrencia().em_andamento and time.monotonic() < prazo:
+        time.sleep(0.01)
+    assert get_limite_concorrencia().em_andamento == 0
+
+
+@pytest.fixture
+def clientes_falsos(monkeypatch):
+    from fake_openai import criar_clientes_falsos
+
+    sincrono, assincrono = criar_clientes_falsos(latencia=0.01)
+    monkeypatch.setattr(openai_functions, "get_openai_client", lambda: sincrono)
+    monkeypatch.setattr(openai_functions, "get_async_openai_client", lambda: assincrono)
+    return sincrono, assincrono
+
+
+def test_stream_pelo_backend_falso(clientes_falsos):
+    completo = openai_functions._completar("Backend falso", forcar_novo=True, operacao="t")
+    assert "".join(openai_functions._completar("Backend falso", stream=True, forcar_novo=True, operacao="t")) == completo
+
+    async def principal():
+        return await _ler(await openai_functions._completar_async("Backend falso", stream=True, forcar_novo=True, operacao="t"))
+
+    assert asyncio.run(principal()) == completo
+
+
+def test_backend_falso_informa_finish_reason(clientes_falsos):
+    sincrono, _ = clientes_falsos
+    messages = [{"role": "user", "content": "Backend falso"}]
+    chunks = list(sincrono.chat.completions.create(
+        "modelo", messages, stream=True, max_tokens=5, stream_options={"include_usage": True}
+    ))
+    motivos = [chunk.choices[0].finish_reason for chunk in chunks if chunk.choices]
+    assert motivos[:-1] == [None] * (len(motivos) - 1)
+    assert motivos[-1] == "length"
+    assert chunks[-1].usage.total_tokens > 0
+    resposta = sincrono.chat.completions.create("modelo", messages)
+    assert resposta.choices[0].finish_reason == "stop"
+
+
+def test_estimativa_em_partes_soma_custos():
+    argumentos = ("6º ano", "Matemática", "Frações", "Fácil", 10, "Objetivas")
+    inteira = openai_functions.estimar_questoes(*argumentos)
+    em_partes = openai_functions.estimar_questoes(*argumentos, questoes_por_parte=5)
+    parte = openai_functions.estimar_questoes(*argumentos[:4], 5, "Objetivas")
+    assert em_partes["custo_estimado"] > parte["custo_estimado"]
+    assert em_partes["latencia_estimada"] < inteira["latencia_estimada"]
+    assert em_partes["tokens_entrada"] > inteira["tokens_entrada"]
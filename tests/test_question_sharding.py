@@ -0,0 +1,74 @@
+from question_sharding import dividir_em_partes, mesclar_questoes, separar_gabarito
+
+
+def test_dividir_em_partes():
+    assert dividir_em_partes(20, 5) == [5, 5, 5, 5]
+    assert dividir_em_partes(7, 5) == [5, 2]
+
+
+def test_mesclar_renumera_as_partes():
+    partes = [
+        "1. Qual é a capital do Brasil?\n2. Quem escreveu Dom Casmurro?",
+        "1) Qual o maior planeta do sistema solar?\n2) Em que ano terminou a Segunda Guerra?",
+    ]
+    resultado = mesclar_questoes(partes)
+    assert resultado.startswith("1. Qual é a capital")
+    assert "2. Quem escreveu" in resultado
+    assert "3) Qual o maior planeta" in resultado
+    assert "4) Em que ano" in resultado
+
+
+def test_mesclar_remove_quase_duplicatas():
+    partes = [
+        "1. Explique o processo de fotossíntese nas plantas verdes.",
+        "1. Explique o processo da fotossíntese nas plantas verdes.\n2. O que é respiração celular?",
+    ]
+    resultado = mesclar_questoes(partes)
+    assert resultado.count("fotossíntese") == 1
+    assert "2. O que é respiração celular?" in resultado
+
+
+def test_mesclar_mantem_questoes_que_diferem_nos_numeros():
+    partes = [
+        "1. Quanto é 1/2 + 1/4?\na) 3/4\nb) 2/6",
+        "1. Quanto é 1/3 + 1/6?\na) 1/2\nb) 2/9",
+    ]
+    resultado = mesclar_questoes(partes)
+    assert "1. Quanto é 1/2 + 1/4?" in resultado
+    assert "2. Quanto é 1/3 + 1/6?" in resultado
+
+
+def test_mesclar_junta_os_gabaritos_no_fim():
+    partes = [
+        "1. Quanto é 1/2 + 1/4?\n2. Quanto é 2/3 - 1/3?\n\nGabarito:\n1. a\n2. b",
+        "1. Quanto é 1/5 + 2/5?\n2. Quanto é 3/4 - 1/2?\n\nGabarito:\n1. c\n2. a",
+    ]
+    resultado = mesclar_questoes(partes)
+    questoes, cabecalho, itens = separar_gabarito(resultado)
+    assert cabecalho == "Gabarito:"
+    assert itens == ["1. a", "2. b", "3. c", "4. a"]
+    assert "4. Quanto é 3/4 - 1/2?" in questoes
+    assert "5." not in resultado
+
+
+def test_mesclar_descarta_gabarito_de_questao_duplicada():
+    partes = [
+        "1. Quanto é 1/2 + 1/4?\n\n**Gabarito:**\n1. a",
+        "1. Quanto é 1/2 + 1/4?\n2. Quanto é 1/3 + 1/6?\n\n**Gabarito:**\n1. a\n2. d",
+    ]
+    _, cabecalho, itens = separar_gabarito(mesclar_questoes(partes))
+    assert cabecalho == "**Gabarito:**"
+    assert itens == ["1. a", "2. d"]
+
+
+def test_gabarito_numa_linha():
+    _, cabecalho, itens = separar_gabarito("1. Pergunta?\n2. Outra?\nGabarito: 1-a, 2-c")
+    assert cabecalho == "Gabarito:"
+    assert itens == ["1-a", "2-c"]
+
+
+def test_gabarito_de_uma_questao_nao_encerra_a_lista():
+    texto = "1. Pergunta um?\nGabarito: b\n2. Pergunta dois?\nGabarito: c"
+    questoes, cabecalho, itens = separar_gabarito(texto)
+    assert cabecalho is None and itens == []
+    assert questoes == texto
@@ -0,0 +1,32 @@
+import pytest
+
+import openai_functions
+from rate_limiter import LimitadorTaxa
+
+
+def test_fila_fifo_e_estatisticas():
+    limitador = LimitadorTaxa(rpm=600, tpm=60_000)
+    for _ in range(3):
+        limitador.aguardar(100)
+    estatisticas = limitador.estatisticas()
+    assert estatisticas["fila"] == 0
+    assert estatisticas["atendidos"] == 3
+
+
+def test_ajustar_tokens_devolve_a_diferenca():
+    limitador = LimitadorTaxa(rpm=600, tpm=60_000)
+    limitador.aguardar(5_000)
+    assert limitador.tokens.disponivel < 56_000
+    limitador.ajustar_tokens(5_000, 100)
+    assert limitador.tokens.disponivel > 59_000
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_cota_corrigida_com_o_uso_real(servidor, monkeypatch, stream):
+    limitador = LimitadorTaxa(rpm=600, tpm=60_000)
+    monkeypatch.setattr(openai_functions, "get_limitador_taxa", lambda: limitador)
+    resposta = openai_functions._completar("Pergunta curta", stream=stream, forcar_novo=True, tokens_saida=4_000)
+    texto = "".join(resposta) if stream else resposta
+    assert texto
+    # Reservou ~4000 tokens de saída; o uso real foi bem menor e volta para a cota
+    assert limitador.tokens.disponivel > 59_000
@@ -0,0 +1,20 @@
+from openpyxl import Workbook
+
+from tabular_ingestion import resumir_xlsx
+
+
+def test_xlsx_com_linhas_irregulares(tmp_path):
+    workbook = Workbook(write_only=True)
+    planilha = workbook.create_sheet()
+    planilha.append(["aluno", "nota", "turma"])
+    planilha.append(["Ana", 8.5, "A"])
+    planilha.append(["Davi", 9.0, "B", "coluna extra"])
+    planilha.append(["Bruno", 7.0])
+    planilha.append(["Carla"])
+    caminho = tmp_path / "irregular.xlsx"
+    workbook.save(caminho)
+
+    # Blocos de 2 linhas: o segundo só tem linhas mais curtas que o cabeçalho
+    texto = resumir_xlsx(caminho, linhas_por_bloco=2)
+    assert "Tabela com 4 linhas e 3 colunas." in texto
+    assert "Carla" in texto
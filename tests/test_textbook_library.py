@@ -0,0 +1,66 @@
+from textbook_library import Biblioteca, construir_indice, rotulo
+
+
+def _resumo(capitulos):
+    return [
+        (c["numero"], c["titulo"], c["paginas"], [(m["numero"], m["titulo"], m["paginas"]) for m in c["modulos"]])
+        for c in capitulos
+    ]
+
+
+def test_capitulos_e_modulos_por_pagina():
+    paginas = [
+        "Capítulo 1 – Números\nMódulo 1 – Naturais\nTexto sobre naturais.",
+        "Módulo 2 – Inteiros\nTexto sobre inteiros.",
+        "Capítulo 2 – Frações\nMódulo 1: Conceito\nTexto sobre frações.",
+    ]
+    _, capitulos = construir_indice(paginas)
+    assert _resumo(capitulos) == [
+        (1, "Números", [1, 2], [(1, "Naturais", [1, 1]), (2, "Inteiros", [2, 2])]),
+        (2, "Frações", [3, 3], [(1, "Conceito", [3, 3])]),
+    ]
+
+
+def test_sumario_e_cabecalhos_repetidos():
+    paginas = [
+        "Sumário\nCapítulo 1 – Números\nMódulo 1 – Naturais\nMódulo 2 – Inteiros\nCapítulo 2 – Frações\nMódulo 1 – Conceito",
+        "Capítulo 1 – Números\nMódulo 1 – Naturais\nTexto sobre naturais.",
+        "Capítulo 1 – Números\nMódulo 2 – Inteiros\nTexto sobre inteiros.",
+        "Capítulo 2 – Frações\nMódulo 1 – Conceito\nTexto sobre frações.",
+        "Capítulo 2 – Frações\nMais texto sobre frações.",
+    ]
+    _, capitulos = construir_indice(paginas)
+    assert _resumo(capitulos) == [
+        (1, "Números", [2, 3], [(1, "Naturais", [2, 2]), (2, "Inteiros", [3, 3])]),
+        (2, "Frações", [4, 5], [(1, "Conceito", [4, 5])]),
+    ]
+
+
+def test_sumario_com_pontilhado_e_numeros_romanos():
+    paginas = [
+        "Capítulo I – Origens ........ 2\nCapítulo II – Expansão ........ 3",
+        "CAPÍTULO I - Origens\nTexto.",
+        "Capítulo II. Expansão\nTexto.",
+    ]
+    _, capitulos = construir_indice(paginas)
+    assert [(c["numero"], c["titulo"], c["paginas"]) for c in capitulos] == [
+        (1, "Origens", [2, 2]),
+        (2, "Expansão", [3, 3]),
+    ]
+
+
+def test_offsets_delimitam_o_texto_do_capitulo(tmp_path):
+    paginas = [
+        "Introdução sem capítulo.",
+        "Capítulo 1 – Água\nO ciclo da água.",
+        "Capítulo 2 – Ar\nA composição do ar.",
+    ]
+    dados, capitulos = construir_indice(paginas)
+    primeiro = capitulos[0]
+    assert dados[primeiro["inicio"]:primeiro["fim"]].decode("utf-8").strip() == "Capítulo 1 – Água\nO ciclo da água."
+    assert rotulo(primeiro, "capitulo") == "Capítulo 1 – Água"
+
+    biblioteca = Biblioteca(str(tmp_path))
+    indice = biblioteca.ingerir("\n".join(paginas).encode("utf-8"), "ciencias.txt", componente="Ciências")
+    texto, item = biblioteca.trecho(indice["id"], 2)
+    assert texto.startswith("Capítulo 2 – Ar") and item["paginas"] is None
@@ -0,0 +1,334 @@
+"""Biblioteca de livros didáticos da escola, ingeridos uma vez no servidor.
+
+Na ingestão, o texto do livro é extraído (página a página, no caso de PDF),
+os títulos de capítulos e módulos são detectados e um índice é gravado em
+disco junto com o texto:
+
+    <BIBLIOTECA_DIR>/<id>/texto.txt    texto completo em UTF-8
+    <BIBLIOTECA_DIR>/<id>/indice.json  capítulos e módulos -> páginas e offsets (bytes)
+
+Na consulta, o texto é aberto com mmap e só a fatia do capítulo/módulo
+escolhido é decodificada, sem reler nem reprocessar o livro.
+
+Uso (a partir da raiz do repositório):
+    python textbook_library.py ingerir livro.pdf --titulo "Matemática 6º ano" --componente Matemática --ano "EF - 6º Ano"
+    python textbook_library.py listar
+"""
+import argparse
+import bisect
+import hashlib
+import json
+import logging
+import mmap
+import os
+import re
+import sys
+import threading
+from io import BytesIO
+
+from instrumentation import medir
+from utils import obter_config
+
+logger = logging.getLogger(__name__)
+
+EXTENSOES = (".pdf", ".docx", ".txt")
+
+# Títulos ocupam uma linha curta começando pela palavra-chave e o número (arábico ou romano)
+_NUMERO = r"(\d{1,3}|[IVXLC]{1,7})\b"
+_SEPARADOR = r"[\s:.\-–—]*"
+PADRAO_CAPITULO = re.compile(rf"^\s*(?:cap[ií]tulo|unidade)\s+{_NUMERO}{_SEPARADOR}(.*)$", re.IGNORECASE)
+PADRAO_MODULO = re.compile(rf"^\s*(?:m[óo]dulo|se[çc][ãa]o|aula|tema)\s+{_NUMERO}{_SEPARADOR}(.*)$", re.IGNORECASE)
+# Linhas de sumário: "Capítulo 3 – Frações ........ 45"
+PADRAO_SUMARIO = re.compile(r"(\.{3,}|…)\s*\d+\s*$")
+MAX_CARACTERES_TITULO = 120
+
+_ROMANOS = {"I": 1, "V": 5, "X": 10, "L": 50, "C": 100}
+
+
+def _numero(texto):
+    if texto.isdigit():
+        return int(texto)
+    valores = [_ROMANOS[c] for c in texto.upper()]
+    return sum(-v if i + 1 < len(valores) and v < valores[i + 1] else v for i, v in enumerate(valores))
+
+
+def _no_corpo(ocorrencias):
+    """Primeira ocorrência de cada número no corpo do texto.
+
+    `ocorrencias` são (offset, nivel, número, título) em ordem de offset. O
+    texto é dividido em sequências de números não decrescentes (o sumário é
+    uma sequência, o corpo é outra); vale a sequência com mais números
+    distintos e, no empate, a mais longa. Nela, cada número conta na sua
+    primeira ocorrência, o que ignora cabeçalhos repetidos no alto das páginas.
+    """
+    sequencias = []
+    for ocorrencia in ocorrencias:
+        if not sequencias or ocorrencia[2] < sequencias[-1][-1][2]:
+            sequencias.append([])
+        sequencias[-1].append(ocorrencia)
+    if not sequencias:
+        return []
+    corpo = max(sequencias, key=lambda seq: (len({o[2] for o in seq}), seq[-1][0] - seq[0][0]))
+    primeiras = {}
+    for ocorrencia in corpo:
+        primeiras.setdefault(ocorrencia[2], ocorrencia)
+    return list(primeiras.values())
+
+
+def detectar_titulos(linhas):
+    """Encontra os títulos de capítulos e módulos.
+
+    `linhas` é uma lista de (offset em bytes, texto da linha). Retorna uma
+    lista ordenada de (offset, "capitulo" ou "modulo", número, título). Se o
+    mesmo capítulo aparece mais de uma vez (no sumário, em cabeçalhos de
+    página), vale a primeira ocorrência no corpo do livro (ver _no_corpo); o
+    mesmo para módulos dentro de um capítulo.
+    """
+    encontrados = []
+    for offset, linha in linhas:
+        if len(linha) > MAX_CARACTERES_TITULO or PADRAO_SUMARIO.search(linha):
+            continue
+        for nivel, padrao in (("capitulo", PADRAO_CAPITULO), ("modulo", PADRAO_MODULO)):
+            achado = padrao.match(linha)
+            if achado:
+                encontrados.append((offset, nivel, _numero(achado.group(1)), achado.group(2).strip()))
+                break
+
+    titulos = _no_corpo([t for t in encontrados if t[1] == "capitulo"])
+    # Módulos: agrupados pelo capítulo em que caem (0 = antes do primeiro capítulo)
+    inicios = [t[0] for t in titulos]
+    por_capitulo = {}
+    for ocorrencia in encontrados:
+        if ocorrencia[1] == "modulo":
+            por_capitulo.setdefault(bisect.bisect_right(inicios, ocorrencia[0]), []).append(ocorrencia)
+    for ocorrencias in por_capitulo.values():
+        titulos += _no_corpo(ocorrencias)
+    return sorted(titulos)
+
+
+def _extrair_paginas(dados, extensao):
+    """Texto de cada página (PDF) ou uma única "página" com o documento inteiro."""
+    if extensao == ".pdf":
+        from pdf_extraction import extrair_paginas_pdf
+
+        return extrair_paginas_pdf(dados), True
+    from file_processing import MANIPULADORES
+
+    return [MANIPULADORES[extensao](BytesIO(dados))], False
+
+
+def construir_indice(paginas, tem_paginas=True):
+    """Monta o texto completo e o índice de capítulos/módulos a partir das páginas.
+
+    Retorna (bytes do texto, lista de capítulos). Cada capítulo e módulo tem
+    número, título, offsets [inicio, fim) em bytes e a faixa de páginas
+    (numeradas a partir de 1, ou None se o formato não tem páginas).
+    """
+    linhas = []
+    inicios_paginas = []
+    offset = 0
+    for pagina in paginas:
+        inicios_paginas.append(offset)
+        for linha in pagina.split("\n"):
+            linhas.append((offset, linha))
+            offset += len(linha.encode("utf-8")) + 1
+    dados = "\n".join(linha for _, linha in linhas).encode("utf-8")
+    total = len(dados)
+
+    offsets = [o for o, _ in linhas]
+
+    def corte(inicio):
+        """Onde termina o item anterior a um título: no início da página, se antes do
+        título nela só houver linhas vazias ou cabeçalhos repetidos."""
+        if not tem_paginas:
+            return inicio
+        pagina = inicios_paginas[bisect.bisect_right(inicios_paginas, inicio) - 1]
+        anteriores = linhas[bisect.bisect_left(offsets, pagina):bisect.bisect_left(offsets, inicio)]
+        if all(not linha.strip() or PADRAO_CAPITULO.match(linha) or PADRAO_MODULO.match(linha) for _, linha in anteriores):
+            return pagina
+        return inicio
+
+    def faixa_paginas(inicio, fim):
+        if not tem_paginas:
+            return None
+        return [bisect.bisect_right(inicios_paginas, inicio), bisect.bisect_right(inicios_paginas, max(inicio, fim - 1))]
+
+    capitulos = []
+    titulos = detectar_titulos(linhas)
+    for inicio, nivel, numero, titulo in titulos:
+        if nivel == "capitulo":
+            capitulos.append({"numero": numero, "titulo": titulo, "inicio": inicio, "modulos": []})
+        elif capitulos:
+            capitulos[-1]["modulos"].append({"numero": numero, "titulo": titulo, "inicio": inicio})
+        # módulos antes do primeiro capítulo (introdução) ficam de fora
+    for i, capitulo in enumerate(capitulos):
+        capitulo["fim"] = max(corte(capitulos[i + 1]["inicio"]), capitulo["inicio"]) if i + 1 < len(capitulos) else total
+        capitulo["paginas"] = faixa_paginas(capitulo["inicio"], capitulo["fim"])
+        modulos = capitulo["modulos"]
+        for j, modulo in enumerate(modulos):
+            modulo["fim"] = max(corte(modulos[j + 1]["inicio"]), modulo["inicio"]) if j + 1 < len(modulos) else capitulo["fim"]
+            modulo["paginas"] = faixa_paginas(modulo["inicio"], modulo["fim"])
+    return dados, capitulos
+
+
+def rotulo(item, tipo):
+    """Texto exibido e enviado no prompt, ex.: "Capítulo 3 – Frações"."""
+    nome = "Capítulo" if tipo == "capitulo" else "Módulo"
+    return f"{nome} {item['numero']}" + (f" – {item['titulo']}" if item["titulo"] else "")
+
+
+class Biblioteca:
+    """Livros ingeridos em `diretorio`, com o texto aberto por mmap sob demanda."""
+
+    def __init__(self, diretorio):
+        self.diretorio = diretorio
+        self._indices = {}
+        self._mapas = {}
+        self._lock = threading.Lock()
+        os.makedirs(diretorio, exist_ok=True)
+
+    def _pasta(self, id):
+        return os.path.join(self.diretorio, id)
+
+    def ingerir(self, dados, nome_arquivo, titulo=None, componente=None, ano=None):
+        """Extrai, indexa e grava o livro; retorna o índice. Reingerir o mesmo arquivo não refaz nada."""
+        extensao = os.path.splitext(nome_arquivo)[1].lower()
+        if extensao not in EXTENSOES:
+            raise ValueError(f"Formato não suportado para a biblioteca: {extensao}")
+        id = hashlib.sha256(dados).hexdigest()[:16]
+        existente = self.indice(id)
+        if existente is not None:
+            return existente
+
+        with medir("biblioteca_ingestao", extensao=extensao, bytes=len(dados)) as evento:
+            paginas, tem_paginas = _extrair_paginas(dados, extensao)
+            texto, capitulos = construir_indice(paginas, tem_paginas)
+            evento["capitulos"] = len(capitulos)
+            evento["modulos"] = sum(len(c["modulos"]) for c in capitulos)
+        if not capitulos:
+            logger.warning("Nenhum capítulo detectado em %s", nome_arquivo)
+        indice = {
+            "id": id,
+            "titulo": titulo or os.path.splitext(os.path.basename(nome_arquivo))[0],
+            "componente": componente,
+            "ano": ano,
+            "arquivo": os.path.basename(nome_arquivo),
+            "bytes": len(texto),
+            "paginas": len(paginas) if tem_paginas else None,
+            "capitulos": capitulos,
+        }
+
+        pasta = self._pasta(id)
+        temporaria = f"{pasta}.{threading.get_ident()}.tmp"
+        os.makedirs(temporaria, exist_ok=True)
+        with open(os.path.join(temporaria, "texto.txt"), "wb") as f:
+            f.write(texto)
+        with open(os.path.join(temporaria, "indice.json"), "w", encoding="utf-8") as f:
+            json.dump(indice, f, ensure_ascii=False)
+        try:
+            os.rename(temporaria, pasta)
+        except OSError:
+            # Outro processo ingeriu o mesmo livro ao mesmo tempo
+            for nome in os.listdir(temporaria):
+                os.remove(os.path.join(temporaria, nome))
+            os.rmdir(temporaria)
+        return self.indice(id)
+
+    def indice(self, id):
+        """Índice do livro, ou None se ele não está na biblioteca."""
+        with self._lock:
+            if id in self._indices:
+                return self._indices[id]
+        try:
+            with open(os.path.join(self._pasta(id), "indice.json"), encoding="utf-8") as f:
+                indice = json.load(f)
+        except FileNotFoundError:
+            return None
+        with self._lock:
+            self._indices[id] = indice
+        return indice
+
+    def listar(self, componente=None):
+        """Índices de todos os livros (opcionalmente só os do componente), por título."""
+        livros = []
+        for nome in os.listdir(self.diretorio):
+            if nome.endswith(".tmp"):
+                continue
+            indice = self.indice(nome)
+            if indice is not None and (componente is None or indice["componente"] in (None, componente)):
+                livros.append(indice)
+        return sorted(livros, key=lambda livro: livro["titulo"])
+
+    def _mapa(self, id):
+        with self._lock:
+            mapa = self._mapas.get(id)
+            if mapa is None:
+                with open(os.path.join(self._pasta(id), "texto.txt"), "rb") as f:
+                    mapa = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                self._mapas[id] = mapa
+            return mapa
+
+    def trecho(self, id, capitulo, modulo=None):
+        """Texto do capítulo (ou de um módulo dele), lido da fatia do mmap.
+
+        Retorna (texto, item do índice); levanta KeyError se o livro, o
+        capítulo ou o módulo não existem.
+        """
+        indice = self.indice(id)
+        if indice is None:
+            raise KeyError(f"livro {id} não está na biblioteca")
+        item = next((c for c in indice["capitulos"] if c["numero"] == capitulo), None)
+        if item is not None and modulo is not None:
+            item = next((m for m in item["modulos"] if m["numero"] == modulo), None)
+        if item is None:
+            raise KeyError(f"capítulo {capitulo}" + (f" / módulo {modulo}" if modulo is not None else ""))
+        if item["fim"] <= item["inicio"]:
+            return "", item
+        return str(self._mapa(id)[item["inicio"]:item["fim"]], "utf-8", errors="replace"), item
+
+
+_biblioteca = None
+_biblioteca_lock = threading.Lock()
+
+
+def get_biblioteca():
+    """Retorna a biblioteca compartilhada pelo processo (BIBLIOTECA_DIR)."""
+    global _biblioteca
+    with _biblioteca_lock:
+        if _biblioteca is None:
+            _biblioteca = Biblioteca(obter_config("BIBLIOTECA_DIR", "biblioteca"))
+        return _biblioteca
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    comandos = parser.add_subparsers(dest="comando", required=True)
+    ingerir = comandos.add_parser("ingerir", help="adiciona um livro (.pdf, .docx ou .txt) à biblioteca")
+    ingerir.add_argument("arquivo")
+    ingerir.add_argument("--titulo")
+    ingerir.add_argument("--componente")
+    ingerir.add_argument("--ano")
+    comandos.add_parser("listar", help="lista os livros e seus capítulos")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    biblioteca = get_biblioteca()
+    if args.comando == "ingerir":
+        with open(args.arquivo, "rb") as f:
+            dados = f.read()
+        indice = biblioteca.ingerir(dados, args.arquivo, args.titulo, args.componente, args.ano)
+        livros = [indice]
+    else:
+        livros = biblioteca.listar()
+    for livro in livros:
+        print(f"{livro['id']}  {livro['titulo']} ({livro['componente'] or '-'}, {livro['ano'] or '-'})")
+        for capitulo in livro["capitulos"]:
+            paginas = f" p. {capitulo['paginas'][0]}-{capitulo['paginas'][1]}" if capitulo["paginas"] else ""
+            print(f"    {rotulo(capitulo, 'capitulo')}{paginas}")
+            for modulo in capitulo["modulos"]:
+                print(f"        {rotulo(modulo, 'modulo')}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,163 @@
+import hashlib
+import math
+import re
+import threading
+from collections import OrderedDict
+
+from utils import obter_config
+
+# Janela de contexto e preço (US$ por 1M de tokens) por modelo
+MODELOS = {
+    "gpt-3.5-turbo": {"contexto": 16385, "preco_entrada": 0.50, "preco_saida": 1.50},
+    "gpt-4o-mini": {"contexto": 128000, "preco_entrada": 0.15, "preco_saida": 0.60},
+    "gpt-4o": {"contexto": 128000, "preco_entrada": 2.50, "preco_saida": 10.00},
+}
+
+# Tokens extras por mensagem do chat (papel, separadores)
+TOKENS_POR_MENSAGEM = 4
+MAX_TOKENS_SAIDA = 4096
+# Menor reserva aceitável para a resposta: abaixo disso o pedido é recusado antes da chamada
+MIN_TOKENS_SAIDA = 256
+
+
+class PedidoGrandeDemais(ValueError):
+    """As instruções do pedido não deixam espaço para a resposta na janela do modelo."""
+
+_encoder = None
+_encoder_carregado = False
+_encoder_lock = threading.Lock()
+
+# Contagens já feitas, por hash do texto (reruns do Streamlit repetem os mesmos textos)
+_contagens = OrderedDict()
+_contagens_lock = threading.Lock()
+_MAX_CONTAGENS = 256
+
+
+def _obter_encoder():
+    """Carrega o tiktoken uma única vez; retorna None se não estiver disponível."""
+    global _encoder, _encoder_carregado
+    if not _encoder_carregado:
+        with _encoder_lock:
+            if not _encoder_carregado:
+                try:
+                    import tiktoken
+                    _encoder = tiktoken.get_encoding("cl100k_base")
+                except Exception:
+                    # Sem tiktoken (ou sem acesso ao arquivo de encoding): usa a estimativa
+                    _encoder = None
+                _encoder_carregado = True
+    return _encoder
+
+
+def contar_tokens(texto):
+    """Conta os tokens do texto localmente (tiktoken ou estimativa por caracteres)."""
+    if not texto:
+        return 0
+    encoder = _obter_encoder()
+    if encoder is None:
+        # Português fica em torno de 3,5 caracteres por token no cl100k
+        return math.ceil(len(texto) / 3.5)
+    if len(texto) < 2048:
+        return len(encoder.encode_ordinary(texto))
+
+    chave = hashlib.blake2b(texto.encode("utf-8"), digest_size=16).digest()
+    with _contagens_lock:
+        if chave in _contagens:
+            _contagens.move_to_end(chave)
+            return _contagens[chave]
+    total = len(encoder.encode_ordinary(texto))
+    with _contagens_lock:
+        _contagens[chave] = total
+        while len(_contagens) > _MAX_CONTAGENS:
+            _contagens.popitem(last=False)
+    return total
+
+
+def cortar_em_tokens(texto, limite):
+    """Retorna o início do texto com no máximo `limite` tokens."""
+    if limite <= 0:
+        return ""
+    encoder = _obter_encoder()
+    if encoder is None:
+        return texto[:int(limite * 3.5)]
+    tokens = encoder.encode_ordinary(texto)
+    return texto if len(tokens) <= limite else encoder.decode(tokens[:limite])
+
+
+def compactar(texto):
+    """Remove espaços e linhas em branco redundantes (comum em textos extraídos de PDF)."""
+    texto = re.sub(r"[ \t]+", " ", texto)
+    return re.sub(r"\n\s*\n+", "\n", texto).strip()
+
+
+def tokens_saida_questoes(numero_questoes, tipo):
+    por_questao = 250 if tipo == "Dissertativas" else 150
+    return min(MAX_TOKENS_SAIDA, 200 + int(numero_questoes) * por_questao)
+
+
+def tokens_saida_plano(duracao):
+    return min(MAX_TOKENS_SAIDA, 800 + int(duracao) * 20)
+
+
+def tokens_saida_correcao(respostas_aluno, gabarito):
+    # A análise cresce com o número de questões: estimada pelo tamanho das respostas e do gabarito
+    return min(MAX_TOKENS_SAIDA, 600 + 2 * (contar_tokens(respostas_aluno) + contar_tokens(gabarito)))
+
+
+def _dados_modelo(modelo):
+    return MODELOS.get(modelo, MODELOS["gpt-3.5-turbo"])
+
+
+def estimar_custo_latencia(modelo, tokens_entrada, tokens_saida):
+    """Estima custo (US$) e latência (s) de uma chamada."""
+    dados = _dados_modelo(modelo)
+    custo = (tokens_entrada * dados["preco_entrada"] + tokens_saida * dados["preco_saida"]) / 1_000_000
+    latencia = (
+        float(obter_config("LATENCIA_BASE_S", 0.6))
+        + tokens_entrada / float(obter_config("TOKENS_ENTRADA_POR_S", 5000))
+        + tokens_saida / float(obter_config("TOKENS_SAIDA_POR_S", 60))
+    )
+    return custo, latencia
+
+
+def planejar(modelo, mensagem_sistema, prompt, contexto, tokens_saida):
+    """Ajusta o contexto para que sistema + contexto + prompt + saída caibam na janela do modelo.
+
+    `contexto` vai numa mensagem própria, entre o sistema e o `prompt`, e é o
+    único trecho que pode ser compactado/cortado. Retorna um dicionário com o
+    contexto final, as contagens de tokens e as estimativas de custo e latência.
+
+    Levanta PedidoGrandeDemais se, sem contexto, sobram menos de
+    MIN_TOKENS_SAIDA (ou `tokens_saida`, se menor) para a resposta.
+    """
+    limite = int(obter_config("MODELO_LIMITE_CONTEXTO", _dados_modelo(modelo)["contexto"]))
+    tokens_contexto = contar_tokens(contexto)
+    mensagens = 3 if contexto else 2
+    tokens_fixos = contar_tokens(mensagem_sistema) + contar_tokens(prompt) + mensagens * TOKENS_POR_MENSAGEM
+    if limite - tokens_fixos < min(tokens_saida, MIN_TOKENS_SAIDA):
+        raise PedidoGrandeDemais(
+            f"O pedido tem ~{tokens_fixos} tokens e não deixa espaço para a resposta "
+            f"(janela de {limite} tokens do modelo). Envie textos menores ou divida o pedido."
+        )
+    tokens_saida = min(tokens_saida, limite - tokens_fixos)
+    disponivel = max(0, limite - tokens_fixos - tokens_saida)
+
+    cortado = False
+    if contexto and tokens_contexto > disponivel:
+        contexto = compactar(contexto)
+        if contar_tokens(contexto) > disponivel:
+            contexto = cortar_em_tokens(contexto, disponivel)
+        tokens_contexto = contar_tokens(contexto)
+        cortado = True
+
+    tokens_entrada = tokens_fixos + tokens_contexto
+    custo, latencia = estimar_custo_latencia(modelo, tokens_entrada, tokens_saida)
+    return {
+        "contexto": contexto,
+        "tokens_entrada": tokens_entrada,
+        "tokens_contexto": tokens_contexto,
+        "tokens_saida": tokens_saida,
+        "contexto_cortado": cortado,
+        "custo_estimado": custo,
+        "latencia_estimada": latencia,
+    }
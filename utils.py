@@ -1,3 +1,4 @@
+import os
 import streamlit as st
 
 def redirecionar_com_query_params(params: dict):
@@ -10,3 +11,36 @@ def redirecionar_com_query_params(params: dict):
     </script>
     """
     st.markdown(js_code, unsafe_allow_html=True)
+
+def obter_config(nome, padrao=None):
+    """Lê uma configuração do st.secrets, depois das variáveis de ambiente."""
+    try:
+        if nome in st.secrets:
+            return st.secrets[nome]
+    except Exception:
+        # Sem secrets.toml (ex.: scripts fora do Streamlit)
+        pass
+    return os.environ.get(nome, padrao)
+
+def guardar_contexto_da_sessao(texto):
+    """Guarda o texto do arquivo enviado no armazém compartilhado; a sessão fica só com a chave."""
+    from context_store import get_armazem_contexto
+
+    chave = get_armazem_contexto().guardar(texto)
+    st.session_state["uploaded_file_ref"] = chave
+    return chave
+
+def contexto_da_sessao():
+    """Texto do arquivo enviado nesta sessão (ou o seu resumo, se o professor optou por ele), ou None."""
+    from context_store import get_armazem_contexto
+
+    chave = st.session_state.get("uploaded_file_ref")
+    if not chave:
+        return None
+    if st.session_state.get("usar_resumo"):
+        from document_summary import obter_resumo
+
+        resumo = obter_resumo(chave)
+        if resumo:
+            return resumo
+    return get_armazem_contexto().obter(chave)